@@ -0,0 +1,174 @@
+"""End-to-end benchmark of the SDK against a local lemon.markets stand-in.
+
+Measures throughput and latency percentiles of MarketData.latest_quote,
+MarketData.ohlc, paginated Account.orders and the Order place -> activate ->
+reload cycle, all going through the real transport (sessions, rate limiter,
+retries, pagination, JSON decoding) to benchmarks.server.FakeLemonServer.
+
+The results are compared with a stored baseline, --save-baseline replaces it.
+
+Usage:
+        python -m benchmarks.bench_e2e [--ops 200] [--concurrency 4] [--latency 0.002] [--pages 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.server import FakeLemonServer
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def benchmarks(pages: int) -> dict:
+    """Operations to benchmark by name, each performs one SDK call (or cycle)."""
+    from lemon.common.enums import ORDERSIDE, TIMESPAN, VENUE
+    from lemon.core.account import Account
+    from lemon.core.market import MarketData
+    from lemon.core.orders import Order
+
+    market = MarketData()
+    expires_at = datetime.now() + timedelta(days=1)
+
+    def order_cycle() -> None:
+        order = Order('US0378331005', expires_at, ORDERSIDE.BUY, 1, VENUE.GETTEX)
+        order.place()
+        order.activate()
+        order.reload()
+
+    return {
+        'latest_quote': lambda: market.latest_quote('US0378331005'),
+        'ohlc': lambda: market.ohlc(
+            'IE00B3RBWM25',
+            datetime(2022, 4, 4),
+            datetime(2022, 4, 5),
+            TIMESPAN.DAY,
+        ),
+        f'orders ({pages} pages)': lambda: Account().orders(),
+        'place/activate/reload': order_cycle,
+    }
+
+
+def measure(func, ops: int, concurrency: int) -> dict:
+    """Run func ops times on concurrency threads.
+
+    Returns:
+            dict: Throughput in operations per second and latency percentiles in ms
+    """
+
+    def timed(_) -> float:
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
+
+    func()  # warm up connections
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(timed, range(ops)))
+    elapsed = time.perf_counter() - started
+
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    return {
+        'ops_per_s': round(ops / elapsed, 1),
+        'p50_ms': round(percentile(0.5), 2),
+        'p90_ms': round(percentile(0.9), 2),
+        'p99_ms': round(percentile(0.99), 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Names of the benchmarks that regressed against the baseline.
+
+    A benchmark regressed if its throughput dropped or its median latency rose by
+    more than tolerance, e.g. 0.25 for 25%.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slower = result['p50_ms'] > base['p50_ms'] * (1 + tolerance)
+        fewer = result['ops_per_s'] < base['ops_per_s'] / (1 + tolerance)
+        if slower or fewer:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ops', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument(
+        '--latency', type=float, default=0.002, help='seconds per response'
+    )
+    parser.add_argument('--pages', type=int, default=5, help='pages of list endpoints')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    config = {
+        'ops': args.ops,
+        'concurrency': args.concurrency,
+        'latency': args.latency,
+        'pages': args.pages,
+    }
+    with FakeLemonServer(latency=args.latency, pages=args.pages) as server:
+        server.install()
+
+        from lemon.common.ratelimit import RateLimiter
+        from lemon.common.requests import ApiRequest
+        from lemon.common.sessions import HOSTS
+        from lemon.core.account import Account
+
+        Account(credentials='bench')
+        # Measure the transport, not the pacing of the plans or shared results
+        for type in HOSTS:
+            RateLimiter().configure(type, 10**9)
+        ApiRequest.coalesce = False
+
+        results = {
+            name: measure(func, args.ops, args.concurrency)
+            for name, func in benchmarks(args.pages).items()
+        }
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            stored = json.load(file)
+        if stored.get('config') != config:
+            print(f"Baseline was recorded with {stored.get('config')}, not {config}")
+        baseline = stored.get('results', {})
+
+    print(
+        f"{'benchmark':<24} {'ops/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+        f"{'vs base':>8}"
+    )
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = f"{result['ops_per_s'] / base['ops_per_s']:>7.2f}x" if base else ''
+        print(
+            f"{name:<24} {result['ops_per_s']:>9.1f} {result['p50_ms']:>8.2f} "
+            f"{result['p90_ms']:>8.2f} {result['p99_ms']:>8.2f} {change:>8}"
+        )
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump({'config': config, 'results': results}, file, indent=2)
+            file.write('\n')
+        print(f'Saved baseline to {args.baseline}')
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name in regressions:
+        print(f'Regression: {name} is more than {args.tolerance:.0%} slower')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Microbenchmark of JSON decoding of realistic /orders/ and /ohlc/ responses.
+
+Compares requests.Response.json() (decode to str, stdlib json) with parsing the raw
+bytes with the stdlib and every installed fast decoder.
+
+Usage:
+        python -m benchmarks.bench_json [--repeat 20]
+"""
+import argparse
+import json
+import timeit
+
+import requests
+
+
+def order_result(**overrides) -> dict:
+    """An order as returned by lemon.markets."""
+    order = {
+        'created_at': '2022-04-02T18:10:54.613+00:00',
+        'id': 'ord_abcdefghijklmnopqrstuvwxyz12345678',
+        'status': 'executed',
+        'regulatory_information': {
+            'costs_entry': 20000,
+            'costs_entry_pct': '1.18%',
+            'costs_running': 0,
+            'costs_running_pct': '0.00%',
+            'costs_product': 0,
+            'costs_product_pct': '0.00%',
+            'costs_exit': 20000,
+            'costs_exit_pct': '1.18%',
+            'yield_reduction_year': 20000,
+            'yield_reduction_year_pct': '1.18%',
+            'yield_reduction_year_following': 0,
+            'yield_reduction_year_following_pct': '0.00%',
+            'yield_reduction_year_exit': 20000,
+            'yield_reduction_year_exit_pct': '1.18%',
+            'estimated_holding_duration_years': '5',
+            'estimated_yield_reduction_total': 40000,
+            'estimated_yield_reduction_total_pct': '2.35%',
+            'KIID': 'text',
+            'legal_disclaimer': 'text',
+        },
+        'isin': 'US0378331005',
+        'expires_at': '2022-04-04T21:59:00.000+00:00',
+        'side': 'buy',
+        'quantity': 5,
+        'stop_price': None,
+        'limit_price': 1700000,
+        'venue': 'xmun',
+        'estimated_price': 1650000,
+        'estimated_price_total': 8250000,
+        'notes': None,
+        'charge': 0,
+        'chargeable_at': None,
+        'key_creation_id': 'apk_keykeykeykeykeykeykeykeykeykeykeyk',
+        'key_activation_id': 'apk_keykeykeykeykeykeykeykeykeykeykeyk',
+        'executed_quantity': 5,
+        'executed_price': 1650000,
+        'executed_price_total': 8250000,
+        'activated_at': '2022-04-02T18:11:00.613+00:00',
+        'executed_at': '2022-04-02T18:11:03.613+00:00',
+        'rejected_at': None,
+        'cancelled_at': None,
+        'idempotency': None,
+    }
+    order.update(overrides)
+    return order
+
+
+def ohlc_bar(i: int = 0) -> dict:
+    """A bar of /ohlc/m1/ as returned by lemon.markets."""
+    return {
+        'isin': 'IE00B3RBWM25',
+        'o': 1078000 + i,
+        'h': 1079000 + i,
+        'l': 1071400 + i,
+        'c': 1075400 + i,
+        'v': 3799,
+        'pbv': 4089026399,
+        't': f'2022-04-05T{8 + i // 60 % 14:02d}:{i % 60:02d}:00.000+00:00',
+        'mic': 'XMUN',
+    }
+
+
+def orders_payload(count: int = 100) -> bytes:
+    """A page of /orders/ as returned by lemon.markets."""
+    return _page([order_result(quantity=i) for i in range(count)])
+
+
+def ohlc_payload(count: int = 1000) -> bytes:
+    """A page of /ohlc/m1/ as returned by lemon.markets."""
+    return _page([ohlc_bar(i) for i in range(count)])
+
+
+def _page(results: list) -> bytes:
+    return json.dumps(
+        {
+            'time': '2022-04-05T14:59:00.559+00:00',
+            'results': results,
+            'previous': None,
+            'next': None,
+            'total': len(results),
+            'page': 1,
+            'pages': 1,
+        }
+    ).encode()
+
+
+def _response(payload: bytes) -> requests.Response:
+    response = requests.Response()
+    response._content = payload
+    response.headers['Content-Type'] = 'application/json'
+    response.encoding = None
+    return response
+
+
+def decoders() -> dict:
+    found = {'json (bytes)': json.loads}
+    for name in ('orjson', 'ujson'):
+        try:
+            found[name] = __import__(name).loads
+        except ImportError:
+            pass
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = {
+        '/orders/ (100 orders)': orders_payload(),
+        '/ohlc/ (1000 bars)': ohlc_payload(),
+    }
+    print(f"{'payload':<24} {'decoder':<22} {'ms/parse':>9} {'speedup':>8}")
+    for name, payload in payloads.items():
+        response = _response(payload)
+        baseline = min(timeit.repeat(response.json, number=10, repeat=args.repeat)) / 10
+        print(f"{name:<24} {'Response.json()':<22} {baseline * 1000:>9.3f} {1:>7.1f}x")
+        for decoder, loads in decoders().items():
+            seconds = (
+                min(
+                    timeit.repeat(lambda: loads(payload), number=10, repeat=args.repeat)
+                )
+                / 10
+            )
+            print(
+                f'{name:<24} {decoder:<22} {seconds * 1000:>9.3f} '
+                f'{baseline / seconds:>7.1f}x'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Microbenchmark of decoding /orders/ results into Order objects.
+
+Compares Order.from_result with the previous decoding, which resolved the type
+hints of Order for every order and set each attribute on the instance dict.
+
+Usage:
+        python -m benchmarks.bench_order_decode [--orders 100000]
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import get_type_hints
+
+from benchmarks.bench_json import order_result
+
+
+class _DictOrder:
+    """Order with annotated class attributes and an instance dict, as before."""
+
+    _isin: str = None
+    _side: str = None
+    _quantity: int = None
+    _venue: str = None
+    _stop_price: int = None
+    _limit_price: int = None
+    _notes: str = None
+    _expires_at: datetime = None
+    _idempotency: str = None
+    _status: str = None
+    _id: str = None
+    _regulatory_information: dict = None
+    _estimated_price: int = None
+    _estimated_price_total: int = None
+    _created_at: datetime = None
+    _charge: int = None
+    _chargeable_at: datetime = None
+    _isin_title: str = None
+    _type: str = None
+    _executed_quantity: int = None
+    _executed_price: int = None
+    _executed_price_total: int = None
+    _activated_at: datetime = None
+    _executed_at: datetime = None
+    _rejected_at: datetime = None
+    _cancelled_at: datetime = None
+    _key_creation_id: str = None
+    _key_activation_id: str = None
+
+    @staticmethod
+    def from_result(res: dict) -> '_DictOrder':
+        order = _DictOrder()
+        types = get_type_hints(_DictOrder)
+        for k, v in res.items():
+            if f'_{k}' in types:
+                if types[f'_{k}'] == datetime and v is not None:
+                    setattr(order, f'_{k}', datetime.fromisoformat(v))
+                else:
+                    setattr(order, f'_{k}', v)
+        return order
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100_000)
+    args = parser.parse_args()
+
+    from lemon.core.account import Account
+    from lemon.core.orders import Order
+
+    # Order.from_result takes the trading type of the account, don't fetch its state
+    Account.__post_init__ = lambda self: None
+    Account(credentials='bench')
+
+    results = [order_result(id=f'ord_{i}', quantity=i) for i in range(args.orders)]
+
+    print(f"{'decoder':<24} {'s total':>8} {'orders/s':>12} {'speedup':>8}")
+    baseline = None
+    for name, from_result in (
+        ('get_type_hints + dict', _DictOrder.from_result),
+        ('Order.from_result', Order.from_result),
+    ):
+        started = time.perf_counter()
+        for result in results:
+            from_result(result)
+        seconds = time.perf_counter() - started
+        baseline = baseline or seconds
+        print(
+            f'{name:<24} {seconds:>8.3f} {args.orders / seconds:>12,.0f} '
+            f'{baseline / seconds:>7.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Memory and speed of QuoteBuffer compared with keeping quotes as lists of dicts.
+
+Fills both with the same quotes of many ISINs, keeping the latest --capacity
+quotes per ISIN, then computes the mid price VWAP of the latest 100 quotes of
+every ISIN.
+
+Usage:
+        python -m benchmarks.bench_quote_buffer [--isins 200] [--capacity 1024] [--quotes 500000]
+"""
+import argparse
+import time
+import tracemalloc
+from collections import deque
+
+
+def quotes(isins: list, count: int) -> list:
+    return [
+        {
+            'isin': isins[i % len(isins)],
+            'b_v': 100 + i % 7,
+            'a_v': 100 + i % 5,
+            'b': 1603000 + i % 100,
+            'a': 1604000 + i % 100,
+            't': 1648923054613 + i,
+            'mic': 'XMUN',
+        }
+        for i in range(count)
+    ]
+
+
+def fill_dicts(data: list, capacity: int) -> dict:
+    history = {}
+    for quote in data:
+        ring = history.get(quote['isin'])
+        if ring is None:
+            ring = history[quote['isin']] = deque(maxlen=capacity)
+        # Copied, as quotes decoded from responses are separate objects
+        ring.append(dict(quote))
+    return history
+
+
+def vwap_dicts(history: dict, n: int) -> None:
+    for ring in history.values():
+        window = list(ring)[-n:]
+        volume = sum(q['b_v'] + q['a_v'] for q in window)
+        sum(q['b'] * q['b_v'] + q['a'] * q['a_v'] for q in window) / volume
+
+
+def fill_buffer(data: list, capacity: int):
+    from lemon.core.quote_buffer import QuoteBuffer
+
+    buffer = QuoteBuffer(capacity)
+    for quote in data:
+        buffer.append(quote)
+    return buffer
+
+
+def vwap_buffer(buffer, n: int) -> None:
+    for isin in buffer.isins:
+        buffer.vwap(isin, n)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--isins', type=int, default=200)
+    parser.add_argument('--capacity', type=int, default=1024)
+    parser.add_argument('--quotes', type=int, default=500_000)
+    args = parser.parse_args()
+
+    import numpy  # noqa: F401, not part of the measured memory
+
+    data = quotes([f'DE{i:010d}' for i in range(args.isins)], args.quotes)
+
+    print(f"{'storage':<16} {'MB':>8} {'appends/s':>12} {'vwap ms':>8}")
+    for name, fill, vwap in (
+        ('list of dicts', fill_dicts, vwap_dicts),
+        ('QuoteBuffer', fill_buffer, vwap_buffer),
+    ):
+        tracemalloc.start()
+        started = time.perf_counter()
+        history = fill(data, args.capacity)
+        seconds = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        vwap(history, 100)
+        vwap_ms = (time.perf_counter() - started) * 1000
+        print(
+            f'{name:<16} {memory:>8.1f} {args.quotes / seconds:>12,.0f} '
+            f'{vwap_ms:>8.2f}'
+        )
+        del history
+
+
+if __name__ == '__main__':
+    main()
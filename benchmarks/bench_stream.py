@@ -0,0 +1,126 @@
+"""Load test of QuoteStream against the in-process LocalBroker.
+
+Publishes quotes of many ISINs at a fixed rate (or as fast as possible) and
+measures the delivered throughput, the latency from publish() to the callback
+and the quotes lost to gaps. With --drop-every the broker drops the connection
+periodically, so the cost of reconnecting shows up in the results.
+
+Usage:
+        python -m benchmarks.bench_stream [--quotes 200000] [--isins 100] [--rate 0] [--asyncio]
+"""
+import argparse
+import asyncio
+import time
+
+from lemon.common.retry import RetryPolicy
+from lemon.core.stream import LocalBroker, QuoteStream
+
+
+def publish(
+    broker: LocalBroker, isins: list, quotes: int, rate: float, drop_every: int
+) -> None:
+    """Publish quotes round-robin over isins, rate quotes per second if > 0."""
+    interval = 1 / rate if rate > 0 else 0
+    started = time.perf_counter()
+    for i in range(quotes):
+        if interval:
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if drop_every and i and i % drop_every == 0:
+            broker.drop()
+        broker.publish(
+            {
+                'isin': isins[i % len(isins)],
+                'b_v': 100,
+                'a_v': 100,
+                'b': 1603000 + i % 100,
+                'a': 1604000 + i % 100,
+                'mic': 'XMUN',
+                'sent': time.perf_counter(),
+            }
+        )
+
+
+def report(latencies: list, stream: QuoteStream, seconds: float) -> None:
+    latencies.sort()
+
+    def percentile(q: float) -> float:
+        if not latencies:
+            return float('nan')
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    print(f'delivered    {stream.received:>10,} quotes in {seconds:.2f}s')
+    print(f'throughput   {stream.received / seconds:>10,.0f} quotes/s')
+    print(
+        f'latency ms   p50 {percentile(0.5):.3f}  p90 {percentile(0.9):.3f}  '
+        f'p99 {percentile(0.99):.3f}'
+    )
+    print(f'missed       {stream.missed:>10,} quotes')
+    print(f'reconnects   {stream.reconnects:>10,}')
+
+
+def run_threaded(args, isins: list) -> None:
+    broker = LocalBroker()
+    stream = QuoteStream(broker.transport(), retry=RetryPolicy(backoff=0.001))
+    latencies = []
+    stream.on_quote(lambda quote: latencies.append(time.perf_counter() - quote['sent']))
+    stream.subscribe(isins)
+
+    started = time.perf_counter()
+    with stream:
+        publish(broker, isins, args.quotes, args.rate, args.drop_every)
+    report(latencies, stream, time.perf_counter() - started)
+
+
+def run_asyncio(args, isins: list) -> None:
+    async def main() -> None:
+        broker = LocalBroker()
+        stream = QuoteStream(
+            broker.transport(),
+            loop=asyncio.get_running_loop(),
+            retry=RetryPolicy(backoff=0.001),
+        )
+        latencies = []
+        stream.on_quote(
+            lambda quote: latencies.append(time.perf_counter() - quote['sent'])
+        )
+        stream.subscribe(isins)
+
+        started = time.perf_counter()
+        with stream:
+            await asyncio.get_running_loop().run_in_executor(
+                None, publish, broker, isins, args.quotes, args.rate, args.drop_every
+            )
+        # Callbacks scheduled before stop() returned still have to run
+        while len(latencies) < stream.received:
+            await asyncio.sleep(0.001)
+        report(latencies, stream, time.perf_counter() - started)
+
+    asyncio.run(main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quotes', type=int, default=200_000)
+    parser.add_argument('--isins', type=int, default=100)
+    parser.add_argument(
+        '--rate', type=float, default=0, help='quotes per second, 0 is unthrottled'
+    )
+    parser.add_argument(
+        '--drop-every', type=int, default=0, help='drop the connection every n quotes'
+    )
+    parser.add_argument(
+        '--asyncio', action='store_true', help='deliver on an asyncio event loop'
+    )
+    args = parser.parse_args()
+
+    isins = [f'DE{i:010d}' for i in range(args.isins)]
+    if args.asyncio:
+        run_asyncio(args, isins)
+    else:
+        run_threaded(args, isins)
+
+
+if __name__ == '__main__':
+    main()
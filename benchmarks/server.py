@@ -0,0 +1,221 @@
+"""Local stand-in for the lemon.markets APIs used by the benchmarks.
+
+Serves the endpoints of the trading and market data APIs with canned payloads, an
+artificial latency per response and a configurable number of pages for list
+endpoints. One server stands in for all hosts, point the SDK at it with
+FakeLemonServer.install().
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from benchmarks.bench_json import ohlc_bar, order_result
+
+_ORDER = re.compile(r'^/v1/orders/(ord_\w+)/?$')
+_ACTIVATE = re.compile(r'^/v1/orders/(ord_\w+)/activate/?$')
+_OHLC = re.compile(r'^/v1/ohlc/[mhd]1/?$')
+
+
+class FakeLemonServer:
+    """Threaded HTTP server answering like lemon.markets.
+
+    Example:
+            with FakeLemonServer(latency=0.005, pages=5) as server:
+                server.install()
+                MarketData().latest_quote('US0378331005')
+
+    Args:
+            latency: Seconds every response is delayed, simulating the network round trip
+            pages: Number of pages of /orders/ and /ohlc/
+            page_size: Results per page if the request sets no limit
+            host: Interface to listen on
+            port: Port to listen on, a free one is picked if 0
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        pages: int = 1,
+        page_size: int = 100,
+        host: str = '127.0.0.1',
+        port: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.pages = pages
+        self.page_size = page_size
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self) -> 'FakeLemonServer':
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name='fake-lemon', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def install(self) -> None:
+        """Send the requests of all hosts to this server."""
+        from lemon.common.settings import BASE_URLS
+
+        for type in BASE_URLS:
+            BASE_URLS[type] = self.url
+
+    def __enter__(self) -> 'FakeLemonServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def respond(self, method: str, path: str, query: dict):
+        """Status and payload of a request."""
+        if method == 'GET' and path == '/v1/account/':
+            return 200, _ok(
+                {
+                    'account_id': 'acc_bench',
+                    'mode': 'paper',
+                    'trading_plan': 'pro',
+                    'data_plan': 'pro',
+                    'balance': 985900000,
+                }
+            )
+        if method == 'GET' and path == '/v1/quotes/latest':
+            isin = query.get('isin', ['US0378331005'])[0]
+            return 200, _page(
+                [
+                    {
+                        'isin': isin,
+                        'b_v': 2570,
+                        'a_v': 2570,
+                        'b': 2121000,
+                        'a': 2123000,
+                        't': '2022-04-05T14:59:00.000+00:00',
+                        'mic': 'XMUN',
+                    }
+                ]
+            )
+        if method == 'GET' and _OHLC.match(path):
+            return 200, self._paginated(path, query, ohlc_bar)
+        if method == 'GET' and path == '/v1/orders/':
+            return 200, self._paginated(
+                path, query, lambda i: order_result(id=f'ord_{i}', quantity=i)
+            )
+        if method == 'POST' and path == '/v1/orders/':
+            return 200, _ok(
+                order_result(
+                    id=f'ord_{next(self._ids)}',
+                    status='inactive',
+                    activated_at=None,
+                    executed_at=None,
+                )
+            )
+        if method == 'POST' and _ACTIVATE.match(path):
+            return 200, _ok(None)
+        match = _ORDER.match(path)
+        if method == 'GET' and match:
+            return 200, _ok(order_result(id=match.group(1), status='activated'))
+        return 404, {
+            'status': 'error',
+            'error_code': 'not_found',
+            'error_message': f'{method} {path} is not served by the stand-in',
+        }
+
+    def _paginated(self, path: str, query: dict, result) -> dict:
+        page = int(query.get('page', [1])[0])
+        limit = int(query.get('limit', [self.page_size])[0])
+        start = (page - 1) * limit
+        params = {k: v[0] for k, v in query.items()}
+
+        def link(page: int) -> str:
+            return f'{self.url}{path[3:]}?' + urlencode(
+                dict(params, limit=limit, page=page)
+            )
+
+        payload = _page([result(i) for i in range(start, start + limit)])
+        payload.update(
+            {
+                'previous': link(page - 1) if page > 1 else None,
+                'next': link(page + 1) if page < self.pages else None,
+                'total': self.pages * limit,
+                'page': page,
+                'pages': self.pages,
+            }
+        )
+        return payload
+
+
+def _handler(server: FakeLemonServer):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections open like lemon.markets, so connection pooling counts
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately, don't wait for delayed ACKs
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            self._answer()
+
+        def do_POST(self) -> None:
+            self._answer()
+
+        def do_PUT(self) -> None:
+            self._answer()
+
+        def do_DELETE(self) -> None:
+            self._answer()
+
+        def _answer(self) -> None:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            url = urlparse(self.path)
+            status, payload = server.respond(
+                self.command, url.path, parse_qs(url.query)
+            )
+            body = json.dumps(payload).encode()
+            with server._lock:
+                server.requests += 1
+            if server.latency:
+                time.sleep(server.latency)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return Handler
+
+
+def _ok(results) -> dict:
+    return {
+        'time': '2022-04-05T14:59:00.559+00:00',
+        'mode': 'paper',
+        'status': 'ok',
+        'results': results,
+    }
+
+
+def _page(results: list) -> dict:
+    return dict(
+        _ok(results), previous=None, next=None, total=len(results), page=1, pages=1
+    )
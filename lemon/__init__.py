@@ -1 +1,7 @@
+import logging
+
 __version__ = "0.1.0"
+
+# The library configures no output of its own, records are dropped unless the
+# application configures logging or calls lemon.common.log.enable_logging().
+logging.getLogger(__name__).addHandler(logging.NullHandler())
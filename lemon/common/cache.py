@@ -0,0 +1,129 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from lemon.common.helpers import Singleton
+from lemon.common.settings import RESPONSE_CACHE_MAXSIZE, RESPONSE_CACHE_TTLS
+
+
+class ResponseCache(metaclass=Singleton):
+    """Opt-in in-memory cache of GET responses for slowly changing reference data.
+
+    Responses are cached per endpoint and query parameters for the TTL configured
+    for the endpoint. Endpoints without a TTL are never cached. When more than
+    maxsize responses are cached, the least recently used one is evicted.
+    Responses are copied when cached and when returned, so callers may modify
+    the results they got, e.g. the raw lists of MarketData(raw=True).
+
+    Example:
+            ResponseCache().enable(ttls={'/venues/': 3600, '/instruments/': 600})
+
+    Attributes:
+            enabled: Whether responses are cached
+            maxsize: Maximum number of cached responses
+            ttls: Seconds a response is cached by endpoint, e.g. {'/venues/': 3600}
+            hits: Number of requests answered from the cache
+            misses: Number of cacheable requests sent to the API
+            evictions: Number of responses evicted because the cache was full
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.enabled = False
+        self.maxsize = RESPONSE_CACHE_MAXSIZE
+        self.ttls = dict(RESPONSE_CACHE_TTLS)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def enable(self, ttls: dict = None, maxsize: int = None) -> None:
+        """Start caching responses.
+
+        Args:
+                ttls: Seconds a response is cached by endpoint. Overrides the defaults of RESPONSE_CACHE_TTLS
+                maxsize: Maximum number of cached responses
+        """
+        with self._lock:
+            if ttls is not None:
+                self.ttls.update(ttls)
+            if maxsize is not None:
+                self.maxsize = maxsize
+            self.enabled = True
+            self._evict()
+
+    def disable(self) -> None:
+        """Stop caching responses and drop all cached ones."""
+        with self._lock:
+            self.enabled = False
+            self._entries.clear()
+
+    def ttl(self, endpoint: str) -> float:
+        """Seconds responses of the endpoint are cached, None if they aren't."""
+        if not self.enabled:
+            return None
+        return self.ttls.get(endpoint)
+
+    def get(self, key):
+        """Get a cached response.
+
+        Args:
+                key: Identifier of the request
+
+        Returns:
+                A copy of the cached response or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Cached responses are never modified, so they can be copied without the lock
+        return copy.deepcopy(entry[2])
+
+    def set(self, key, endpoint: str, response, ttl: float) -> None:
+        """Cache a response.
+
+        Args:
+                key: Identifier of the request
+                endpoint: Endpoint of the request, used for invalidation
+                response: Response to cache, a copy of it is kept
+                ttl: Seconds the response is cached
+        """
+        response = copy.deepcopy(response)
+        with self._lock:
+            self._entries[key] = (endpoint, time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def invalidate(self, endpoint: str = None) -> None:
+        """Drop cached responses.
+
+        Args:
+                endpoint: Only drop responses of this endpoint, drop all if None
+        """
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                for key in [k for k, v in self._entries.items() if v[0] == endpoint]:
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        """Counters of the cache: size, hits, misses and evictions."""
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
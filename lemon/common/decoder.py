@@ -0,0 +1,54 @@
+import json
+
+# Fast JSON libraries tried in order when no decoder was set
+FAST_DECODERS = ('orjson', 'ujson')
+
+_decoder = None
+_decoder_name = None
+
+
+def loads(data: bytes):
+    """Parse a JSON response body.
+
+    Uses the decoder set with set_decoder(), otherwise the first installed library of
+    FAST_DECODERS and the stdlib json module if none is installed. The raw bytes are
+    passed on as they are, so fast decoders skip decoding them to str first.
+
+    Args:
+            data: Raw response body
+
+    Returns:
+            The parsed JSON document
+    """
+    if _decoder is None:
+        set_decoder(None)
+    return _decoder(data)
+
+
+def set_decoder(decoder=None) -> None:
+    """Set the function used to parse JSON responses.
+
+    Args:
+            decoder: Function parsing bytes, e.g. orjson.loads. Detects the fastest installed library if None
+    """
+    global _decoder, _decoder_name
+    if decoder is not None:
+        _decoder = decoder
+        _decoder_name = getattr(decoder, '__module__', None) or repr(decoder)
+        return
+
+    for name in FAST_DECODERS:
+        try:
+            module = __import__(name)
+        except ImportError:
+            continue
+        _decoder, _decoder_name = module.loads, name
+        return
+    _decoder, _decoder_name = json.loads, 'json'
+
+
+def decoder_name() -> str:
+    """Name of the library used to parse JSON responses."""
+    if _decoder is None:
+        set_decoder(None)
+    return _decoder_name
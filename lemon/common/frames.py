@@ -0,0 +1,122 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Column types of the results of an endpoint:
+#   int: int64, prices are fixed-point (1€ = 10000)
+#   datetime: datetime64 in UTC parsed from ISO strings
+#   category: categorical, for values repeated across rows
+#   bool: boolean
+#   object: kept as is
+OHLC_SCHEMA = {
+    'isin': 'category',
+    'o': 'int',
+    'h': 'int',
+    'l': 'int',
+    'c': 'int',
+    'v': 'int',
+    'pbv': 'int',
+    't': 'datetime',
+    'mic': 'category',
+}
+
+QUOTE_SCHEMA = {
+    'isin': 'object',
+    'b_v': 'int',
+    'a_v': 'int',
+    'b': 'int',
+    'a': 'int',
+    't': 'datetime',
+    'mic': 'category',
+}
+
+TRADE_SCHEMA = {
+    'isin': 'object',
+    'p': 'int',
+    'v': 'int',
+    'pbv': 'int',
+    't': 'datetime',
+    'mic': 'category',
+}
+
+INSTRUMENT_SCHEMA = {
+    'isin': 'object',
+    'wkn': 'object',
+    'name': 'object',
+    'title': 'object',
+    'symbol': 'object',
+    'type': 'category',
+    'venues': 'object',
+}
+
+VENUE_SCHEMA = {
+    'name': 'object',
+    'title': 'object',
+    'mic': 'category',
+    'is_open': 'bool',
+    'opening_days': 'object',
+}
+
+POSITION_SCHEMA = {
+    'isin': 'object',
+    'isin_title': 'object',
+    'quantity': 'int',
+    'buy_price_avg': 'int',
+    'estimated_price_total': 'int',
+    'estimated_price': 'int',
+}
+
+
+def build_frame(results: list, schema: dict) -> 'pd.DataFrame':
+    """Build a DataFrame column by column with the types of the schema.
+
+    Unlike pd.DataFrame(results) no types are inferred row by row and prices,
+    volumes and timestamps don't end up as object columns. Keys that are not in the
+    schema are kept as object columns.
+
+    Args:
+            results: List of result dicts of an endpoint
+            schema: Column types, e.g. OHLC_SCHEMA
+
+    Returns:
+            pandas.DataFrame: One row per result, with the schema columns even if empty
+    """
+    # Imported here so that pandas is only loaded once a DataFrame is built
+    import pandas as pd
+
+    columns = list(schema)
+    for key in results[0] if results else ():
+        if key not in schema:
+            columns.append(key)
+
+    data = {}
+    for column in columns:
+        values = [result.get(column) for result in results]
+        data[column] = _column(values, schema.get(column, 'object'))
+    return pd.DataFrame(data, columns=columns)
+
+
+def _column(values: list, kind: str):
+    import numpy as np
+    import pandas as pd
+
+    if kind == 'int':
+        array = np.array(values)
+        if not values or array.dtype.kind in 'iu':
+            return array.astype(np.int64)
+        if array.dtype.kind == 'f':
+            # Prices requested with decimals
+            return array
+        try:
+            # Integers mixed with None
+            return pd.array(values, dtype='Int64')
+        except (TypeError, ValueError):
+            return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+    if kind == 'datetime':
+        return pd.to_datetime(pd.Series(values, dtype=object), utc=True)
+    if kind == 'category':
+        return pd.Categorical(values)
+    if kind == 'bool' and None not in values:
+        return np.array(values, dtype=bool)
+    return pd.Series(values, dtype=object)
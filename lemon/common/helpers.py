@@ -1,4 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MILLISECOND = timedelta(milliseconds=1)
 
 
 class Singleton(type):
@@ -18,3 +21,25 @@ def datetime_to_unixtimestamp(today: datetime, ddays: int, dhour: int, dmin: int
 
 def eur_to_amount(amount: float):
     return int(amount * 10000)
+
+
+def parse_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp of lemon.markets, e.g. 2022-04-02T18:10:54.613+00:00"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # Python < 3.11 doesn't accept the Z suffix
+        if value.endswith('Z'):
+            return datetime.fromisoformat(value[:-1] + '+00:00')
+        raise
+
+
+def to_millis(t) -> int:
+    """Milliseconds since the epoch of an ISO string, datetime or number."""
+    if isinstance(t, str):
+        t = parse_datetime(t)
+    if isinstance(t, datetime):
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        return (t - _EPOCH) // _MILLISECOND
+    return int(t)
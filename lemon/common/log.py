@@ -0,0 +1,105 @@
+import atexit
+import itertools
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+from lemon.common.settings import LOG_FORMAT
+
+LOGGER_NAME = 'lemon'
+
+_lock = threading.Lock()
+_handler = None
+_listener = None
+
+
+class SamplingFilter(logging.Filter):
+    """Lets only a fraction of low level records through.
+
+    Meant for the DEBUG line written per HTTP request, which would otherwise flood
+    the log of a busy process. Records above the level always pass.
+
+    Args:
+            rate: Fraction of the records at or below level that pass, e.g. 0.01 keeps every 100th
+            level: Highest level that is sampled
+    """
+
+    def __init__(self, rate: float, level: int = logging.DEBUG) -> None:
+        super().__init__()
+        self.level = level
+        self._every = round(1 / rate) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.level:
+            return True
+        if self._every == 0:
+            return False
+        return next(self._counter) % self._every == 0
+
+
+def enable_logging(
+    level: int = logging.INFO,
+    filename: str = None,
+    stream=None,
+    sample_rate: float = 1.0,
+    fmt: str = LOG_FORMAT,
+) -> logging.handlers.QueueListener:
+    """Write the records of the lemon loggers without blocking the calling thread.
+
+    Records are put on a queue by a QueueHandler and written by a background
+    QueueListener, so requests never wait for disk or terminal I/O. Calling it
+    again replaces the previous configuration.
+
+    Args:
+            level: Lowest level that is logged, e.g. logging.DEBUG for one line per request
+            filename: Append records to this file. Default is stderr
+            stream: Write records to this stream instead of a file
+            sample_rate: Fraction of DEBUG records that are logged, see SamplingFilter
+            fmt: Format of the records. Default is LOG_FORMAT
+
+    Returns:
+            logging.handlers.QueueListener: The started listener writing the records
+    """
+    if filename is not None:
+        target = logging.FileHandler(filename)
+    else:
+        target = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    target.setFormatter(logging.Formatter(fmt))
+
+    handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    if sample_rate < 1:
+        handler.addFilter(SamplingFilter(sample_rate))
+    listener = logging.handlers.QueueListener(handler.queue, target)
+
+    global _handler, _listener
+    with _lock:
+        _disable()
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(level)
+        logger.addHandler(handler)
+        listener.start()
+        _handler, _listener = handler, listener
+    return listener
+
+
+def disable_logging() -> None:
+    """Stop the logging started by enable_logging(), pending records are written first."""
+    with _lock:
+        _disable()
+
+
+def _disable() -> None:
+    global _handler, _listener
+    if _listener is not None:
+        logging.getLogger(LOGGER_NAME).removeHandler(_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        logging.getLogger(LOGGER_NAME).setLevel(logging.NOTSET)
+        _handler, _listener = None, None
+
+
+atexit.register(disable_logging)
@@ -0,0 +1,200 @@
+import bisect
+import re
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from lemon.common.settings import METRICS_LATENCY_BUCKETS
+
+# Path segments identifying a single resource, e.g. ord_pyPGQggmmj0jhlLHw2nfM92Hm9PmgTYq
+_ID_SEGMENT = re.compile(r'/(?:[a-z]{3}_[A-Za-z0-9]+|\d+|[0-9a-fA-F-]{32,36})(?=/|$)')
+
+_sink = None
+
+
+@dataclass
+class RequestMetrics:
+    """Measurements of one ApiRequest.
+
+    Attributes:
+            endpoint: Endpoint template without ids and query, e.g. '/orders/{id}/activate/'
+            method: HTTP method, e.g. 'get'
+            type: API host, either 'paper', 'money' or 'data'
+            status: HTTP status of the last response, None if answered from the cache or by a coalesced request
+            latency: Seconds from sending the first request to parsing the last response
+            bytes: Size of all received response bodies
+            pages: Number of responses received, more than one for paginated results
+            retries: Number of retried requests
+    """
+
+    endpoint: str
+    method: str
+    type: str
+    status: int = None
+    latency: float = 0.0
+    bytes: int = 0
+    pages: int = 0
+    retries: int = 0
+
+
+class MetricsSink(ABC):
+    """Receives the RequestMetrics of every ApiRequest. Subclass to forward them,
+    e.g. to statsd or OpenTelemetry."""
+
+    @abstractmethod
+    def record(self, metrics: RequestMetrics) -> None:
+        """Called after every request, errors are logged and don't fail the request."""
+
+
+class InMemoryMetrics(MetricsSink):
+    """Aggregates RequestMetrics into counters and latency histograms.
+
+    Series are labeled by method, endpoint template, host type and status.
+
+    Example:
+            metrics = InMemoryMetrics()
+            set_sink(metrics)
+            ...
+            metrics.quantile(0.99, endpoint='/orders/', method='post')
+            print(metrics.export())
+
+    Args:
+            buckets: Upper bounds of the latency histogram in seconds. Default is METRICS_LATENCY_BUCKETS
+    """
+
+    def __init__(self, buckets: tuple = METRICS_LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def record(self, metrics: RequestMetrics) -> None:
+        labels = (metrics.method, metrics.endpoint, metrics.type, metrics.status)
+        index = bisect.bisect_left(self.buckets, metrics.latency)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = _Series(len(self.buckets))
+            series.count += 1
+            series.latency += metrics.latency
+            series.bytes += metrics.bytes
+            series.pages += metrics.pages
+            series.retries += metrics.retries
+            series.histogram[index] += 1
+
+    def count(self, **labels) -> int:
+        """Number of recorded requests matching the labels, e.g. count(method='get')."""
+        return sum(series.count for series in self._select(labels))
+
+    def quantile(self, q: float, **labels) -> float:
+        """Estimate a latency quantile of the requests matching the labels.
+
+        Args:
+                q: Quantile between 0 and 1, e.g. 0.99
+                labels: Filter by method, endpoint, type and status
+
+        Returns:
+                float: Upper bound of the histogram bucket holding the quantile, inf if
+                it is above the largest bucket and None if nothing was recorded
+        """
+        histogram = [0] * (len(self.buckets) + 1)
+        for series in self._select(labels):
+            histogram = [a + b for a, b in zip(histogram, series.histogram)]
+        total = sum(histogram)
+        if total == 0:
+            return None
+
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), histogram):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def export(self) -> str:
+        """Prometheus text exposition of all counters and histograms."""
+        lines = [
+            '# TYPE lemon_requests_total counter',
+            '# TYPE lemon_request_bytes_total counter',
+            '# TYPE lemon_request_pages_total counter',
+            '# TYPE lemon_request_retries_total counter',
+            '# TYPE lemon_request_latency_seconds histogram',
+        ]
+        with self._lock:
+            items = sorted(self._series.items(), key=lambda item: str(item[0]))
+            for (method, endpoint, type, status), series in items:
+                labels = 'method="{}",endpoint="{}",type="{}",status="{}"'.format(
+                    method, endpoint, type, status if status is not None else 'none'
+                )
+                lines.append(f'lemon_requests_total{{{labels}}} {series.count}')
+                lines.append(f'lemon_request_bytes_total{{{labels}}} {series.bytes}')
+                lines.append(f'lemon_request_pages_total{{{labels}}} {series.pages}')
+                lines.append(
+                    f'lemon_request_retries_total{{{labels}}} {series.retries}'
+                )
+                cumulative = 0
+                for bound, count in zip(
+                    self.buckets + (float('inf'),), series.histogram
+                ):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(
+                        f'lemon_request_latency_seconds_bucket{{{labels},le="{le}"}} '
+                        f'{cumulative}'
+                    )
+                lines.append(
+                    f'lemon_request_latency_seconds_sum{{{labels}}} {series.latency}'
+                )
+                lines.append(
+                    f'lemon_request_latency_seconds_count{{{labels}}} {series.count}'
+                )
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """Drop everything recorded so far."""
+        with self._lock:
+            self._series.clear()
+
+    def _select(self, labels: dict) -> list:
+        keys = ('method', 'endpoint', 'type', 'status')
+        with self._lock:
+            return [
+                series
+                for key, series in self._series.items()
+                if all(labels.get(k, v) == v for k, v in zip(keys, key))
+            ]
+
+
+class _Series:
+    def __init__(self, buckets: int) -> None:
+        self.count = 0
+        self.latency = 0.0
+        self.bytes = 0
+        self.pages = 0
+        self.retries = 0
+        # One count per bucket and one for latencies above the largest bucket
+        self.histogram = [0] * (buckets + 1)
+
+
+def endpoint_template(endpoint: str) -> str:
+    """Endpoint without query and with resource ids replaced by {id}.
+
+    Example:
+            endpoint_template('/orders/ord_abc123/activate/') == '/orders/{id}/activate/'
+    """
+    return _ID_SEGMENT.sub('/{id}', endpoint.split('?', 1)[0])
+
+
+def set_sink(sink: MetricsSink = None) -> None:
+    """Set the sink receiving the metrics of every request.
+
+    Args:
+            sink: e.g. InMemoryMetrics(). Stops recording metrics if None
+    """
+    global _sink
+    _sink = sink
+
+
+def get_sink() -> MetricsSink:
+    """Sink receiving the metrics of every request, None if metrics are not recorded."""
+    return _sink
@@ -0,0 +1,172 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from lemon.common.helpers import Singleton
+from lemon.common.sessions import HOSTS
+from lemon.common.settings import (
+    RATE_LIMIT_DEFAULT_PLAN,
+    RATE_LIMIT_RETRY_AFTER,
+    RATE_LIMITS,
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Callers reserve a token and wait until it is available. Tokens may be
+    borrowed, so concurrent callers queue up in the order they reserved
+    instead of all retrying at the same time.
+
+    Attributes:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens, i.e. the allowed burst
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def configure(self, rate: float, capacity: float) -> None:
+        """Change rate and capacity of the bucket.
+
+        Args:
+                rate: Tokens added per second
+                capacity: Maximum number of tokens
+        """
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+
+    def reserve(self) -> float:
+        """Take a token.
+
+        Returns:
+                float: Seconds to wait until the token may be used
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        """Take a token and block until it may be used."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the given time, e.g. after the API answered 429.
+
+        Args:
+                seconds: Time to pause
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+class RateLimiter(metaclass=Singleton):
+    """Client-side rate limits, one TokenBucket per lemon.markets API host.
+
+    The buckets are shared by all threads and async tasks of the process and
+    sized from the subscription plans of the account (see RATE_LIMITS). Trading
+    hosts use the trading plan, the market data host the data plan.
+    """
+
+    def __init__(self) -> None:
+        self._buckets = {}
+        for type in HOSTS:
+            limit = RATE_LIMITS[RATE_LIMIT_DEFAULT_PLAN]
+            self._buckets[type] = TokenBucket(limit / 60, limit)
+
+    def bucket(self, type: str) -> TokenBucket:
+        """Get the bucket of an API host.
+
+        Args:
+                type: Host type of the API, either 'paper', 'money' or 'data'
+        """
+        return self._buckets[str(type).lower()]
+
+    def configure(self, type: str, requests_per_minute: int) -> None:
+        """Set the rate limit of an API host.
+
+        Args:
+                type: Host type of the API, either 'paper', 'money' or 'data'
+                requests_per_minute: Allowed requests per minute, also the allowed burst
+        """
+        self.bucket(type).configure(requests_per_minute / 60, requests_per_minute)
+
+    def configure_plans(self, trading_plan: str = None, data_plan: str = None) -> None:
+        """Size the buckets from the subscription plans of the account.
+
+        Args:
+                trading_plan: Trading plan, either 'free', 'basic' or 'pro'
+                data_plan: Market data plan, either 'free', 'basic' or 'pro'
+        """
+        if trading_plan in RATE_LIMITS:
+            self.configure('paper', RATE_LIMITS[trading_plan])
+            self.configure('money', RATE_LIMITS[trading_plan])
+        if data_plan in RATE_LIMITS:
+            self.configure('data', RATE_LIMITS[data_plan])
+
+    def acquire(self, type: str) -> None:
+        """Block until a request to the API host may be sent.
+
+        Args:
+                type: Host type of the API, either 'paper', 'money' or 'data'
+        """
+        self.bucket(type).acquire()
+
+    def throttled(self, type: str, retry_after: str = None) -> float:
+        """Pause the API host after it answered 429 Too Many Requests.
+
+        Args:
+                type: Host type of the API, either 'paper', 'money' or 'data'
+                retry_after: Value of the Retry-After header, seconds or a HTTP date
+
+        Returns:
+                float: Seconds the host is paused
+        """
+        seconds = parse_retry_after(retry_after)
+        self.bucket(type).pause(seconds)
+        return seconds
+
+
+def parse_retry_after(value: str = None) -> float:
+    """Parse a Retry-After header.
+
+    Args:
+            value: Seconds or a HTTP date. Defaults to RATE_LIMIT_RETRY_AFTER if missing or invalid
+
+    Returns:
+            float: Seconds to wait
+    """
+    if value is None:
+        return RATE_LIMIT_RETRY_AFTER
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return RATE_LIMIT_RETRY_AFTER
+    if date is None:
+        return RATE_LIMIT_RETRY_AFTER
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
@@ -1,12 +1,31 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from lemon.common.settings import (
-    BASE_MARKET_DATA_API_URL,
-    BASE_PAPER_TRADING_API_URL,
-    BASE_REAL_MONEY_TRADING_API_URL,
+    BASE_URLS,
+    COALESCE_GETS,
+    PAGINATION_MAX_WORKERS,
+    RATE_LIMIT_MAX_WAITS,
+    REQUEST_TIMEOUT,
 )
+from lemon.common.cache import ResponseCache
+from lemon.common.decoder import loads
+from lemon.common.metrics import RequestMetrics, endpoint_template, get_sink
+from lemon.common.ratelimit import RateLimiter
+from lemon.common.retry import TRANSIENT_ERRORS, RetryPolicy, retry_policy
+from lemon.common.sessions import AsyncSessionPool, SessionPool, import_aiohttp
+from lemon.common.singleflight import AsyncSingleFlight, SingleFlight
 
-import requests
+logger = logging.getLogger(__name__)
+
+_IN_FLIGHT_GETS = SingleFlight()
+_IN_FLIGHT_ASYNC_GETS = AsyncSingleFlight()
 
 
 class ApiResponse:
@@ -37,12 +56,17 @@ class ApiResponse:
 
 
 class ApiRequest:
+    type: str
+    endpoint: str
     url: str
     method: str = 'GET'
     body: dict
     authorization_token: str
     _kwargs: dict
     _response: ApiResponse
+    _perform_on_init: bool = True
+    # Concurrent identical GETs share one in-flight request
+    coalesce: bool = COALESCE_GETS
 
     def __init__(
         self,
@@ -52,89 +76,307 @@ class ApiRequest:
         body: dict = None,
         authorization_token: str = None,
         url_params: dict = None,
+        page_size: int = None,
+        max_workers: int = PAGINATION_MAX_WORKERS,
+        paginate: bool = True,
+        retry: RetryPolicy = None,
         **kwargs,
     ):
         if authorization_token:
             self.authorization_token = str(authorization_token)
 
         self.url_params = url_params
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.paginate = paginate
+        self.retry = retry
+        self.retries = 0
+        self.pages = 0
+        self.bytes = 0
+        self.status = None
+        self._lock = threading.Lock()
         self._kwargs = kwargs
         self.method = method.lower()
         self.body = body
-        self._build_url(str(type).lower(), endpoint)
+        self.type = str(type).lower()
+        self.endpoint = endpoint
+        self._build_url(self.type, endpoint)
 
-        self._perform_request()
+        if self._perform_on_init:
+            self._perform_request()
 
     def _build_url(self, type: str, endpoint: str):
-        if type == 'paper':
-            self.url = BASE_PAPER_TRADING_API_URL + endpoint
-        elif type == 'money':
-            self.url = BASE_REAL_MONEY_TRADING_API_URL + endpoint
-        elif type == 'data':
-            self.url = BASE_MARKET_DATA_API_URL + endpoint
-        else:
+        if type not in BASE_URLS:
             raise ValueError('Type is not valid!')
+        self.url = BASE_URLS[type] + endpoint
 
     def _perform_request(self):
-        headers = {'Authorization': 'Bearer {}'.format(self.authorization_token)}
+        started = time.perf_counter()
+        headers = self._headers()
+        session = SessionPool().session(self.type)
         try:
             if self.method == 'post':
-                response = requests.post(
-                    self.url, data=self.body, headers=headers, params=self.url_params
-                ).json()
+                response = loads(
+                    self._send(
+                        session,
+                        'post',
+                        self.url,
+                        data=self.body,
+                        headers=headers,
+                        params=self.url_params,
+                    ).content
+                )
                 self._response = response
             elif self.method == 'put':
-                response = requests.put(
-                    self.url, data=self.body, headers=headers, params=self.url_params
-                ).json()
+                response = loads(
+                    self._send(
+                        session,
+                        'put',
+                        self.url,
+                        data=self.body,
+                        headers=headers,
+                        params=self.url_params,
+                    ).content
+                )
                 self._response = response
             elif self.method == 'delete':
-                response = requests.delete(
-                    self.url, headers=headers, params=self.url_params
-                ).json()
+                response = loads(
+                    self._send(
+                        session,
+                        'delete',
+                        self.url,
+                        headers=headers,
+                        params=self.url_params,
+                    ).content
+                )
                 self._response = response
             elif self.method == 'patch':
-                response = requests.patch(
-                    self.url, data=self.body, headers=headers, params=self.url_params
-                ).json()
+                response = loads(
+                    self._send(
+                        session,
+                        'patch',
+                        self.url,
+                        data=self.body,
+                        headers=headers,
+                        params=self.url_params,
+                    ).content
+                )
                 self._response = response
             else:
-                response = requests.get(
-                    self.url, headers=headers, params=self.url_params
-                ).json()
-                # Pagination
-                if 'next' in response.keys():
-                    if response['next'] is not None:
-                        # Next available
-                        pagination_results = []
-                        # Save 100 items from first request
-                        pagination_results.append(response['results'])
-
-                        print(f"Collecting {response['total']} results....")
-                        # count = 2000 = 20 requsts a 100 (limit)
-                        for offset in range(0, response['total'], 100):
-                            response = requests.get(
-                                url=response['next'], headers=headers
-                            ).json()
-                            pagination_results.append(response['results'])
-
-                            if response['next'] is None:
-                                break
-
-                        self._response = {
-                            'results': [
-                                item
-                                for sublist in pagination_results
-                                for item in sublist
-                            ]
-                        }
-                    else:
+                cache = ResponseCache()
+                ttl = cache.ttl(self.endpoint)
+                if ttl is not None:
+                    response = cache.get(self._request_key())
+                    if response is not None:
                         self._response = response
+                        return
+
+                if self.coalesce:
+                    response = _IN_FLIGHT_GETS.do(
+                        self._request_key(), lambda: self._get(session, headers)
+                    )
                 else:
-                    self._response = response
+                    response = self._get(session, headers)
+
+                if ttl is not None and 'results' in response:
+                    cache.set(self._request_key(), self.endpoint, response, ttl)
+                self._response = response
 
         except Exception as e:
             raise e
+        finally:
+            self._record_metrics(started)
+
+    def _record_metrics(self, started: float) -> None:
+        sink = get_sink()
+        if sink is None:
+            return
+        try:
+            sink.record(
+                RequestMetrics(
+                    endpoint=endpoint_template(self.endpoint),
+                    method=self.method,
+                    type=self.type,
+                    status=self.status,
+                    latency=time.perf_counter() - started,
+                    bytes=self.bytes,
+                    pages=self.pages,
+                    retries=self.retries,
+                )
+            )
+        except Exception:
+            # A failing sink must neither fail nor hide the outcome of the request
+            logger.exception('Recording the metrics of %s failed', self.url)
+
+    def _get(self, session, headers: dict) -> dict:
+        response = loads(
+            self._send(
+                session, 'get', self.url, headers=headers, params=self._get_params()
+            ).content
+        )
+        # Pagination
+        if self.paginate and response.get('next') is not None:
+            logger.info('Collecting %s results of %s', response['total'], self.url)
+            pagination_results = [response['results']]
+            pagination_results.extend(self._fetch_pages(session, headers, response))
+            response = dict(response)
+            response['results'] = [
+                item for sublist in pagination_results for item in sublist
+            ]
+            response['next'] = None
+        return response
+
+    def _request_key(self) -> tuple:
+        """Identifies GET requests that return the same response."""
+        params = []
+        for k, v in (self._get_params() or {}).items():
+            if isinstance(v, (list, tuple)):
+                params.append((k, tuple(str(item) for item in v)))
+            elif v is not None:
+                params.append((k, str(v)))
+        return (
+            self.url,
+            tuple(sorted(params)),
+            self.paginate,
+            getattr(self, 'authorization_token', None),
+        )
+
+    def _get_params(self) -> dict:
+        if self.page_size is None:
+            return self.url_params
+        params = dict(self.url_params) if self.url_params is not None else {}
+        params['limit'] = self.page_size
+        return params
+
+    def _fetch_pages(self, session, headers: dict, first: dict) -> list:
+        """Fetch all pages following the first one.
+
+        The page count is known from the first response, so the remaining pages are
+        requested concurrently and returned in page order. Falls back to following
+        the 'next' links one by one if the page urls can't be derived.
+
+        Returns:
+                List of the result lists of every following page
+        """
+        urls = self._page_urls(first)
+        if urls is None:
+            return list(self._follow_pages(session, headers, first['next']))
+
+        def fetch(url):
+            return loads(self._send(session, 'get', url, headers=headers).content)
+
+        workers = max(1, min(self.max_workers, len(urls)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(fetch, urls))
+
+        results = [response['results'] for response in responses]
+        if responses and responses[-1].get('next') is not None:
+            # Items were added while collecting
+            results.extend(self._follow_pages(session, headers, responses[-1]['next']))
+        return results
+
+    @staticmethod
+    def _page_urls(first: dict) -> list:
+        """URLs of all pages following the first one, None if they can't be derived."""
+        next_url = urlparse(first['next'])
+        query = parse_qs(next_url.query)
+        pages = first.get('pages')
+        if pages is None and 'limit' in query and first.get('total') is not None:
+            pages = math.ceil(first['total'] / int(query['limit'][0]))
+
+        if pages is None or 'page' not in query:
+            return None
+
+        urls = []
+        for page in range(int(query['page'][0]), pages + 1):
+            query['page'] = [str(page)]
+            urls.append(urlunparse(next_url._replace(query=urlencode(query, True))))
+        return urls
+
+    def _follow_pages(self, session, headers: dict, url: str):
+        """Yield the results of every page by following the 'next' links."""
+        while url is not None:
+            response = loads(self._send(session, 'get', url, headers=headers).content)
+            yield response['results']
+            url = response['next']
+
+    def _send(self, session, method: str, url: str, **kwargs):
+        """Send a single HTTP request, retrying transient failures.
+
+        Connection errors and the status codes of the RetryPolicy are retried with
+        exponential backoff. Only this request is repeated, e.g. a single page of a
+        paginated call. POSTs are only retried if their body carries an idempotency key.
+
+        Returns:
+                requests.Response
+        """
+        policy = self.retry if self.retry is not None else retry_policy(method)
+        retryable = policy.allows(kwargs.get('data'))
+        attempt = 0
+        while True:
+            try:
+                response = self._send_limited(session, method, url, **kwargs)
+            except TRANSIENT_ERRORS:
+                if not retryable or attempt >= policy.max_retries:
+                    raise
+            else:
+                if (
+                    not retryable
+                    or attempt >= policy.max_retries
+                    or response.status_code not in policy.statuses
+                ):
+                    with self._lock:
+                        self.status = response.status_code
+                        self.bytes += len(response.content)
+                        self.pages += 1
+                    return response
+
+            delay = policy.delay(attempt)
+            logger.info('Retrying %s %s in %.2fs', method.upper(), url, delay)
+            time.sleep(delay)
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+
+    def _send_limited(self, session, method: str, url: str, **kwargs):
+        """Send a single HTTP request within the rate limit of the API host.
+
+        Waits for the local rate limiter first. If the API still answers 429, the
+        host is paused for the time given by Retry-After and the request queued again.
+        A request without an answer within REQUEST_TIMEOUT raises requests.Timeout.
+
+        Returns:
+                requests.Response
+        """
+        limiter = RateLimiter()
+        for _ in range(RATE_LIMIT_MAX_WAITS):
+            limiter.acquire(self.type)
+            response = session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            logger.debug('%s %s %s', method.upper(), url, response.status_code)
+            if response.status_code != 429:
+                return response
+            logger.warning('Rate limited by the %s API', self.type)
+            limiter.throttled(self.type, response.headers.get('Retry-After'))
+        return response
+
+    def _headers(self) -> dict:
+        return {'Authorization': 'Bearer {}'.format(self.authorization_token)}
+
+    def iter_pages(self):
+        """Iterate over the results of a paginated GET request page by page.
+
+        Pages following the first one are only requested when iterated, so
+        stopping early skips the remaining requests. Use together with
+        paginate=False, otherwise all pages are already collected.
+
+        Yields:
+                List of results of one page
+        """
+        response = self.response
+        yield response['results']
+        if response.get('next') is not None:
+            session = SessionPool().session(self.type)
+            yield from self._follow_pages(session, self._headers(), response['next'])
 
     @property
     def response(self):
@@ -142,3 +384,208 @@ class ApiRequest:
             return self._response
         else:
             raise Exception('No response available!')
+
+
+class AsyncApiRequest(ApiRequest):
+    """ApiRequest that is sent when awaited instead of on creation.
+
+    Takes the same arguments as ApiRequest and goes through the same steps: rate
+    limit, retries, pagination, response cache, coalescing and metrics. The
+    requests are sent with aiohttp on the AsyncSessionPool, so awaiting them never
+    blocks the event loop and many of them can be in flight at once, bounded by
+    the connections of the pool and the rate limit. Needs the async extra.
+
+    Example:
+            request = await AsyncApiRequest(type='data', endpoint='/venues/', authorization_token=token)
+            request.response
+    """
+
+    _perform_on_init = False
+
+    def __await__(self):
+        return self._perform_async().__await__()
+
+    async def _perform_async(self) -> 'AsyncApiRequest':
+        started = time.perf_counter()
+        headers = self._headers()
+        session = AsyncSessionPool().session(self.type)
+        try:
+            if self.method != 'get':
+                self._response = loads(
+                    await self._send_async(
+                        session,
+                        self.method,
+                        self.url,
+                        data=self.body,
+                        headers=headers,
+                        params=self.url_params,
+                    )
+                )
+                return self
+
+            cache = ResponseCache()
+            ttl = cache.ttl(self.endpoint)
+            if ttl is not None:
+                response = cache.get(self._request_key())
+                if response is not None:
+                    self._response = response
+                    return self
+
+            if self.coalesce:
+                response = await _IN_FLIGHT_ASYNC_GETS.do(
+                    self._request_key(), lambda: self._get_async(session, headers)
+                )
+            else:
+                response = await self._get_async(session, headers)
+
+            if ttl is not None and 'results' in response:
+                cache.set(self._request_key(), self.endpoint, response, ttl)
+            self._response = response
+            return self
+        finally:
+            self._record_metrics(started)
+
+    async def _get_async(self, session, headers: dict) -> dict:
+        response = loads(
+            await self._send_async(
+                session, 'get', self.url, headers=headers, params=self._get_params()
+            )
+        )
+        # Pagination
+        if self.paginate and response.get('next') is not None:
+            logger.info('Collecting %s results of %s', response['total'], self.url)
+            pagination_results = [response['results']]
+            pagination_results.extend(
+                await self._fetch_pages_async(session, headers, response)
+            )
+            response = dict(response)
+            response['results'] = [
+                item for sublist in pagination_results for item in sublist
+            ]
+            response['next'] = None
+        return response
+
+    async def _fetch_pages_async(self, session, headers: dict, first: dict) -> list:
+        """Fetch all pages following the first one, at most max_workers at a time."""
+        urls = self._page_urls(first)
+        if urls is None:
+            return [
+                page
+                async for page in self._follow_pages_async(
+                    session, headers, first['next']
+                )
+            ]
+
+        semaphore = asyncio.Semaphore(max(1, self.max_workers))
+
+        async def fetch(url):
+            async with semaphore:
+                return loads(
+                    await self._send_async(session, 'get', url, headers=headers)
+                )
+
+        responses = await asyncio.gather(*[fetch(url) for url in urls])
+
+        results = [response['results'] for response in responses]
+        if responses and responses[-1].get('next') is not None:
+            # Items were added while collecting
+            async for page in self._follow_pages_async(
+                session, headers, responses[-1]['next']
+            ):
+                results.append(page)
+        return results
+
+    async def _follow_pages_async(self, session, headers: dict, url: str):
+        """Yield the results of every page by following the 'next' links."""
+        while url is not None:
+            response = loads(
+                await self._send_async(session, 'get', url, headers=headers)
+            )
+            yield response['results']
+            url = response['next']
+
+    async def _send_async(self, session, method: str, url: str, **kwargs) -> bytes:
+        """Send a single HTTP request, retrying transient failures (see ApiRequest._send).
+
+        Returns:
+                bytes: Body of the response
+        """
+        policy = self.retry if self.retry is not None else retry_policy(method)
+        retryable = policy.allows(kwargs.get('data'))
+        # aiohttp neither drops None values nor converts enums like requests does
+        kwargs['params'] = _query(kwargs.get('params'))
+        if isinstance(kwargs.get('data'), dict):
+            kwargs['data'] = _query(kwargs['data'])
+        transient = _async_transient_errors()
+        attempt = 0
+        while True:
+            try:
+                status, content = await self._send_limited_async(
+                    session, method, url, **kwargs
+                )
+            except transient:
+                if not retryable or attempt >= policy.max_retries:
+                    raise
+            else:
+                if (
+                    not retryable
+                    or attempt >= policy.max_retries
+                    or status not in policy.statuses
+                ):
+                    self.status = status
+                    self.bytes += len(content)
+                    self.pages += 1
+                    return content
+
+            delay = policy.delay(attempt)
+            logger.info('Retrying %s %s in %.2fs', method.upper(), url, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+            self.retries += 1
+
+    async def _send_limited_async(self, session, method: str, url: str, **kwargs):
+        """Send a single HTTP request within the rate limit (see ApiRequest._send_limited).
+
+        Waits for the rate limiter with asyncio.sleep, so other tasks keep running.
+
+        Returns:
+                tuple: Status code and body of the response
+        """
+        bucket = RateLimiter().bucket(self.type)
+        for _ in range(RATE_LIMIT_MAX_WAITS):
+            wait = bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with session.request(method, url, **kwargs) as response:
+                content = await response.read()
+            logger.debug('%s %s %s', method.upper(), url, response.status)
+            if response.status != 429:
+                return response.status, content
+            logger.warning('Rate limited by the %s API', self.type)
+            RateLimiter().throttled(self.type, response.headers.get('Retry-After'))
+        return response.status, content
+
+
+def _query(params: dict) -> list:
+    """Query or form parameters as pairs of strings, like requests encodes them.
+
+    None values are dropped and lists become one pair per item.
+    """
+    if params is None:
+        return None
+    pairs = []
+    for k, v in params.items():
+        for item in v if isinstance(v, (list, tuple)) else (v,):
+            if item is not None:
+                pairs.append((k, str(item)))
+    return pairs
+
+
+def _async_transient_errors() -> tuple:
+    """Errors of aiohttp after which the request may not have reached lemon.markets."""
+    aiohttp = import_aiohttp()
+    return (
+        aiohttp.ClientConnectionError,
+        aiohttp.ClientPayloadError,
+        asyncio.TimeoutError,
+    )
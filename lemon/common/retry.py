@@ -0,0 +1,70 @@
+import random
+from dataclasses import dataclass
+
+import requests
+
+
+# Errors after which the request may not have reached lemon.markets
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+@dataclass
+class RetryPolicy:
+    """Determines how often and when a failed request is sent again.
+
+    Attributes:
+            max_retries: Number of retries after the first attempt, 0 disables retrying
+            backoff: Delay before the first retry in seconds, doubled with every further retry
+            max_backoff: Upper bound of the delay in seconds
+            jitter: Fraction of the delay that is randomized, so concurrent callers don't retry in lockstep
+            statuses: HTTP status codes that are retried
+            require_idempotency: Only retry requests whose body carries an idempotency key
+    """
+
+    max_retries: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 8.0
+    jitter: float = 0.5
+    statuses: tuple = (500, 502, 503, 504)
+    require_idempotency: bool = False
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before a retry.
+
+        Args:
+                attempt: Number of retries already made
+        """
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return delay * (1 - self.jitter * random.random())
+
+    def allows(self, body=None) -> bool:
+        """Whether a request with the given body may be retried at all."""
+        if self.max_retries <= 0:
+            return False
+        if self.require_idempotency:
+            return isinstance(body, dict) and body.get('idempotency') is not None
+        return True
+
+
+# POSTs create orders and withdrawals, they are only retried when the idempotency
+# key makes a duplicate impossible.
+RETRY_POLICIES = {
+    'get': RetryPolicy(),
+    'put': RetryPolicy(),
+    'patch': RetryPolicy(),
+    'delete': RetryPolicy(),
+    'post': RetryPolicy(require_idempotency=True),
+}
+
+
+def retry_policy(method: str) -> RetryPolicy:
+    """Get the default RetryPolicy of a HTTP method.
+
+    Args:
+            method: HTTP method, e.g. 'get'
+    """
+    return RETRY_POLICIES.get(method.lower(), RetryPolicy(max_retries=0))
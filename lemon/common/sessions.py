@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lemon.common.helpers import Singleton
+from lemon.common.settings import (
+    ASYNC_POOL_LIMIT,
+    POOL_CONNECTIONS,
+    POOL_KEEP_ALIVE,
+    POOL_MAXSIZE,
+    REQUEST_TIMEOUT,
+)
+
+HOSTS = ('paper', 'money', 'data')
+
+
+class SessionPool(metaclass=Singleton):
+    """Shared keep-alive HTTP sessions, one per lemon.markets API host.
+
+    Every ApiRequest sends through the session of its host type, so consecutive
+    calls reuse already established TCP/TLS connections instead of opening a
+    new one per request. Sessions are created lazily and may be used from
+    multiple threads at once.
+
+    Attributes:
+            pool_connections: Number of connection pools cached per session
+            pool_maxsize: Maximum number of connections kept alive per host
+            keep_alive: Keep connections open between requests
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = POOL_CONNECTIONS,
+        pool_maxsize: int = POOL_MAXSIZE,
+        keep_alive: bool = POOL_KEEP_ALIVE,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+
+    def configure(
+        self,
+        pool_connections: int = None,
+        pool_maxsize: int = None,
+        keep_alive: bool = None,
+    ) -> None:
+        """Change the pool settings. Open sessions are closed and rebuilt on next use.
+
+        Args:
+                pool_connections: Number of connection pools cached per session
+                pool_maxsize: Maximum number of connections kept alive per host
+                keep_alive: Keep connections open between requests
+        """
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = pool_connections
+            if pool_maxsize is not None:
+                self.pool_maxsize = pool_maxsize
+            if keep_alive is not None:
+                self.keep_alive = keep_alive
+            self._close_sessions()
+
+    def session(self, type: str) -> requests.Session:
+        """Get the shared session of an API host.
+
+        Args:
+                type: Host type of the API, either 'paper', 'money' or 'data'
+
+        Raises:
+                ValueError: if the type is not valid
+        """
+        type = str(type).lower()
+        session = self._sessions.get(type)
+        if session is not None:
+            return session
+
+        if type not in HOSTS:
+            raise ValueError('Type is not valid!')
+
+        with self._lock:
+            # Another thread may have created it while waiting for the lock
+            if type not in self._sessions:
+                self._sessions[type] = self._create_session()
+            return self._sessions[type]
+
+    def close(self) -> None:
+        """Close all sessions and their pooled connections."""
+        with self._lock:
+            self._close_sessions()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=False,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def _close_sessions(self) -> None:
+        for session in self._sessions.values():
+            session.close()
+        self._sessions = {}
+
+
+class AsyncSessionPool(metaclass=Singleton):
+    """Shared aiohttp sessions of AsyncApiRequest, one per API host and event loop.
+
+    Needs the aiohttp package, install lemon with the async extra. Requests are
+    sent without blocking the event loop, so the number of concurrent requests is
+    only bounded by the connections of the pool. Call close() before the event
+    loop ends to release the connections.
+
+    Example:
+            async def main():
+                ...
+                await AsyncSessionPool().close()
+
+    Attributes:
+            limit: Maximum number of open connections per host
+            keep_alive: Keep connections open between requests
+    """
+
+    def __init__(
+        self, limit: int = ASYNC_POOL_LIMIT, keep_alive: bool = POOL_KEEP_ALIVE
+    ) -> None:
+        self.limit = limit
+        self.keep_alive = keep_alive
+        # Sessions are bound to the loop they were created on
+        self._sessions = weakref.WeakKeyDictionary()
+
+    def session(self, type: str):
+        """Get the session of an API host on the running event loop.
+
+        Args:
+                type: Host type of the API, either 'paper', 'money' or 'data'
+
+        Raises:
+                ValueError: if the type is not valid
+                ImportError: if aiohttp is not installed
+        """
+        type = str(type).lower()
+        if type not in HOSTS:
+            raise ValueError('Type is not valid!')
+
+        sessions = self._sessions.setdefault(asyncio.get_running_loop(), {})
+        session = sessions.get(type)
+        if session is None or session.closed:
+            aiohttp = import_aiohttp()
+            session = sessions[type] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit, force_close=not self.keep_alive
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    connect=REQUEST_TIMEOUT[0], sock_read=REQUEST_TIMEOUT[1]
+                ),
+            )
+        return session
+
+    async def close(self) -> None:
+        """Close the sessions of the running event loop and their connections."""
+        sessions = self._sessions.pop(asyncio.get_running_loop(), {})
+        for session in sessions.values():
+            await session.close()
+
+
+def import_aiohttp():
+    """Import aiohttp, which is only needed by the async clients.
+
+    Raises:
+            ImportError: if aiohttp is not installed
+    """
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError(
+            'The async clients need aiohttp, install it with pip install lemon[async]'
+        ) from e
+    return aiohttp
@@ -1,13 +1,117 @@
-import logging
+import os
+from datetime import timedelta
 
-BASE_PAPER_TRADING_API_URL = 'https://paper-trading.lemon.markets/v1'
-BASE_REAL_MONEY_TRADING_API_URL = 'https://trading.lemon.markets/v1'
-BASE_MARKET_DATA_API_URL = 'https://data.lemon.markets/v1'
+BASE_PAPER_TRADING_API_URL = os.environ.get(
+    'LEMON_PAPER_TRADING_API_URL', 'https://paper-trading.lemon.markets/v1'
+)
+BASE_REAL_MONEY_TRADING_API_URL = os.environ.get(
+    'LEMON_REAL_MONEY_TRADING_API_URL', 'https://trading.lemon.markets/v1'
+)
+BASE_MARKET_DATA_API_URL = os.environ.get(
+    'LEMON_MARKET_DATA_API_URL', 'https://data.lemon.markets/v1'
+)
+
+# Base URL by host type, may be changed at runtime, e.g. to a local stand-in
+BASE_URLS = {
+    'paper': BASE_PAPER_TRADING_API_URL,
+    'money': BASE_REAL_MONEY_TRADING_API_URL,
+    'data': BASE_MARKET_DATA_API_URL,
+}
+
+# Connection pooling, see lemon.common.sessions.SessionPool
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+POOL_KEEP_ALIVE = True
+# Connections per host of lemon.common.sessions.AsyncSessionPool
+ASYNC_POOL_LIMIT = 100
+# Seconds to wait for a connection to the API and for data of its response,
+# a request exceeding them fails with a transient, retried error
+REQUEST_TIMEOUT = (5.0, 30.0)
 
+# Number of pages of a list endpoint fetched in parallel
+PAGINATION_MAX_WORKERS = 8
 
-logging.basicConfig(
-    format='%(asctime)s %(levelname)s %(threadName)s: %(message)s',
-    filename='lemon_markets.log',
-    filemode='w',
-    level=logging.DEBUG,
+# Number of orders placed, activated or cancelled at the same time by the bulk
+# methods of Account
+BULK_MAX_CONCURRENCY = 8
+
+# Polling of lemon.core.watcher.OrderWatcher: seconds between two ticks, scaled
+# by the age of the youngest watched order, and trading hours of the venues on
+# weekdays in MARKET_TIMEZONE by MIC, None for venues that never close
+WATCH_MIN_INTERVAL = 1.0
+WATCH_MAX_INTERVAL = 60.0
+WATCH_AGE_FACTOR = 0.1
+MARKET_HOURS = {'XMUN': (8, 22), 'LMBPX': (8, 22), 'ALLDAY': None}
+MARKET_TIMEZONE = 'Europe/Berlin'
+
+# Real-time quote feed of lemon.markets, see lemon.core.stream.MqttTransport
+REALTIME_AUTH_URL = os.environ.get(
+    'LEMON_REALTIME_AUTH_URL', 'https://realtime.lemon.markets/v1/auth'
 )
+REALTIME_MQTT_HOST = 'mqtt.ably.io'
+REALTIME_MQTT_PORT = 8883
+# Seconds to wait for the feed to accept a connection
+STREAM_CONNECT_TIMEOUT = 10.0
+# Delays in seconds between the attempts to reconnect a lost stream, doubled
+# with every failed attempt, and failed attempts before giving up
+STREAM_RECONNECT_BACKOFF = 0.5
+STREAM_RECONNECT_MAX_BACKOFF = 30.0
+STREAM_RECONNECT_MAX_RETRIES = 20
+
+# Quotes kept per ISIN by lemon.core.quote_buffer.QuoteBuffer, each one takes
+# 80 bytes
+QUOTE_BUFFER_CAPACITY = 1024
+
+# Seconds ticks may arrive out of order at lemon.core.bars.BarAggregator, and
+# closed bars it keeps per ISIN and venue
+BAR_LATENESS = 2.0
+BAR_HISTORY = 1440
+
+# Maximum number of ISINs per request of /quotes/latest and /trades/latest
+LATEST_MAX_ISINS = 10
+
+# Long OHLC ranges are fetched in windows of this size by timespan
+OHLC_WINDOWS = {
+    'm': timedelta(days=1),
+    'h': timedelta(days=30),
+    'd': timedelta(days=365),
+}
+
+# Concurrent identical GET requests share one in-flight request
+COALESCE_GETS = True
+
+# Opt-in response cache for reference data, see lemon.common.cache.ResponseCache
+RESPONSE_CACHE_MAXSIZE = 256
+# Seconds a response is cached by endpoint
+RESPONSE_CACHE_TTLS = {'/venues/': 3600, '/instruments/': 600}
+
+# Database of lemon.core.ohlc_store.OHLCStore
+OHLC_STORE_PATH = '~/.lemon/ohlc.sqlite'
+
+# Client-side rate limits in requests per minute by subscription plan,
+# see lemon.common.ratelimit.RateLimiter
+RATE_LIMITS = {'free': 200, 'basic': 600, 'pro': 1200}
+RATE_LIMIT_DEFAULT_PLAN = 'free'
+# Seconds to wait after a 429 response without Retry-After header
+RATE_LIMIT_RETRY_AFTER = 1.0
+# Times a request is queued again after a 429 response
+RATE_LIMIT_MAX_WAITS = 5
+
+
+# Upper bounds in seconds of the latency histograms of lemon.common.metrics
+METRICS_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Format of the records written by lemon.common.log.enable_logging
+LOG_FORMAT = '%(asctime)s %(levelname)s %(threadName)s %(name)s: %(message)s'
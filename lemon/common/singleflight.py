@@ -0,0 +1,119 @@
+import asyncio
+import copy
+import threading
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.followers = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one.
+
+    While a call for a key is in flight, further callers with the same key wait
+    for it and share its result (or exception) instead of running it again. The
+    caller running the call gets its return value, every waiting caller a deep
+    copy of it, so no caller sees the changes of another.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """Run func, or wait for the in-flight call of the same key.
+
+        Args:
+                key: Hashable identifier of the call
+                func: Function without arguments performing the call
+
+        Returns:
+                Return value of func, or a copy of it for waiting callers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.error is None and call.followers:
+                # Copied before returning, the leader may change its result
+                call.result = copy.deepcopy(result)
+            call.done.set()
+        return result
+
+    def in_flight(self) -> int:
+        """Number of calls currently in flight."""
+        return len(self._calls)
+
+
+class _AsyncCall:
+    def __init__(self) -> None:
+        self.task = None
+        self.followers = 0
+        self.result = None
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines: concurrent identical calls on one event loop
+    await the same task instead of running it again. As with SingleFlight, only
+    the caller starting the task gets its result, the others a deep copy.
+    """
+
+    def __init__(self) -> None:
+        self._calls = {}
+
+    async def do(self, key, func):
+        """Await func(), or the in-flight call of the same key.
+
+        Args:
+                key: Hashable identifier of the call
+                func: Function without arguments returning the awaitable performing the call
+
+        Returns:
+                Result of the awaitable, or a copy of it for waiting callers
+        """
+        key = (asyncio.get_running_loop(), key)
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _AsyncCall()
+            call.task = asyncio.ensure_future(self._run(key, call, func))
+            # A cancelled caller doesn't cancel the call the others are waiting for
+            return await asyncio.shield(call.task)
+        call.followers += 1
+        await asyncio.shield(call.task)
+        return copy.deepcopy(call.result)
+
+    async def _run(self, key, call: _AsyncCall, func):
+        try:
+            result = await func()
+        finally:
+            del self._calls[key]
+        if call.followers:
+            # Copied before any caller resumes and may change the result
+            call.result = copy.deepcopy(result)
+        return result
+
+    def in_flight(self) -> int:
+        """Number of calls currently in flight."""
+        return len(self._calls)
@@ -1,3 +1,4 @@
+from lemon.core.bulk import run_bulk
 from lemon.core.orders import Order
 from lemon.common.helpers import Singleton
 from lemon.common.enums import (
@@ -8,13 +9,22 @@ from lemon.common.enums import (
     SORT,
     TRADING_TYPE,
 )
-from lemon.common.errors import LemonMarketError
+from lemon.common.errors import LemonMarketError, OrderStatusError
+from lemon.common.frames import POSITION_SCHEMA, build_frame
+from lemon.common.ratelimit import RateLimiter
 from lemon.common.requests import ApiRequest
+from lemon.common.settings import BULK_MAX_CONCURRENCY
+import json
 import logging
-import pandas as pd
+import uuid
 from dataclasses import dataclass
 from datetime import datetime
-from typing import get_type_hints
+from typing import TYPE_CHECKING, get_type_hints
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(init=True)
@@ -225,7 +235,7 @@ class AccountState:
         try:
             self.fetch_state()
         except Exception as e:
-            logging.warning(f'Cant fetch account state {e}')
+            logger.warning('Cant fetch account state %s', e)
 
     def fetch_state(self) -> None:
         """Refresh information about this Account.
@@ -243,34 +253,53 @@ class AccountState:
         )
 
         if request.response['status'] == 'ok':
-            types = get_type_hints(AccountState)
-            # Dynamically set Attributes
-            for k, v in request.response['results'].items():
-                if v is not None:
-                    if f'_{k}' in types:
-                        # Parse ISO string response to datetime if attribute is as datetime annotated
-                        if types[f'_{k}'] == datetime:
-                            setattr(self, f'_{k}', datetime.fromisoformat(str(v)))
-                        else:
-                            setattr(self, f'_{k}', v)
+            self._set_state(request.response['results'])
         else:
             raise LemonMarketError(
                 request.response['error_code'], request.response['error_message']
             )
 
+    def _set_state(self, results: dict) -> None:
+        """Take over the attributes of a response of /account/."""
+        types = get_type_hints(AccountState)
+        # Dynamically set Attributes
+        for k, v in results.items():
+            if v is not None:
+                if f'_{k}' in types:
+                    # Parse ISO string response to datetime if attribute is as datetime annotated
+                    if types[f'_{k}'] == datetime:
+                        setattr(self, f'_{k}', datetime.fromisoformat(str(v)))
+                    else:
+                        setattr(self, f'_{k}', v)
+        # Pace requests according to the subscription plans
+        RateLimiter().configure_plans(self._trading_plan, self._data_plan)
+
 
 class Account(AccountState, metaclass=Singleton):
     def __init__(
-        self, credentials: str, trading_type: TRADING_TYPE = TRADING_TYPE.PAPER
+        self,
+        credentials: str,
+        trading_type: TRADING_TYPE = TRADING_TYPE.PAPER,
+        raw: bool = False,
     ) -> None:
         self._token = credentials
         super().__init__()
         self._mode = trading_type
+        self._raw = raw
 
     @property
     def token(self) -> str:
         return self._token
 
+    @property
+    def raw(self) -> bool:
+        """Return plain lists of result dicts instead of DataFrames, so pandas is never imported."""
+        return self._raw
+
+    @raw.setter
+    def raw(self, raw: bool) -> None:
+        self._raw = raw
+
     def withdraw(self, amount: int, pin: int, idempotency: str = None) -> None:
         """Withdraw money from your bank account to your lemon.markets account e.g. amount = 1000000 means 100€ (hundreths of a cent). Take a look at: https://docs.lemon.markets/trading/overview#working-with-numbers-in-the-trading-api
 
@@ -278,6 +307,7 @@ class Account(AccountState, metaclass=Singleton):
                 amount: amount of money that will be withdrawn, minimum is 1000000 (100 €)
                 pin: his is the personal verification PIN you set during the onboarding.
                 idempotency: ou can set your own unique idempotency key to prevent duplicate operations. Subsequent requests with the same idempotency key will then not go through and throw an error message. This means you cannot make the same withdrawal twice.
+                        A random key is used if not set, so the request can be retried safely.
 
         Raises:
                 LemonMarketError: if lemon.markets returns an error
@@ -285,7 +315,11 @@ class Account(AccountState, metaclass=Singleton):
         """
         if amount > 0:
 
-            body = {'amount': amount}
+            if idempotency is None:
+                # Lets the request be retried without withdrawing twice
+                idempotency = uuid.uuid4().hex
+
+            body = {'amount': amount, 'pin': pin, 'idempotency': idempotency}
             request = ApiRequest(
                 type=self.mode,
                 endpoint='/account/withdrawals/',
@@ -340,6 +374,7 @@ class Account(AccountState, metaclass=Singleton):
         start: datetime = None,
         end: datetime = None,
         sorting: SORT = None,
+        page_size: int = None,
     ) -> list:
         """Get List of all Bankstatements in you Account.
 
@@ -348,6 +383,7 @@ class Account(AccountState, metaclass=Singleton):
                 start: Filter for bank statements after a specific date.
                 end: Filter for bank statements until a specific date.
                 sorting: Sort either ASCENDING (oldest first) or DESCENDING (newest first)
+                page_size: Number of bank statements fetched per page
 
         Returns:
                 List of Bankstatement-Dicts
@@ -364,17 +400,12 @@ class Account(AccountState, metaclass=Singleton):
                 LemonMarketError: if lemon.markets returns an error
         """
 
-        params = {
-            'type': type,
-            'from': start.isoformat() if start is not None else None,
-            'to': end.isoformat() if end is not None else None,
-            'sorting': sorting,
-        }
         request = ApiRequest(
             type=self.mode,
             endpoint='/account/bankstatements/',
-            url_params=params,
+            url_params=self._bankstatements_params(type, start, end, sorting),
             method='GET',
+            page_size=page_size,
             authorization_token=self._token,
         )
 
@@ -385,6 +416,66 @@ class Account(AccountState, metaclass=Singleton):
                 request.response['error_code'], request.response['error_message']
             )
 
+    def iter_bankstatements(
+        self,
+        type: BANKSTATEMENT_TYPE = None,
+        start: datetime = None,
+        end: datetime = None,
+        sorting: SORT = None,
+        page_size: int = None,
+        chunked: bool = False,
+    ):
+        """Iterate over the Bankstatements in your Account while they are fetched page by page.
+
+        Following pages are only requested when the iteration reaches them, so the
+        full history never has to be kept in memory and stopping early saves requests.
+
+        Args:
+                type: Filter for different types of Bankstatements: PAY_IN, PAY_OUT, ORDER_BUY, ORDER-SELL, EOD_BALANCE, DIVIDEND
+                start: Filter for bank statements after a specific date.
+                end: Filter for bank statements until a specific date.
+                sorting: Sort either ASCENDING (oldest first) or DESCENDING (newest first)
+                page_size: Number of bank statements fetched per page
+                chunked: Yield the list of Bankstatement-Dicts of each page instead of single ones
+
+        Yields:
+                Bankstatement-Dict (see bankstatements()), or a list of them if chunked
+
+        Raises:
+                LemonMarketError: if lemon.markets returns an error
+        """
+        request = ApiRequest(
+            type=self.mode,
+            endpoint='/account/bankstatements/',
+            url_params=self._bankstatements_params(type, start, end, sorting),
+            method='GET',
+            page_size=page_size,
+            paginate=False,
+            authorization_token=self._token,
+        )
+
+        if request.response['status'] != 'ok':
+            raise LemonMarketError(
+                request.response['error_code'], request.response['error_message']
+            )
+
+        for page in request.iter_pages():
+            if chunked:
+                yield page
+            else:
+                yield from page
+
+    @staticmethod
+    def _bankstatements_params(
+        type: BANKSTATEMENT_TYPE, start: datetime, end: datetime, sorting: SORT
+    ) -> dict:
+        return {
+            'type': type,
+            'from': start.isoformat() if start is not None else None,
+            'to': end.isoformat() if end is not None else None,
+            'sorting': sorting,
+        }
+
     def documents(self) -> list:
         """Get information about all documents linked with this account
 
@@ -432,14 +523,14 @@ class Account(AccountState, metaclass=Singleton):
                 request.response['error_code'], request.response['error_message']
             )
 
-    def positions(self, isin: str = None) -> pd.DataFrame:
+    def positions(self, isin: str = None) -> 'pd.DataFrame':
         """Get the positions of the account.
 
         Args:
                 isin: Filter for position of a specific share
 
         Returns:
-                pandas.DataFrame: positions
+                pandas.DataFrame: positions, or a list of dicts if the account is raw
                         isin: This is the International Securities Identification Number (ISIN) of the position
                         isin_title: This is the Title of the instrument
                         quantity: This is the number of positions you currently hold for the respective Instrument
@@ -461,7 +552,9 @@ class Account(AccountState, metaclass=Singleton):
         )
 
         if request.response['status'] == 'ok':
-            return pd.DataFrame(request.response['results'])
+            if self._raw:
+                return request.response['results']
+            return build_frame(request.response['results'], POSITION_SCHEMA)
         else:
             raise LemonMarketError(
                 request.response['error_code'], request.response['error_message']
@@ -476,6 +569,7 @@ class Account(AccountState, metaclass=Singleton):
         end: datetime = None,
         type: ORDERTYPE = None,
         key_creation_id: str = None,
+        page_size: int = None,
     ) -> list:
         """Get a list of orders on your account.
 
@@ -487,6 +581,7 @@ class Account(AccountState, metaclass=Singleton):
                 end: Specify a datetime to get only orders until a specific date.
                 type: Filter for different types of orders: market, stop, limit, stop_limit
                 key_creation_id: Filter for a specific API you created orders with
+                page_size: Number of orders fetched per page
 
         Returns:
                 List of Orders
@@ -494,21 +589,14 @@ class Account(AccountState, metaclass=Singleton):
         Raises:
                 LemonMarketError: if lemon.markets returns an error
         """
-        payload = {
-            'from': start.isoformat() if start is not None else None,
-            'to': end.isoformat() if end is not None else None,
-            'isin': isin,
-            'status': str(status) if status is not None else None,
-            'side': str(side) if status is not None else None,
-            'type': str(type) if type is not None else None,
-            'key_creation_id': key_creation_id,
-        }
-
         request = ApiRequest(
             type=self.mode,
             endpoint='/orders/',
-            url_params=payload,
+            url_params=self._orders_params(
+                isin, status, side, start, end, type, key_creation_id
+            ),
             method='GET',
+            page_size=page_size,
             authorization_token=self._token,
         )
 
@@ -520,6 +608,84 @@ class Account(AccountState, metaclass=Singleton):
                 request.response['error_code'], request.response['error_message']
             )
 
+    def iter_orders(
+        self,
+        isin: str = None,
+        status: ORDERSTATUS = None,
+        side: ORDERSIDE = None,
+        start: datetime = None,
+        end: datetime = None,
+        type: ORDERTYPE = None,
+        key_creation_id: str = None,
+        page_size: int = None,
+        chunked: bool = False,
+    ):
+        """Iterate over the orders on your account while they are fetched page by page.
+
+        Following pages are only requested when the iteration reaches them, so stopping
+        early saves requests and not all orders have to be kept in memory.
+
+        Args:
+                isin: Filter for specific instrument
+                status: Filter for status
+                side: Filter for 'buy' or 'sell'
+                start: Specify a datetime to get order from a specific date on.
+                end: Specify a datetime to get only orders until a specific date.
+                type: Filter for different types of orders: market, stop, limit, stop_limit
+                key_creation_id: Filter for a specific API you created orders with
+                page_size: Number of orders fetched per page
+                chunked: Yield the list of Orders of each page instead of single Orders
+
+        Yields:
+                Order, or a list of Orders if chunked
+
+        Raises:
+                LemonMarketError: if lemon.markets returns an error
+        """
+        request = ApiRequest(
+            type=self.mode,
+            endpoint='/orders/',
+            url_params=self._orders_params(
+                isin, status, side, start, end, type, key_creation_id
+            ),
+            method='GET',
+            page_size=page_size,
+            paginate=False,
+            authorization_token=self._token,
+        )
+
+        if request.response['status'] != 'ok':
+            raise LemonMarketError(
+                request.response['error_code'], request.response['error_message']
+            )
+
+        for page in request.iter_pages():
+            orders = [Order.from_result(order) for order in page]
+            if chunked:
+                yield orders
+            else:
+                yield from orders
+
+    @staticmethod
+    def _orders_params(
+        isin: str,
+        status: ORDERSTATUS,
+        side: ORDERSIDE,
+        start: datetime,
+        end: datetime,
+        type: ORDERTYPE,
+        key_creation_id: str,
+    ) -> dict:
+        return {
+            'from': start.isoformat() if start is not None else None,
+            'to': end.isoformat() if end is not None else None,
+            'isin': isin,
+            'status': str(status) if status is not None else None,
+            'side': str(side) if side is not None else None,
+            'type': str(type) if type is not None else None,
+            'key_creation_id': key_creation_id,
+        }
+
     def get_order(self, order_id: str) -> Order:
         """Retrieve information of a specific order.
 
@@ -546,6 +712,38 @@ class Account(AccountState, metaclass=Singleton):
                 request.response['error_code'], request.response['error_message']
             )
 
+    def activate_order(self, order_id: str, pin: str = None) -> None:
+        """Activate a placed order, so it is routed to the trading venue.
+
+        Args:
+                order_id: ID of the order
+                pin: PIN to activate a real-money order. Mandatory for real-money trading.
+
+        Raises:
+                ValueError: if PIN is missing for real money orders
+                LemonMarketError: if lemon.markets returns an error
+        """
+        body = None
+        if self.mode == TRADING_TYPE.MONEY:
+            if pin is None:
+                raise ValueError('Pin must be passed for real money orders.')
+            body = json.dumps({'pin': pin})
+
+        request = ApiRequest(
+            type=self.mode,
+            endpoint=f'/orders/{order_id}/activate/',
+            method='POST',
+            body=body,
+            authorization_token=self._token,
+        )
+
+        if request.response['status'] == 'ok':
+            return
+        else:
+            raise LemonMarketError(
+                request.response['error_code'], request.response['error_message']
+            )
+
     def cancel_order(self, order_id: str) -> None:
         """Cancel an order that is placed/inactive or activated (but not executed by the stock exchange)
 
@@ -569,3 +767,133 @@ class Account(AccountState, metaclass=Singleton):
             raise LemonMarketError(
                 request.response['error_code'], request.response['error_message']
             )
+
+    def place_orders(
+        self,
+        orders: list,
+        activate: bool = False,
+        pin: str = None,
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+    ) -> list:
+        """Place many draft orders concurrently, e.g. for a rebalance of a portfolio.
+
+        Every order gets an idempotency key if it has none, so retried requests can't
+        place it twice. Requests are paced by the rate limiter. A failing order doesn't
+        abort the others, check the returned results instead.
+
+        Args:
+                orders: Draft orders
+                activate: Activate every order right after it was placed
+                pin: PIN to activate real-money orders
+                max_concurrency: Maximum number of orders placed at the same time
+
+        Returns:
+                list: One OrderResult per order, in the order of orders
+        """
+
+        def place(order: Order) -> None:
+            if order.status != ORDERSTATUS.DRAFT:
+                raise OrderStatusError(f'Order {order._id} is already placed')
+            # Called through Order, so AsyncOrders are placed synchronously as well
+            Order.place(order)
+            if activate:
+                Order.activate(order, pin)
+
+        return run_bulk(place, orders, max_concurrency)
+
+    def activate_orders(
+        self,
+        order_ids: list = None,
+        isin: str = None,
+        side: ORDERSIDE = None,
+        type: ORDERTYPE = None,
+        pin: str = None,
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+    ) -> list:
+        """Activate many placed orders concurrently.
+
+        Either activates the given orders or the inactive orders matching the filters,
+        which are applied by lemon.markets when listing the orders.
+
+        Args:
+                order_ids: IDs of the orders to activate
+                isin: Only activate orders of this instrument
+                side: Only activate 'buy' or 'sell' orders
+                type: Only activate orders of this type: market, stop, limit, stop_limit
+                pin: PIN to activate real-money orders
+                max_concurrency: Maximum number of orders activated at the same time
+
+        Returns:
+                list: One OrderResult with the time taken per order
+
+        Raises:
+                ValueError: if order_ids and filters are both passed
+                LemonMarketError: if listing the orders fails
+        """
+        orders = self._bulk_targets(
+            order_ids, ('inactive',), isin=isin, side=side, type=type
+        )
+
+        def activate(order) -> None:
+            if isinstance(order, Order):
+                Order.activate(order, pin)
+            else:
+                self.activate_order(order, pin)
+
+        return run_bulk(activate, orders, max_concurrency)
+
+    def cancel_orders(
+        self,
+        order_ids: list = None,
+        isin: str = None,
+        status: ORDERSTATUS = None,
+        side: ORDERSIDE = None,
+        type: ORDERTYPE = None,
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+    ) -> list:
+        """Cancel many orders concurrently, e.g. all open orders at the end of the day.
+
+        Either cancels the given orders or the orders matching the filters, which are
+        applied by lemon.markets when listing the orders. Of those only orders that
+        can still be cancelled (inactive, activated or open) are cancelled.
+
+        Args:
+                order_ids: IDs of the orders to cancel
+                isin: Only cancel orders of this instrument
+                status: Only cancel orders with this status
+                side: Only cancel 'buy' or 'sell' orders
+                type: Only cancel orders of this type: market, stop, limit, stop_limit
+                max_concurrency: Maximum number of orders cancelled at the same time
+
+        Returns:
+                list: One OrderResult with the time taken per order
+
+        Raises:
+                ValueError: if order_ids and filters are both passed
+                LemonMarketError: if listing the orders fails
+        """
+        orders = self._bulk_targets(
+            order_ids,
+            ('inactive', 'activated', 'open'),
+            isin=isin,
+            status=status,
+            side=side,
+            type=type,
+        )
+
+        def cancel(order) -> None:
+            self.cancel_order(order._id if isinstance(order, Order) else order)
+
+        return run_bulk(cancel, orders, max_concurrency)
+
+    def _bulk_targets(self, order_ids: list, statuses: tuple, **filters) -> list:
+        """Orders of a bulk operation: the given IDs or the listed orders with one of statuses."""
+        if order_ids is not None:
+            if any(v is not None for v in filters.values()):
+                raise ValueError('Pass either order_ids or filters, not both')
+            return list(order_ids)
+        if filters.get('status') is None and len(statuses) == 1:
+            # Let lemon.markets filter by the only status in question
+            filters['status'] = ORDERSTATUS(statuses[0])
+        orders = self.orders(**filters)
+        return [order for order in orders if str(order.status) in statuses]
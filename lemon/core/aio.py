@@ -0,0 +1,475 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from lemon.common.enums import (
+    BANKSTATEMENT_TYPE,
+    INSTRUMENT_TYPE,
+    ORDERSIDE,
+    ORDERSTATUS,
+    ORDERTYPE,
+    SORT,
+    TIMESPAN,
+    TRADING_TYPE,
+    VENUE,
+)
+from lemon.common.errors import LemonMarketError, OrderStatusError
+from lemon.common.frames import (
+    INSTRUMENT_SCHEMA,
+    OHLC_SCHEMA,
+    POSITION_SCHEMA,
+    QUOTE_SCHEMA,
+    TRADE_SCHEMA,
+    VENUE_SCHEMA,
+    build_frame,
+)
+from lemon.common.requests import AsyncApiRequest
+from lemon.common.settings import (
+    BULK_MAX_CONCURRENCY,
+    LATEST_MAX_ISINS,
+    PAGINATION_MAX_WORKERS,
+)
+from lemon.core.account import Account
+from lemon.core.bulk import run_bulk_async
+from lemon.core.market import MarketData, _merge_windows, _ohlc_windows
+from lemon.core.orders import Order
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class AsyncOrder(Order):
+    """Order whose API calls are awaitable.
+
+    Takes the same arguments and has the same attributes as Order.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_order(cls, order: Order) -> 'AsyncOrder':
+        """Turns an Order into an AsyncOrder in place.
+
+        Args:
+                order: Order returned by one of the sync methods
+
+        Returns:
+                AsyncOrder: The same object
+        """
+        order.__class__ = cls
+        return order
+
+    @classmethod
+    def from_result(cls, res: dict) -> 'AsyncOrder':
+        """Creates an AsyncOrder Object from an API Response (see Order.from_result)."""
+        return cls.from_order(Order.from_result(res))
+
+    async def place(self) -> None:
+        """Place the order (see Order.place)."""
+        if self._status != ORDERSTATUS.DRAFT:
+            return
+
+        results = await _results(
+            type=self._trading_type,
+            endpoint='/orders/',
+            method='POST',
+            body=self._place_body(),
+            authorization_token=Account().token,
+        )
+        self._attr_from_response(results)
+
+    async def activate(self, pin: str = None) -> None:
+        """Activate the order (see Order.activate)."""
+        if self._status == ORDERSTATUS.DRAFT:
+            raise OrderStatusError('Order must first be placed')
+
+        body = None
+        if self._trading_type == TRADING_TYPE.MONEY:
+            if pin is None:
+                raise ValueError('Pin must be passed for real money orders.')
+            body = json.dumps({'pin': pin})
+
+        await _results(
+            type=self._trading_type,
+            endpoint=f'/orders/{self._id}/activate/',
+            method='POST',
+            body=body,
+            authorization_token=Account().token,
+        )
+
+    async def cancel(self) -> None:
+        """Cancel the order (see Order.cancel)."""
+        if self._status in [
+            ORDERSTATUS.INACTIVE,
+            ORDERSTATUS.ACTIVATED,
+            ORDERSTATUS.OPEN,
+        ]:
+            await AsyncAccount().cancel_order(self._id)
+
+    async def reload(self) -> None:
+        """Fetch the order again (see Order.reload)."""
+        self._copy_from(await AsyncAccount().get_order(self._id))
+
+
+class AsyncAccount(object):
+    """Awaitable counterpart of Account.
+
+    Uses the credentials and mode of the Account singleton, so an Account has to
+    be created with your credentials first. Results have the same shape as the
+    ones of Account, Orders are returned as AsyncOrder.
+    """
+
+    def __init__(self, account: Account = None) -> None:
+        self._account = account if account is not None else Account()
+
+    @property
+    def account(self) -> Account:
+        return self._account
+
+    async def fetch_state(self) -> None:
+        """Refresh information about this Account (see Account.fetch_state)."""
+        results = await self._results('/account/', type='paper')
+        self._account._set_state(results)
+
+    async def withdraw(self, amount: int, pin: int, idempotency: str = None) -> None:
+        """Withdraw money (see Account.withdraw)."""
+        if amount <= 0:
+            raise ValueError(f"Can't withdraw negative amount {amount}!")
+        if idempotency is None:
+            # Lets the request be retried without withdrawing twice
+            idempotency = uuid.uuid4().hex
+
+        body = {'amount': amount, 'pin': pin, 'idempotency': idempotency}
+        await self._results('/account/withdrawals/', method='POST', body=body)
+
+    async def withdrawals(self) -> list:
+        """Get Withdrawals of the account (see Account.withdrawals)."""
+        return await self._results('/account/withdrawals/')
+
+    async def bankstatements(
+        self,
+        type: BANKSTATEMENT_TYPE = None,
+        start: datetime = None,
+        end: datetime = None,
+        sorting: SORT = None,
+        page_size: int = None,
+    ) -> list:
+        """Get List of all Bankstatements (see Account.bankstatements)."""
+        return await self._results(
+            '/account/bankstatements/',
+            url_params=Account._bankstatements_params(type, start, end, sorting),
+            page_size=page_size,
+        )
+
+    async def documents(self) -> list:
+        """Get information about all documents (see Account.documents)."""
+        return await self._results('/account/documents/')
+
+    async def get_doc(self, doc_id: str) -> dict:
+        """Download a specific doc by id (see Account.get_doc)."""
+        return await self._results(f'/account/documents/{doc_id}')
+
+    async def positions(self, isin: str = None) -> 'pd.DataFrame':
+        """Get the positions of the account (see Account.positions)."""
+        results = await self._results('/positions/', url_params={'isin': isin})
+        if self._account.raw:
+            return results
+        return build_frame(results, POSITION_SCHEMA)
+
+    async def orders(
+        self,
+        isin: str = None,
+        status: ORDERSTATUS = None,
+        side: ORDERSIDE = None,
+        start: datetime = None,
+        end: datetime = None,
+        type: ORDERTYPE = None,
+        key_creation_id: str = None,
+        page_size: int = None,
+    ) -> list:
+        """Get a list of orders on your account (see Account.orders)."""
+        results = await self._results(
+            '/orders/',
+            url_params=Account._orders_params(
+                isin, status, side, start, end, type, key_creation_id
+            ),
+            page_size=page_size,
+        )
+        return [AsyncOrder.from_result(order) for order in results]
+
+    async def get_order(self, order_id: str) -> AsyncOrder:
+        """Retrieve information of a specific order (see Account.get_order)."""
+        return AsyncOrder.from_result(await self._results(f'/orders/{order_id}'))
+
+    async def cancel_order(self, order_id: str) -> None:
+        """Cancel an order (see Account.cancel_order)."""
+        await self._results(f'/orders/{order_id}', method='DELETE')
+
+    async def activate_order(self, order_id: str, pin: str = None) -> None:
+        """Activate a placed order (see Account.activate_order)."""
+        body = None
+        if self._account.mode == TRADING_TYPE.MONEY:
+            if pin is None:
+                raise ValueError('Pin must be passed for real money orders.')
+            body = json.dumps({'pin': pin})
+
+        await self._results(f'/orders/{order_id}/activate/', method='POST', body=body)
+
+    async def activate_orders(
+        self,
+        order_ids: list = None,
+        isin: str = None,
+        side: ORDERSIDE = None,
+        type: ORDERTYPE = None,
+        pin: str = None,
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+    ) -> list:
+        """Activate many placed orders concurrently (see Account.activate_orders)."""
+        orders = await self._bulk_targets(
+            order_ids, ('inactive',), isin=isin, side=side, type=type
+        )
+
+        async def activate(order) -> None:
+            if isinstance(order, Order):
+                await AsyncOrder.activate(order, pin)
+            else:
+                await self.activate_order(order, pin)
+
+        return await run_bulk_async(activate, orders, max_concurrency)
+
+    async def cancel_orders(
+        self,
+        order_ids: list = None,
+        isin: str = None,
+        status: ORDERSTATUS = None,
+        side: ORDERSIDE = None,
+        type: ORDERTYPE = None,
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+    ) -> list:
+        """Cancel many orders concurrently (see Account.cancel_orders)."""
+        orders = await self._bulk_targets(
+            order_ids,
+            ('inactive', 'activated', 'open'),
+            isin=isin,
+            status=status,
+            side=side,
+            type=type,
+        )
+
+        async def cancel(order) -> None:
+            await self.cancel_order(order._id if isinstance(order, Order) else order)
+
+        return await run_bulk_async(cancel, orders, max_concurrency)
+
+    async def place_orders(
+        self,
+        orders: list,
+        activate: bool = False,
+        pin: str = None,
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+    ) -> list:
+        """Place many draft orders concurrently (see Account.place_orders)."""
+
+        async def place(order: Order) -> None:
+            if order.status != ORDERSTATUS.DRAFT:
+                raise OrderStatusError(f'Order {order._id} is already placed')
+            # Called through AsyncOrder, so plain Orders are placed on the loop as well
+            await AsyncOrder.place(order)
+            if activate:
+                await AsyncOrder.activate(order, pin)
+
+        return await run_bulk_async(place, orders, max_concurrency)
+
+    async def _bulk_targets(self, order_ids: list, statuses: tuple, **filters) -> list:
+        """Orders of a bulk operation (see Account._bulk_targets)."""
+        if order_ids is not None:
+            if any(v is not None for v in filters.values()):
+                raise ValueError('Pass either order_ids or filters, not both')
+            return list(order_ids)
+        if filters.get('status') is None and len(statuses) == 1:
+            # Let lemon.markets filter by the only status in question
+            filters['status'] = ORDERSTATUS(statuses[0])
+        orders = await self.orders(**filters)
+        return [order for order in orders if str(order.status) in statuses]
+
+    async def _results(self, endpoint: str, type: str = None, **kwargs):
+        return await _results(
+            type=type if type is not None else self._account.mode,
+            endpoint=endpoint,
+            authorization_token=self._account.token,
+            **kwargs,
+        )
+
+
+class AsyncMarketData(object):
+    """Awaitable counterpart of MarketData. Results have the same shape as the ones of MarketData.
+
+    Args:
+        raw: Return plain lists of result dicts instead of DataFrames, so pandas is never imported
+    """
+
+    def __init__(self, raw: bool = False) -> None:
+        self._market = MarketData(raw=raw)
+
+    @property
+    def raw(self) -> bool:
+        return self._market.raw
+
+    async def search_instrument(
+        self,
+        search: str = None,
+        isin: str = None,
+        itype: INSTRUMENT_TYPE = None,
+        venue: VENUE = None,
+        currency: str = None,
+        tradable: bool = None,
+        page_size: int = None,
+    ) -> 'pd.DataFrame':
+        """Searching for instrument (see MarketData.search_instrument)."""
+        results = await _data(
+            '/instruments/',
+            url_params=MarketData._instrument_params(
+                search, isin, itype, venue, currency, tradable
+            ),
+            page_size=page_size,
+        )
+        return self._market._frame(results, INSTRUMENT_SCHEMA)
+
+    async def trading_venues(self, venue: VENUE = None) -> 'pd.DataFrame':
+        """List all available Trading Venues (see MarketData.trading_venues)."""
+        results = await _data(
+            '/venues/', url_params={'mic': str(venue) if venue is not None else None}
+        )
+        return self._market._frame(results, VENUE_SCHEMA)
+
+    async def latest_quote(self, isin: str, venue: VENUE = None) -> dict:
+        """Get the latest quote of an instrument (see MarketData.latest_quote)."""
+        results = await _data(f'/quotes/latest?decimals=false&isin={isin}&mic={venue}')
+        return results[0]
+
+    async def latest_trade(self, venue: VENUE, isin: str) -> dict:
+        """Latest trade of a specific instrument (see MarketData.latest_trade)."""
+        results = await _data(
+            f'/trades/latest?decimals=false&isin={isin}&mic={str(venue)}/'
+        )
+        return results[0]
+
+    async def latest_quotes(
+        self,
+        isins: list,
+        venue: VENUE = None,
+        max_workers: int = PAGINATION_MAX_WORKERS,
+    ) -> 'pd.DataFrame':
+        """Get the latest quotes of many instruments (see MarketData.latest_quotes)."""
+        results = await self._latest_batch('/quotes/latest', isins, venue, max_workers)
+        return self._market._frame(results, QUOTE_SCHEMA, index='isin')
+
+    async def latest_trades(
+        self,
+        isins: list,
+        venue: VENUE = None,
+        max_workers: int = PAGINATION_MAX_WORKERS,
+    ) -> 'pd.DataFrame':
+        """Get the latest trades of many instruments (see MarketData.latest_trades)."""
+        results = await self._latest_batch('/trades/latest', isins, venue, max_workers)
+        return self._market._frame(results, TRADE_SCHEMA, index='isin')
+
+    async def _latest_batch(
+        self, endpoint: str, isins: list, venue: VENUE, max_workers: int
+    ) -> list:
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def fetch(chunk: list) -> list:
+            async with semaphore:
+                return await _data(
+                    endpoint,
+                    url_params={
+                        'decimals': 'false',
+                        'isin': chunk,
+                        'mic': str(venue) if venue is not None else None,
+                    },
+                )
+
+        chunks = await asyncio.gather(
+            *[
+                fetch(isins[i : i + LATEST_MAX_ISINS])
+                for i in range(0, len(isins), LATEST_MAX_ISINS)
+            ]
+        )
+        return [item for results in chunks for item in results]
+
+    async def ohlc(
+        self,
+        isin: str,
+        start: datetime,
+        end: datetime,
+        timespan: TIMESPAN,
+        venue: VENUE = None,
+        sorting: SORT = None,
+        page_size: int = None,
+        max_workers: int = PAGINATION_MAX_WORKERS,
+        progress=None,
+    ) -> 'pd.DataFrame':
+        """OHLC data of a specific instrument (see MarketData.ohlc)."""
+        windows = _ohlc_windows(start, end, timespan)
+        if len(windows) == 1:
+            results = await self._ohlc_results(
+                isin, start, end, timespan, venue, sorting, page_size
+            )
+            if progress is not None:
+                progress(1, 1)
+            return self._market._frame(results, OHLC_SCHEMA)
+
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+        done = 0
+
+        async def fetch(window_start: datetime, window_end: datetime) -> list:
+            nonlocal done
+            async with semaphore:
+                results = await self._ohlc_results(
+                    isin, window_start, window_end, timespan, venue, None, page_size
+                )
+            done += 1
+            if progress is not None:
+                progress(done, len(windows))
+            return results
+
+        chunks = await asyncio.gather(*[fetch(*window) for window in windows])
+        return self._market._frame(_merge_windows(chunks, sorting), OHLC_SCHEMA)
+
+    async def _ohlc_results(
+        self,
+        isin: str,
+        start: datetime,
+        end: datetime,
+        timespan: TIMESPAN,
+        venue: VENUE,
+        sorting: SORT,
+        page_size: int,
+    ) -> list:
+        return await _data(
+            f'/ohlc/{str(timespan)}1/',
+            url_params=MarketData._ohlc_params(isin, start, end, venue, sorting),
+            page_size=page_size,
+        )
+
+
+async def _results(**kwargs):
+    """Await an AsyncApiRequest and return the results of its response.
+
+    Raises:
+            LemonMarketError: if lemon.markets returns an error
+    """
+    response = (await AsyncApiRequest(**kwargs)).response
+    if response.get('status') != 'ok' and 'results' not in response:
+        raise LemonMarketError(response['error_code'], response['error_message'])
+    return response.get('results')
+
+
+async def _data(endpoint: str, **kwargs):
+    """Results of a GET request to the market data API."""
+    return await _results(
+        type='data', endpoint=endpoint, authorization_token=Account().token, **kwargs
+    )
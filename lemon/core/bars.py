@@ -0,0 +1,268 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from lemon.common.enums import TIMESPAN, VENUE
+from lemon.common.frames import OHLC_SCHEMA, build_frame
+from lemon.common.helpers import to_millis
+from lemon.common.settings import BAR_HISTORY, BAR_LATENESS
+from lemon.core.market import MarketData
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Length of a bar in milliseconds by timespan
+TIMESPAN_MILLIS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000}
+# Values of a bar besides isin, t and mic
+BAR_FIELDS = ('o', 'h', 'l', 'c', 'v', 'pbv')
+
+
+class BarAggregator:
+    """Builds OHLC bars locally from trades or quotes instead of polling MarketData.ohlc.
+
+    Trades (p, v, pbv) update the prices of their bar and add to its volume,
+    quotes (b, a) update the prices with their mid and add no volume. Bars are kept
+    per ISIN and venue (mic) and have the keys of the results of MarketData.ohlc.
+
+    A bar is closed and emitted to the on_bar callbacks once the watermark passed
+    its end. The watermark follows the latest tick time minus lateness, so ticks
+    arriving up to lateness seconds out of order still count for their bar. Ticks
+    of bars that were already closed are dropped and counted in late. Intervals
+    without ticks produce no bar, like in the results of MarketData.ohlc.
+
+    Example:
+            bars = BarAggregator(TIMESPAN.MINUTE)
+            bars.backfill(['US0378331005'])
+            bars.on_bar(lambda bar: print(bar['t'], bar['c']))
+            stream.on_quote(bars.add)
+            # Close the bars of quiet instruments too
+            bars.advance()
+
+    Args:
+            timespan: Length of a bar
+            lateness: Seconds ticks may arrive out of order
+            history: Number of closed bars kept per ISIN and venue
+
+    Attributes:
+            late: Number of ticks dropped because their bar was already closed
+    """
+
+    def __init__(
+        self,
+        timespan: TIMESPAN = TIMESPAN.MINUTE,
+        lateness: float = BAR_LATENESS,
+        history: int = BAR_HISTORY,
+    ) -> None:
+        self.timespan = timespan
+        self.lateness = lateness
+        self.history = history
+        self.late = 0
+        self._span = TIMESPAN_MILLIS[str(timespan)]
+        self._lateness = int(lateness * 1000)
+        self._lock = threading.Lock()
+        self._watermark = None
+        self._next_close = None
+        # (isin, mic) -> {bar start: [o, h, l, c, v, pbv, first t, last t]}
+        self._open = {}
+        self._closed = {}
+        self._callbacks = {None: []}
+
+    def add(self, tick: dict) -> list:
+        """Add a trade or quote, e.g. from lemon.core.stream.QuoteStream.
+
+        Args:
+                tick: Trade with isin, p, v, t and optionally pbv and mic, or quote with isin, b, a, t and optionally mic
+
+        Returns:
+                list: Bars closed by this tick
+        """
+        t = to_millis(tick['t'])
+        if 'p' in tick:
+            price = tick['p']
+            volume = tick.get('v') or 0
+            pbv = tick.get('pbv')
+            if pbv is None:
+                pbv = price * volume
+        else:
+            price = (tick['b'] + tick['a']) // 2
+            volume = pbv = 0
+        start = t - t % self._span
+
+        with self._lock:
+            if self._watermark is not None and start + self._span <= self._watermark:
+                self.late += 1
+                logger.debug('Dropped late tick of %s at %s', tick['isin'], tick['t'])
+                return []
+
+            bars = self._open.setdefault((tick['isin'], tick.get('mic')), {})
+            bar = bars.get(start)
+            if bar is None:
+                bars[start] = [price, price, price, price, volume, pbv, t, t]
+                if self._next_close is None or start + self._span < self._next_close:
+                    self._next_close = start + self._span
+            else:
+                if price > bar[1]:
+                    bar[1] = price
+                if price < bar[2]:
+                    bar[2] = price
+                if t < bar[6]:
+                    bar[0], bar[6] = price, t
+                if t >= bar[7]:
+                    bar[3], bar[7] = price, t
+                bar[4] += volume
+                bar[5] += pbv
+            closed = self._advance(t - self._lateness)
+        self._emit(closed)
+        return closed
+
+    def advance(self, now: datetime = None) -> list:
+        """Move the watermark by the clock and close the bars that ended.
+
+        Call it regularly, bars of instruments without ticks are only closed by
+        ticks of other instruments otherwise.
+
+        Args:
+                now: Current time, datetime.now() if None
+
+        Returns:
+                list: Bars closed
+        """
+        now = now if now is not None else datetime.now(timezone.utc)
+        with self._lock:
+            closed = self._advance(to_millis(now) - self._lateness)
+        self._emit(closed)
+        return closed
+
+    def flush(self) -> list:
+        """Close all open bars, e.g. before shutting down.
+
+        Returns:
+                list: Bars closed
+        """
+        with self._lock:
+            starts = [start for bars in self._open.values() for start in bars]
+            closed = self._advance(max(starts) + self._span) if starts else []
+        self._emit(closed)
+        return closed
+
+    def on_bar(self, callback, isin: str = None) -> None:
+        """Register a function called with every closed bar.
+
+        Args:
+                callback: Called as callback(bar), bar is a dict like the results of MarketData.ohlc
+                isin: Only call it with bars of this instrument, with all bars if None
+        """
+        with self._lock:
+            self._callbacks[isin] = self._callbacks.get(isin, []) + [callback]
+
+    def bars(self, isin: str = None, raw: bool = False) -> 'pd.DataFrame':
+        """Closed bars, oldest first.
+
+        Args:
+                isin: Only bars of this instrument, all bars if None
+                raw: Return a list of dicts instead of a DataFrame
+
+        Returns:
+                pandas.DataFrame: Bars in the same shape as MarketData.ohlc
+        """
+        with self._lock:
+            bars = [
+                bar
+                for key, closed in self._closed.items()
+                if isin is None or key[0] == isin
+                for bar in closed
+            ]
+        bars.sort(key=lambda bar: bar['t'])
+        if raw:
+            return [dict(bar) for bar in bars]
+        return build_frame(bars, OHLC_SCHEMA)
+
+    def backfill(self, isins, start: datetime = None, venue: VENUE = None) -> None:
+        """Load the bars since start from lemon.markets, so the history has no hole.
+
+        The bar in progress is continued with the following ticks.
+
+        Args:
+                isins: ISIN or list of ISINs
+                start: Load bars from this time on, the last history bars if None
+                venue: Venue of the bars, the default venue of MarketData.ohlc if None
+
+        Raises:
+                LemonMarketError: if lemon.markets returns an error
+        """
+        now = datetime.now(timezone.utc)
+        if start is None:
+            start = now - timedelta(milliseconds=self._span * self.history)
+        market = MarketData(raw=True)
+        for isin in [isins] if isinstance(isins, str) else isins:
+            results = market.ohlc(isin, start, now, self.timespan, venue)
+            self._load(results, to_millis(now))
+
+    def _load(self, results: list, now: int) -> None:
+        # Bars ending within the lateness may still get ticks, so they stay open
+        # like the ones built from ticks
+        watermark = now - self._lateness
+        with self._lock:
+            for result in sorted(results, key=lambda result: to_millis(result['t'])):
+                key = (result['isin'], result.get('mic'))
+                start = to_millis(result['t'])
+                values = [result[field] for field in BAR_FIELDS]
+                if start + self._span <= watermark:
+                    closed = self._closed.setdefault(key, deque(maxlen=self.history))
+                    if not closed or to_millis(closed[-1]['t']) < start:
+                        closed.append(_bar(key, start, values))
+                else:
+                    self._open.setdefault(key, {})[start] = values + [start, start]
+                    if (
+                        self._next_close is None
+                        or start + self._span < self._next_close
+                    ):
+                        self._next_close = start + self._span
+            if self._watermark is None or watermark > self._watermark:
+                self._watermark = watermark
+
+    def _advance(self, watermark: int) -> list:
+        """Raise the watermark and close the bars that ended before it."""
+        if self._watermark is None or watermark > self._watermark:
+            self._watermark = watermark
+        if self._next_close is None or self._next_close > self._watermark:
+            return []
+
+        closed = []
+        next_close = None
+        for key, bars in self._open.items():
+            for start in [s for s in bars if s + self._span <= self._watermark]:
+                bar = _bar(key, start, bars.pop(start))
+                self._closed.setdefault(key, deque(maxlen=self.history)).append(bar)
+                closed.append(bar)
+            for start in bars:
+                if next_close is None or start + self._span < next_close:
+                    next_close = start + self._span
+        self._next_close = next_close
+        closed.sort(key=lambda bar: bar['t'])
+        return closed
+
+    def _emit(self, closed: list) -> None:
+        for bar in closed:
+            for callbacks in (
+                self._callbacks[None],
+                self._callbacks.get(bar['isin'], ()),
+            ):
+                for callback in callbacks:
+                    try:
+                        callback(bar)
+                    except Exception:
+                        logger.exception('Bar callback of %s failed', bar['isin'])
+
+
+def _bar(key: tuple, start: int, values: list) -> dict:
+    """Closed bar of an instrument and venue as dict like the results of MarketData.ohlc."""
+    bar = {'isin': key[0]}
+    bar.update(zip(BAR_FIELDS, values))
+    bar['t'] = datetime.fromtimestamp(start / 1000, tz=timezone.utc)
+    bar['mic'] = key[1]
+    return bar
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lemon.core.orders import Order
+
+
+@dataclass
+class OrderResult:
+    """Outcome for one order of a bulk operation like Account.place_orders.
+
+    Attributes:
+            order_id: ID of the order, None if a draft couldn't be placed
+            order: The order, None if only its ID was given
+            error: Exception raised for this order, None if it succeeded
+            seconds: Time the requests of this order took
+    """
+
+    order_id: str = None
+    order: 'Order' = None
+    error: Exception = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def run_bulk(action, items: list, max_concurrency: int) -> list:
+    """Apply action to every order concurrently, failures don't abort the others.
+
+    Args:
+            action: Called with each item, performs the requests of one order
+            items: Orders or order IDs
+            max_concurrency: Maximum number of orders processed at the same time
+
+    Returns:
+            list: One OrderResult per item, in the order of items
+    """
+
+    def run(item) -> OrderResult:
+        result = _result(item)
+        started = time.perf_counter()
+        try:
+            action(item)
+        except Exception as e:
+            result.error = e
+        return _finish(result, started)
+
+    if not items:
+        return []
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_concurrency, len(items))),
+        thread_name_prefix='lemon-bulk',
+    ) as executor:
+        return list(executor.map(run, items))
+
+
+async def run_bulk_async(action, items: list, max_concurrency: int) -> list:
+    """Await action for every order concurrently, like run_bulk on the event loop.
+
+    Args:
+            action: Coroutine function called with each item, performs the requests of one order
+            items: Orders or order IDs
+            max_concurrency: Maximum number of orders processed at the same time
+
+    Returns:
+            list: One OrderResult per item, in the order of items
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(item) -> OrderResult:
+        result = _result(item)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await action(item)
+            except Exception as e:
+                result.error = e
+        return _finish(result, started)
+
+    return list(await asyncio.gather(*[run(item) for item in items]))
+
+
+def _result(item) -> OrderResult:
+    # Imported here, lemon.core.orders imports this module through lemon.core.account
+    from lemon.core.orders import Order
+
+    if isinstance(item, Order):
+        return OrderResult(order=item)
+    return OrderResult(order_id=item)
+
+
+def _finish(result: OrderResult, started: float) -> OrderResult:
+    result.seconds = time.perf_counter() - started
+    if result.order is not None:
+        result.order_id = result.order._id
+    return result
@@ -1,13 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import pandas as pd
+from typing import TYPE_CHECKING
+
 from lemon.common.enums import INSTRUMENT_TYPE, SORT, TIMESPAN, VENUE
 from lemon.common.errors import LemonMarketError
+from lemon.common.frames import (
+    INSTRUMENT_SCHEMA,
+    OHLC_SCHEMA,
+    QUOTE_SCHEMA,
+    TRADE_SCHEMA,
+    VENUE_SCHEMA,
+    build_frame,
+)
 from lemon.common.requests import ApiRequest
+from lemon.common.settings import (
+    LATEST_MAX_ISINS,
+    OHLC_WINDOWS,
+    PAGINATION_MAX_WORKERS,
+)
 from lemon.core.account import Account
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class MarketData(object):
-    """Client to fetch Market Data via the lemon.markets API."""
+    """Client to fetch Market Data via the lemon.markets API.
+
+    Args:
+        raw: Return plain lists of result dicts instead of DataFrames, so pandas is never imported
+    """
+
+    def __init__(self, raw: bool = False) -> None:
+        self.raw = raw
 
     def search_instrument(
         self,
@@ -17,7 +42,8 @@ class MarketData(object):
         venue: VENUE = None,
         currency: str = None,
         tradable: bool = None,
-    ) -> pd.DataFrame:
+        page_size: int = None,
+    ) -> 'pd.DataFrame':
         """Searching for instrument
 
         Args:
@@ -27,34 +53,101 @@ class MarketData(object):
             venue: Enter a Venue or a Market Identifier Code (MIC). Default is XMUN.
             currency: ISO currency code to see instruments traded in a specific currency
             tradeable: Filter for tradable or non-tradable Instruments with true or false
+            page_size: Number of instruments fetched per page
 
         Raises:
             LemonMarketError: if lemon.markets returns an error
         """
-        params = {
-            'search': search,
-            'isin': isin,
-            'type': str(itype) if itype is not None else None,
-            'venue': str(venue) if venue is not None else None,
-            'currency': currency,
-            'tradable': tradable,
-        }
-
         request = ApiRequest(
             type='data',
             endpoint='/instruments/',
-            url_params=params,
+            url_params=self._instrument_params(
+                search, isin, itype, venue, currency, tradable
+            ),
             method='GET',
+            page_size=page_size,
             authorization_token=Account().token,
         )
         if 'results' in request.response:
-            return pd.DataFrame(request.response['results'])
+            return self._frame(request.response['results'], INSTRUMENT_SCHEMA)
         else:
             raise LemonMarketError(
                 request.response['error_code'], request.response['error_message']
             )
 
-    def trading_venues(self, venue: VENUE = None) -> pd.DataFrame:
+    def iter_instruments(
+        self,
+        search: str = None,
+        isin: str = None,
+        itype: INSTRUMENT_TYPE = None,
+        venue: VENUE = None,
+        currency: str = None,
+        tradable: bool = None,
+        page_size: int = None,
+        chunked: bool = False,
+    ):
+        """Iterate over the instruments matching the search while they are fetched page by page.
+
+        Following pages are only requested when the iteration reaches them, so stopping
+        early saves requests and the instrument universe never has to be kept in memory.
+
+        Args:
+            search: Use this query parameter to search for Name/Title, ISIN, WKN or symbol. You can also perform a partial search by only specifiying the first 4 symbols.
+            isin: Specify the ISIN you are interested in. You can also specify multiple ISINs. Maximum 10 ISINs per Request.
+            type: Use this query parameter to specify the type of instrument you want to filter for, e.g. ORDERTYPE.STOCK, ORDERTYP.ETF
+            venue: Enter a Venue or a Market Identifier Code (MIC). Default is XMUN.
+            currency: ISO currency code to see instruments traded in a specific currency
+            tradeable: Filter for tradable or non-tradable Instruments with true or false
+            page_size: Number of instruments fetched per page
+            chunked: Yield the list of instruments of each page instead of single ones
+
+        Yields:
+            dict: Instrument, or a list of them if chunked
+
+        Raises:
+            LemonMarketError: if lemon.markets returns an error
+        """
+        request = ApiRequest(
+            type='data',
+            endpoint='/instruments/',
+            url_params=self._instrument_params(
+                search, isin, itype, venue, currency, tradable
+            ),
+            method='GET',
+            page_size=page_size,
+            paginate=False,
+            authorization_token=Account().token,
+        )
+        if 'results' not in request.response:
+            raise LemonMarketError(
+                request.response['error_code'], request.response['error_message']
+            )
+
+        for page in request.iter_pages():
+            if chunked:
+                yield page
+            else:
+                yield from page
+
+    @staticmethod
+    def _instrument_params(
+        search: str,
+        isin: str,
+        itype: INSTRUMENT_TYPE,
+        venue: VENUE,
+        currency: str,
+        tradable: bool,
+    ) -> dict:
+        return {
+            'search': search,
+            'isin': isin,
+            'type': str(itype) if itype is not None else None,
+            'venue': str(venue) if venue is not None else None,
+            'currency': currency,
+            'tradable': tradable,
+        }
+
+    def trading_venues(self, venue: VENUE = None) -> 'pd.DataFrame':
         """List all available Trading Venues
 
         Args:
@@ -81,7 +174,7 @@ class MarketData(object):
         )
 
         if 'results' in request.response:
-            return pd.DataFrame(request.response['results'])
+            return self._frame(request.response['results'], VENUE_SCHEMA)
         else:
             raise LemonMarketError(
                 request.response['error_code'], request.response['error_message']
@@ -151,6 +244,95 @@ class MarketData(object):
                 request.response['error_code'], request.response['error_message']
             )
 
+    def latest_quotes(
+        self,
+        isins: list,
+        venue: VENUE = None,
+        max_workers: int = PAGINATION_MAX_WORKERS,
+    ) -> 'pd.DataFrame':
+        """Get the latest quotes of many instruments.
+
+        The ISINs are requested in chunks of the maximum number of ISINs the API
+        accepts per request, the chunks are fetched concurrently.
+
+        Args:
+            isins: The International Securities Identification Numbers of the instruments
+            venue: Market Identifier Code of the trading venue.
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            pandas.DataFrame: The latest Quotes indexed by ISIN, see latest_quote()
+
+        Raises:
+            LemonMarketError: if lemon.markets returns an error
+        """
+        results = self._latest_batch('/quotes/latest', isins, venue, max_workers)
+        return self._frame(results, QUOTE_SCHEMA, index='isin')
+
+    def latest_trades(
+        self,
+        isins: list,
+        venue: VENUE = None,
+        max_workers: int = PAGINATION_MAX_WORKERS,
+    ) -> 'pd.DataFrame':
+        """Get the latest trades of many instruments.
+
+        The ISINs are requested in chunks of the maximum number of ISINs the API
+        accepts per request, the chunks are fetched concurrently.
+
+        Args:
+            isins: The International Securities Identification Numbers of the instruments
+            venue: Market Identifier Code of the trading venue.
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            pandas.DataFrame: The latest Trades indexed by ISIN, see latest_trade()
+
+        Raises:
+            LemonMarketError: if lemon.markets returns an error
+        """
+        results = self._latest_batch('/trades/latest', isins, venue, max_workers)
+        return self._frame(results, TRADE_SCHEMA, index='isin')
+
+    def _frame(self, results: list, schema: dict, index: str = None):
+        if self.raw:
+            return results
+        frame = build_frame(results, schema)
+        return frame.set_index(index) if index is not None else frame
+
+    def _latest_batch(
+        self, endpoint: str, isins: list, venue: VENUE, max_workers: int
+    ) -> list:
+        token = Account().token
+        chunks = [
+            isins[i : i + LATEST_MAX_ISINS]
+            for i in range(0, len(isins), LATEST_MAX_ISINS)
+        ]
+
+        def fetch(chunk: list) -> list:
+            request = ApiRequest(
+                type='data',
+                endpoint=endpoint,
+                url_params={
+                    'decimals': 'false',
+                    'isin': chunk,
+                    'mic': str(venue) if venue is not None else None,
+                },
+                method='GET',
+                authorization_token=token,
+            )
+            if 'results' in request.response:
+                return request.response['results']
+            else:
+                raise LemonMarketError(
+                    request.response['error_code'], request.response['error_message']
+                )
+
+        if not chunks:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            return [item for results in executor.map(fetch, chunks) for item in results]
+
     def ohlc(
         self,
         isin: str,
@@ -159,9 +341,15 @@ class MarketData(object):
         timespan: TIMESPAN,
         venue: VENUE = None,
         sorting: SORT = None,
-    ) -> pd.DataFrame:
+        page_size: int = None,
+        max_workers: int = PAGINATION_MAX_WORKERS,
+        progress=None,
+    ) -> 'pd.DataFrame':
         """OHLC data of a specific instrument.
 
+        Long ranges are split into windows of OHLC_WINDOWS for the timespan, which are
+        fetched concurrently, merged in timestamp order and de-duplicated at the boundaries.
+
         Args:
             isin: The International Securities Identification Number of the instrument
             start: Specify an ISO date string (YYYY-MM-DD) to get data from a specific date on.
@@ -169,6 +357,9 @@ class MarketData(object):
             timespan: Timespan of one OHLC Entry.
             venue:  Enter a venue or a Market Identifier Code (MIC) in there.
             sorting: Sort your API response, either ascending (asc) or descending (desc)
+            page_size: Number of OHLC entries fetched per page
+            max_workers: Maximum number of windows fetched concurrently
+            progress: Called as progress(done, total) whenever a window was fetched
 
         Raises:
             ValueError: Invalid Parameter specified
@@ -187,25 +378,151 @@ class MarketData(object):
                 mic: Market Identifier Code of Trading Venue the OHLC data occured at
 
         """
-        payload = {
-            'isin': isin,
-            'from': start.isoformat() if start is not None else None,
-            'to': end.isoformat() if start is not None else None,
-            'mic': str(venue) if venue is not None else None,
-            'sorting': str(sorting) if sorting is not None else None,
-        }
+        windows = _ohlc_windows(start, end, timespan)
+        if len(windows) == 1:
+            results = self._ohlc_results(
+                isin, start, end, timespan, venue, sorting, page_size
+            )
+            if progress is not None:
+                progress(1, 1)
+            return self._frame(results, OHLC_SCHEMA)
+
+        chunks = [None] * len(windows)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as executor:
+            futures = {
+                executor.submit(
+                    self._ohlc_results,
+                    isin,
+                    window_start,
+                    window_end,
+                    timespan,
+                    venue,
+                    None,
+                    page_size,
+                ): i
+                for i, (window_start, window_end) in enumerate(windows)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                chunks[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done, len(windows))
+
+        return self._frame(_merge_windows(chunks, sorting), OHLC_SCHEMA)
 
+    def _ohlc_results(
+        self,
+        isin: str,
+        start: datetime,
+        end: datetime,
+        timespan: TIMESPAN,
+        venue: VENUE,
+        sorting: SORT,
+        page_size: int,
+    ) -> list:
         request = ApiRequest(
             type='data',
             endpoint=f'/ohlc/{str(timespan)}1/',
-            url_params=payload,
+            url_params=self._ohlc_params(isin, start, end, venue, sorting),
             method='GET',
+            page_size=page_size,
             authorization_token=Account().token,
         )
 
         if 'results' in request.response:
-            return pd.DataFrame(request.response['results'])
+            return request.response['results']
         else:
             raise LemonMarketError(
                 request.response['error_code'], request.response['error_message']
             )
+
+    def iter_ohlc(
+        self,
+        isin: str,
+        start: datetime,
+        end: datetime,
+        timespan: TIMESPAN,
+        venue: VENUE = None,
+        sorting: SORT = None,
+        page_size: int = None,
+        chunked: bool = False,
+    ):
+        """Iterate over the OHLC data of a specific instrument while it is fetched page by page.
+
+        Following pages are only requested when the iteration reaches them, so stopping
+        early saves requests and long ranges never have to be kept in memory.
+
+        Args:
+            isin: The International Securities Identification Number of the instrument
+            start: Specify an ISO date string (YYYY-MM-DD) to get data from a specific date on.
+            end: Specify an ISO date string (YYYY-MM-DD) to get only data until a specific date.
+            timespan: Timespan of one OHLC Entry.
+            venue:  Enter a venue or a Market Identifier Code (MIC) in there.
+            sorting: Sort your API response, either ascending (asc) or descending (desc)
+            page_size: Number of OHLC entries fetched per page
+            chunked: Yield the list of OHLC entries of each page instead of single ones
+
+        Yields:
+            dict: OHLC entry (see ohlc()), or a list of them if chunked
+
+        Raises:
+            LemonMarketError: if lemon.markets returns an error
+        """
+        request = ApiRequest(
+            type='data',
+            endpoint=f'/ohlc/{str(timespan)}1/',
+            url_params=self._ohlc_params(isin, start, end, venue, sorting),
+            method='GET',
+            page_size=page_size,
+            paginate=False,
+            authorization_token=Account().token,
+        )
+        if 'results' not in request.response:
+            raise LemonMarketError(
+                request.response['error_code'], request.response['error_message']
+            )
+
+        for page in request.iter_pages():
+            if chunked:
+                yield page
+            else:
+                yield from page
+
+    @staticmethod
+    def _ohlc_params(
+        isin: str, start: datetime, end: datetime, venue: VENUE, sorting: SORT
+    ) -> dict:
+        return {
+            'isin': isin,
+            'decimals': 'false',
+            'from': start.isoformat() if start is not None else None,
+            'to': end.isoformat() if end is not None else None,
+            'mic': str(venue) if venue is not None else None,
+            'sorting': str(sorting) if sorting is not None else None,
+        }
+
+
+def _ohlc_windows(start: datetime, end: datetime, timespan: TIMESPAN) -> list:
+    """Split a time range into consecutive windows of OHLC_WINDOWS[timespan]."""
+    window = OHLC_WINDOWS.get(str(timespan))
+    if start is None or end is None or window is None or end - start <= window:
+        return [(start, end)]
+
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+
+def _merge_windows(chunks: list, sorting: SORT) -> list:
+    """Merge the OHLC results of consecutive windows in timestamp order."""
+    # Bars at the boundary of two windows are returned by both
+    results = {}
+    for chunk in chunks:
+        for bar in chunk:
+            results[bar['t']] = bar
+    return sorted(
+        results.values(),
+        key=lambda bar: bar['t'],
+        reverse=sorting == SORT.DESCENDING,
+    )
@@ -0,0 +1,235 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+from lemon.common.enums import TIMESPAN, VENUE
+from lemon.common.frames import OHLC_SCHEMA, build_frame
+from lemon.common.helpers import to_millis
+from lemon.common.settings import OHLC_STORE_PATH
+from lemon.core.market import MarketData
+
+OHLC_COLUMNS = ['isin', 'o', 'h', 'l', 'c', 'v', 'pbv', 't', 'mic']
+
+
+class OHLCStore:
+    """Persistent on-disk cache of OHLC data with gap filling.
+
+    Stores the bars of every ISIN, venue and timespan in a SQLite database and
+    records which time ranges it already holds. ohlc() only requests the missing
+    sub-ranges from lemon.markets and reads everything else from disk.
+
+    The period that is still in progress is never recorded as held, so its bar is
+    requested again until it is complete.
+
+    Args:
+            path: File of the SQLite database. Defaults to OHLC_STORE_PATH
+    """
+
+    def __init__(self, path: str = OHLC_STORE_PATH) -> None:
+        path = os.path.expanduser(path)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS bars ('
+                'isin TEXT, mic TEXT, timespan TEXT, t INTEGER, '
+                'o INTEGER, h INTEGER, l INTEGER, c INTEGER, v INTEGER, pbv INTEGER, '
+                'PRIMARY KEY (isin, mic, timespan, t))'
+            )
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS coverage ('
+                'isin TEXT, mic TEXT, timespan TEXT, start INTEGER, end INTEGER)'
+            )
+
+    def ohlc(
+        self,
+        isin: str,
+        start: datetime,
+        end: datetime,
+        timespan: TIMESPAN,
+        venue: VENUE = None,
+    ) -> pd.DataFrame:
+        """OHLC data of a specific instrument, fetching only ranges not stored yet.
+
+        Args:
+            isin: The International Securities Identification Number of the instrument
+            start: Get data from this datetime on. Naive datetimes are treated as UTC.
+            end: Get only data until this datetime. Naive datetimes are treated as UTC.
+            timespan: Timespan of one OHLC Entry.
+            venue: Enter a venue or a Market Identifier Code (MIC) in there. Default is XMUN.
+
+        Raises:
+            LemonMarketError: if lemon.markets returns an error
+
+        Returns:
+            pandas.DataFrame: Dataframe containing OHLC-Data in ascending order, see MarketData.ohlc
+        """
+        for gap_start, gap_end in self.missing(isin, start, end, timespan, venue):
+            bars = MarketData().ohlc(
+                isin=isin,
+                start=_from_ms(gap_start),
+                end=_from_ms(gap_end),
+                timespan=timespan,
+                venue=venue,
+            )
+            self.insert(bars, timespan)
+            # The current period is still in progress, its bar isn't final yet
+            held_until = min(gap_end, to_millis(_period_start(timespan)) - 1)
+            if held_until >= gap_start:
+                self._add_coverage(isin, timespan, venue, gap_start, held_until)
+
+        return self.load(isin, start, end, timespan, venue)
+
+    def missing(
+        self,
+        isin: str,
+        start: datetime,
+        end: datetime,
+        timespan: TIMESPAN,
+        venue: VENUE = None,
+    ) -> list:
+        """Time ranges of the request that are not stored yet.
+
+        Returns:
+            list: (start, end) tuples in milliseconds since epoch
+        """
+        start, end = to_millis(start), to_millis(end)
+        gaps = []
+        for covered_start, covered_end in self._coverage(isin, timespan, venue):
+            if covered_end < start:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > start:
+                gaps.append((start, covered_start - 1))
+            start = max(start, covered_end + 1)
+        if start <= end:
+            gaps.append((start, end))
+        return gaps
+
+    def load(
+        self,
+        isin: str,
+        start: datetime,
+        end: datetime,
+        timespan: TIMESPAN,
+        venue: VENUE = None,
+    ) -> pd.DataFrame:
+        """Read stored OHLC data without requesting anything.
+
+        Returns:
+            pandas.DataFrame: Dataframe containing OHLC-Data in ascending order, see MarketData.ohlc
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT isin, o, h, l, c, v, pbv, t, mic FROM bars '
+                'WHERE isin = ? AND mic = ? AND timespan = ? AND t BETWEEN ? AND ? '
+                'ORDER BY t',
+                (isin, _mic(venue), str(timespan), to_millis(start), to_millis(end)),
+            ).fetchall()
+
+        # t is stored in milliseconds, converted for the whole column at once
+        bars = build_frame(
+            [dict(zip(OHLC_COLUMNS, row)) for row in rows], dict(OHLC_SCHEMA, t='int')
+        )
+        bars['t'] = pd.to_datetime(bars['t'], unit='ms', utc=True)
+        return bars
+
+    def insert(self, bars: pd.DataFrame, timespan: TIMESPAN) -> None:
+        """Store OHLC data as returned by MarketData.ohlc. Existing bars are replaced.
+
+        Args:
+            bars: OHLC-Data
+            timespan: Timespan of one OHLC Entry.
+        """
+        if len(bars) == 0:
+            return
+        rows = [
+            (
+                bar['isin'],
+                str(bar['mic']).upper(),
+                str(timespan),
+                to_millis(bar['t']),
+            )
+            + tuple(_native(bar[k]) for k in ('o', 'h', 'l', 'c', 'v', 'pbv'))
+            for bar in bars.to_dict('records')
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+
+    def clear(self, isin: str = None) -> None:
+        """Delete stored data.
+
+        Args:
+            isin: Only delete data of this instrument, delete everything if None
+        """
+        with self._lock, self._db:
+            for table in ('bars', 'coverage'):
+                if isin is None:
+                    self._db.execute(f'DELETE FROM {table}')
+                else:
+                    self._db.execute(f'DELETE FROM {table} WHERE isin = ?', (isin,))
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _coverage(self, isin: str, timespan: TIMESPAN, venue: VENUE) -> list:
+        with self._lock:
+            return self._db.execute(
+                'SELECT start, end FROM coverage '
+                'WHERE isin = ? AND mic = ? AND timespan = ? ORDER BY start',
+                (isin, _mic(venue), str(timespan)),
+            ).fetchall()
+
+    def _add_coverage(
+        self, isin: str, timespan: TIMESPAN, venue: VENUE, start: int, end: int
+    ) -> None:
+        """Record a held time range, merged with overlapping or adjacent ones."""
+        key = (isin, _mic(venue), str(timespan))
+        with self._lock, self._db:
+            merged = self._db.execute(
+                'SELECT start, end FROM coverage '
+                'WHERE isin = ? AND mic = ? AND timespan = ? AND start <= ? AND end >= ?',
+                key + (end + 1, start - 1),
+            ).fetchall()
+            for covered_start, covered_end in merged:
+                start = min(start, covered_start)
+                end = max(end, covered_end)
+            self._db.execute(
+                'DELETE FROM coverage '
+                'WHERE isin = ? AND mic = ? AND timespan = ? AND start >= ? AND end <= ?',
+                key + (start, end),
+            )
+            self._db.execute(
+                'INSERT INTO coverage VALUES (?, ?, ?, ?, ?)', key + (start, end)
+            )
+
+
+def _mic(venue: VENUE) -> str:
+    return str(venue).upper() if venue is not None else str(VENUE.GETTEX)
+
+
+def _native(value):
+    """Python scalar of a numpy scalar, which sqlite3 can't bind."""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _from_ms(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+
+
+def _period_start(timespan: TIMESPAN, now: datetime = None) -> datetime:
+    """Start of the period of the given timespan that is currently in progress."""
+    now = now if now is not None else datetime.now(timezone.utc)
+    if timespan == TIMESPAN.MINUTE:
+        return now.replace(second=0, microsecond=0)
+    if timespan == TIMESPAN.HOUR:
+        return now.replace(minute=0, second=0, microsecond=0)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
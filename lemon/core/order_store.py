@@ -0,0 +1,180 @@
+import threading
+from datetime import datetime
+
+from lemon.common.enums import ORDERSIDE, ORDERSTATUS
+from lemon.core.account import Account
+from lemon.core.orders import FINAL_STATUSES, Order
+
+
+class OrderStore:
+    """In-memory copy of the orders of the account, indexed for fast lookups.
+
+    Orders are indexed by ID, ISIN, status and side, and the open notional of every
+    ISIN is kept up to date whenever an order is added or changes, so risk checks
+    don't have to scan all orders.
+
+    sync() only lists the orders that can have changed since the last sync: orders
+    created after the oldest order that was still open. Orders in a final status
+    never change again, so older ones are skipped.
+
+    Example:
+            store = OrderStore()
+            store.sync()
+            store.find(isin='US0378331005', status=ORDERSTATUS.ACTIVATED)
+            store.open_notional('US0378331005', ORDERSIDE.BUY)
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._orders = {}
+        self._keys = {}
+        self._by_isin = {}
+        self._by_status = {}
+        self._by_side = {}
+        self._notional = {}
+        self._synced = False
+
+    def sync(self) -> list:
+        """Fetch orders created or changed since the last sync, everything the first time.
+
+        Returns:
+                list: Orders that were added or changed
+
+        Raises:
+                LemonMarketError: if lemon.markets returns an error
+        """
+        start = self._sync_start() if self._synced else None
+        stored = [self.add(order) for order in Account().orders(start=start)]
+        changed = [order for order in stored if order is not None]
+        self._synced = True
+        return changed
+
+    def add(self, order: Order) -> Order:
+        """Add an order or update the stored one with the same ID.
+
+        Stored Order objects are updated in place, so references to them stay valid.
+
+        Returns:
+                Order: The stored order, None if nothing changed
+        """
+        key = _key(order)
+        with self._lock:
+            stored = self._orders.get(order._id)
+            if stored is not None:
+                if stored is not order and _same(stored, order):
+                    return None
+                self._unindex(stored)
+                if stored is not order:
+                    stored._copy_from(order)
+            else:
+                stored = self._orders[order._id] = order
+            self._index(stored, key)
+            return stored
+
+    def remove(self, order_id: str) -> None:
+        """Remove an order from the store."""
+        with self._lock:
+            order = self._orders.pop(order_id, None)
+            if order is not None:
+                self._unindex(order)
+
+    def get(self, order_id: str) -> Order:
+        """The order with the ID, None if it isn't stored."""
+        return self._orders.get(order_id)
+
+    def find(
+        self, isin: str = None, status: ORDERSTATUS = None, side: ORDERSIDE = None
+    ) -> list:
+        """Stored orders matching all given filters.
+
+        Args:
+                isin: Only orders of this instrument
+                status: Only orders with this status
+                side: Only 'buy' or 'sell' orders
+        """
+        with self._lock:
+            indexes = [
+                index.get(str(value), set())
+                for index, value in (
+                    (self._by_isin, isin),
+                    (self._by_status, status),
+                    (self._by_side, side),
+                )
+                if value is not None
+            ]
+            if not indexes:
+                return list(self._orders.values())
+            ids = set.intersection(*sorted(indexes, key=len))
+            return [self._orders[order_id] for order_id in ids]
+
+    def open_notional(self, isin: str, side: ORDERSIDE = None) -> int:
+        """Value of the open orders of an instrument, quantity times limit or estimated price.
+
+        Args:
+                isin: The International Securities Identification Number of the instrument
+                side: Only orders of this side, both if None
+
+        Returns:
+                int: Notional in hundredths of a cent, e.g. 10000 means 1€
+        """
+        sides = (str(side),) if side is not None else ('buy', 'sell')
+        with self._lock:
+            return sum(self._notional.get((isin, s), 0) for s in sides)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._orders
+
+    def __iter__(self):
+        return iter(list(self._orders.values()))
+
+    def _sync_start(self) -> datetime:
+        with self._lock:
+            orders = list(self._orders.values())
+        created = [order._created_at for order in orders]
+        if not orders or None in created:
+            return None
+        open_created = [
+            order._created_at
+            for order in orders
+            if str(order._status) not in FINAL_STATUSES
+        ]
+        # The oldest open order or, if none is open, the newest order
+        return min(open_created) if open_created else max(created)
+
+    def _index(self, order: Order, key: tuple) -> None:
+        isin, status, side, notional = key
+        self._keys[order._id] = key
+        self._by_isin.setdefault(isin, set()).add(order._id)
+        self._by_status.setdefault(status, set()).add(order._id)
+        self._by_side.setdefault(side, set()).add(order._id)
+        if notional:
+            self._notional[isin, side] = self._notional.get((isin, side), 0) + notional
+
+    def _unindex(self, order: Order) -> None:
+        isin, status, side, notional = self._keys.pop(order._id)
+        self._by_isin[isin].discard(order._id)
+        self._by_status[status].discard(order._id)
+        self._by_side[side].discard(order._id)
+        if notional:
+            self._notional[isin, side] -= notional
+
+
+def _same(a: Order, b: Order) -> bool:
+    return all(getattr(a, slot) == getattr(b, slot) for slot in Order.__slots__)
+
+
+def _key(order: Order) -> tuple:
+    """Index keys of an order: ISIN, status, side and open notional."""
+    status = str(order._status)
+    notional = 0
+    if status not in FINAL_STATUSES:
+        price = (
+            order._limit_price
+            if order._limit_price is not None
+            else order._estimated_price
+        )
+        notional = (price or 0) * (order._quantity or 0)
+    return order._isin, status, str(order._side), notional
@@ -1,10 +1,66 @@
 import lemon.core.account as acc
 from lemon.common.enums import TRADING_TYPE, VENUE, ORDERSIDE, ORDERSTATUS, ORDERTYPE
 from lemon.common.errors import LemonMarketError, OrderStatusError
+from lemon.common.helpers import parse_datetime
 from lemon.common.requests import ApiRequest
 from datetime import datetime
 import json
-from typing import get_type_hints
+import uuid
+
+
+# Attributes of an Order and their types. Values returned by the API are decoded
+# by type, e.g. datetimes are parsed from ISO strings.
+ORDER_FIELDS = {
+    # Set by constructor / setters
+    'trading_type': str,
+    'isin': str,
+    'side': ORDERSIDE,
+    'quantity': int,
+    'venue': VENUE,
+    'stop_price': int,
+    'limit_price': int,
+    'notes': str,
+    'expires_at': datetime,
+    'idempotency': str,
+    # Returned by API
+    'status': ORDERSTATUS,
+    'id': str,
+    'regulatory_information': dict,
+    'estimated_price': int,
+    'estimated_price_total': int,
+    'created_at': datetime,
+    'charge': int,
+    'chargeable_at': datetime,
+    'isin_title': str,
+    'type': ORDERTYPE,
+    'executed_quantity': int,
+    'executed_price': int,
+    'executed_price_total': int,
+    'activated_at': datetime,
+    'executed_at': datetime,
+    'rejected_at': datetime,
+    'cancelled_at': datetime,
+    'key_creation_id': str,
+    'key_activation_id': str,
+}
+
+# Fields sent to POST /orders/
+_PLACE_FIELDS = (
+    'isin',
+    'expires_at',
+    'side',
+    'quantity',
+    'venue',
+    'stop_price',
+    'limit_price',
+    'notes',
+    'idempotency',
+)
+
+_MANDATORY_FIELDS = ('isin', 'expires_at', 'side', 'quantity', 'venue')
+
+# Statuses an order never leaves
+FINAL_STATUSES = ('executed', 'canceled', 'expired', 'rejected')
 
 
 class Order:
@@ -60,37 +116,7 @@ class Order:
 
     """
 
-    # Set by constructor / setters
-    _isin: str
-    _side: ORDERSIDE
-    _quantity: int
-    _venue: VENUE
-    _stop_price: int = None
-    _limit_price: int = None
-    _notes: str = None
-    _expires_at: datetime = None
-    _idempotency: str = None
-
-    # Returned by API
-    _status: ORDERSTATUS = None
-    _id: str = None
-    _regulatory_information: dict = None
-    _estimated_price: int = None
-    _estimated_price_total: int = None
-    _created_at: datetime = None
-    _charge: int = None
-    _chargeable_at: datetime = None
-    _isin_title: str = None
-    _type: ORDERTYPE = None
-    _executed_quantity: int = None
-    _executed_price: int = None
-    _executed_price_total: int = None
-    _activated_at: datetime = None
-    _executed_at: datetime = None
-    _rejected_at: datetime = None
-    _cancelled_at: datetime = None
-    _key_creation_id: str = None
-    _key_activation_id: str = None
+    __slots__ = tuple(f'_{name}' for name in ORDER_FIELDS)
 
     def __init__(
         self,
@@ -106,6 +132,7 @@ class Order:
         idempotency: str = None,
         __status=ORDERSTATUS.DRAFT,
     ) -> None:
+        self._clear()
         self._trading_type = (
             trading_type if trading_type is not None else acc.Account().mode
         )
@@ -131,13 +158,28 @@ class Order:
         Returns
                 Order: Order Object built from the given dict.
         """
-        order = Order(None, None, None, None, None)
-        order._attr_from_response(res)
+        if not all(atr in res for atr in _MANDATORY_FIELDS):
+            raise ValueError('Not all mandatory attrributes passed.')
+
+        # Every slot is set exactly once, without running __init__
+        order = Order.__new__(Order)
+        get = res.get
+        for name, slot, parse in _DECODER_TABLE:
+            v = get(name)
+            if parse is not None and v is not None:
+                v = parse(v)
+            setattr(order, slot, v)
+        order._trading_type = acc.Account().mode
+        if order._status is None:
+            order._status = ORDERSTATUS.DRAFT
         return order
 
     def place(self) -> None:
         """Place the order. It still needs to be activated to get executed.
 
+        If no idempotency key is set, a random one is assigned, so the request can be
+        retried safely after a connection error.
+
         Raises:
                 LemonMarketError: if lemon.markets returns an error
 
@@ -147,14 +189,11 @@ class Order:
             # raise OrderStatusError(f"Order {self._id} is already placed")
             return
 
-        # Remove _ from self.__dict__ to make names fit
-        body = {k[1:]: v for k, v in self.__dict__.items()}
-
         request = ApiRequest(
             type=self._trading_type,
             endpoint='/orders/',
             method='POST',
-            body=body,
+            body=self._place_body(),
             authorization_token=acc.Account().token,
         )
 
@@ -215,37 +254,49 @@ class Order:
 
     def reload(self) -> None:
         """Fetches the order again and sets the attributes to the new values."""
-        res = acc.Account().get_order(self._id)
-        self._attr_from_response(res.to_dict())
+        self._copy_from(acc.Account().get_order(self._id))
 
     def to_dict(self) -> dict:
         res = {}
-        for k, v in self.__dict__.items():
-            # Remove _ from attribute name
-            res[k[1:]] = v if not isinstance(v, datetime) else v.isoformat()
+        for name in ORDER_FIELDS:
+            v = getattr(self, f'_{name}')
+            res[name] = v if not isinstance(v, datetime) else v.isoformat()
         return res
 
+    def _place_body(self) -> dict:
+        """Body of the request placing the order."""
+        if self._idempotency is None:
+            # Lets the request be retried without placing the order twice
+            self._idempotency = uuid.uuid4().hex
+        return {name: getattr(self, f'_{name}') for name in _PLACE_FIELDS}
+
+    def _copy_from(self, order: 'Order') -> None:
+        """Take over all attributes of another Order object of the same order."""
+        for slot in Order.__slots__:
+            setattr(self, slot, getattr(order, slot))
+
+    def _clear(self) -> None:
+        for slot in Order.__slots__:
+            setattr(self, slot, None)
+
     def _attr_from_response(self, res: 'Order') -> None:
         """Overrides the attributes of the object based on the specified dict.
 
         Args:
                 dict: Dict with Attributes of the Order. Attribute keys must not start with _
         """
-        types = get_type_hints(Order)
-
-        if all(
-            atr in res for atr in ['isin', 'expires_at', 'side', 'quantity', 'venue']
-        ):
-            for k, v in res.items():
-                if f'_{k}' in types:
-                    # Parse ISO string response to datetime if attribute is annotated as datetime
-                    if types[f'_{k}'] == datetime and v is not None:
-                        setattr(self, f'_{k}', datetime.fromisoformat(v))
-                    else:
-                        setattr(self, f'_{k}', v)
-        else:
+        if not all(atr in res for atr in _MANDATORY_FIELDS):
             raise ValueError('Not all mandatory attrributes passed.')
 
+        decoders = _DECODERS
+        for k, v in res.items():
+            decoder = decoders.get(k)
+            if decoder is not None:
+                slot, parse = decoder
+                if parse is not None and v is not None:
+                    v = parse(v)
+                setattr(self, slot, v)
+
     @property
     def isin(self) -> str:
         return self._isin
@@ -463,3 +514,11 @@ class Order:
             return self._key_activation_id
         else:
             raise AttributeError('Not available until placed')
+
+
+# Slot and parser of each field of an API response, computed once
+_DECODERS = {
+    name: (f'_{name}', parse_datetime if type is datetime else None)
+    for name, type in ORDER_FIELDS.items()
+}
+_DECODER_TABLE = tuple((name, slot, parse) for name, (slot, parse) in _DECODERS.items())
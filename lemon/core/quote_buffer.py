@@ -0,0 +1,204 @@
+import threading
+
+import numpy as np
+from lemon.common.helpers import to_millis
+from lemon.common.settings import QUOTE_BUFFER_CAPACITY
+
+# Rows of the array of a QuoteRing
+QUOTE_FIELDS = ('t', 'b', 'a', 'b_v', 'a_v')
+T, B, A, B_V, A_V = range(len(QUOTE_FIELDS))
+
+
+class QuoteRing:
+    """The latest quotes of one instrument in a preallocated NumPy ring.
+
+    The quotes are stored twice, at their position in the ring and capacity
+    positions further. Any window of the latest n quotes is therefore one
+    contiguous slice, so it is read without copying, and an append only sets ten
+    values of the preallocated array.
+
+    Windows are views: they change when later quotes overwrite the ring, copy
+    them if they are kept.
+
+    Args:
+            capacity: Number of quotes kept, older ones are overwritten
+    """
+
+    def __init__(self, capacity: int = QUOTE_BUFFER_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+        self._data = np.zeros((len(QUOTE_FIELDS), 2 * capacity), dtype=np.int64)
+        self._rows = tuple(self._data)
+        # Setting items of a memoryview is faster than of an ndarray
+        self._views = tuple(memoryview(row) for row in self._rows)
+        self._next = 0
+        self._count = 0
+
+    def append(self, t: int, b: int, a: int, b_v: int, a_v: int) -> None:
+        """Add a quote, prices are fixed-point like the results of MarketData.
+
+        Args:
+                t: Time of the quote in milliseconds since the epoch
+                b: Bid price
+                a: Ask price
+                b_v: Bid volume
+                a_v: Ask volume
+        """
+        i = self._next
+        j = i + self.capacity
+        t_row, b_row, a_row, b_v_row, a_v_row = self._views
+        t_row[i] = t_row[j] = t
+        b_row[i] = b_row[j] = b
+        a_row[i] = a_row[j] = a
+        b_v_row[i] = b_v_row[j] = b_v
+        a_v_row[i] = a_v_row[j] = a_v
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def window(self, n: int = None) -> np.ndarray:
+        """View of the latest n quotes, all kept quotes if None.
+
+        Returns:
+                np.ndarray: Shape (5, n), one row per field of QUOTE_FIELDS, oldest quote first
+        """
+        return self._data[:, self._slice(n)]
+
+    def column(self, field: str, n: int = None) -> np.ndarray:
+        """View of one field of the latest n quotes, e.g. column('b', 10)."""
+        return self._rows[QUOTE_FIELDS.index(field)][self._slice(n)]
+
+    def times(self, n: int = None) -> np.ndarray:
+        """Times of the latest n quotes as datetime64[ms] in UTC, also a view."""
+        return self._rows[T][self._slice(n)].view('datetime64[ms]')
+
+    def spread(self, n: int = None) -> np.ndarray:
+        """Ask minus bid price of the latest n quotes."""
+        s = self._slice(n)
+        return self._rows[A][s] - self._rows[B][s]
+
+    def mid(self, n: int = None) -> np.ndarray:
+        """Mean of bid and ask price of the latest n quotes."""
+        s = self._slice(n)
+        return (self._rows[A][s] + self._rows[B][s]) / 2
+
+    def vwap(self, n: int = None) -> float:
+        """Average bid and ask price of the latest n quotes weighted by their volumes.
+
+        Returns:
+                float: NaN if there are no quotes or volumes
+        """
+        s = self._slice(n)
+        b_v = self._rows[B_V][s].astype(np.float64)
+        a_v = self._rows[A_V][s].astype(np.float64)
+        volume = b_v.sum() + a_v.sum()
+        if not volume:
+            return float('nan')
+        return float((self._rows[B][s] @ b_v + self._rows[A][s] @ a_v) / volume)
+
+    def latest(self) -> dict:
+        """The latest quote as dict, None if there is none."""
+        if not self._count:
+            return None
+        i = self._next - 1 + self.capacity
+        return {field: int(row[i]) for field, row in zip(QUOTE_FIELDS, self._rows)}
+
+    def clear(self) -> None:
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _slice(self, n: int = None) -> slice:
+        n = self._count if n is None else max(0, min(n, self._count))
+        end = self._next + self.capacity
+        return slice(end - n, end)
+
+
+class QuoteBuffer:
+    """Quote history of many instruments, one QuoteRing per ISIN.
+
+    Takes quotes as returned by MarketData.latest_quote, the DataFrames of
+    MarketData.latest_quotes and the quotes of lemon.core.stream.QuoteStream, so
+    it can be fed from polling as well as from a stream.
+
+    Appends of one ISIN are expected from one thread at a time, e.g. the dispatch
+    thread of a QuoteStream; reads from other threads see the ring as of their
+    call.
+
+    Example:
+            buffer = QuoteBuffer(capacity=512)
+            stream.on_quote(buffer.append)
+            buffer.spread('US0378331005', 100)
+            buffer.vwap('US0378331005', 100)
+
+    Args:
+            capacity: Number of quotes kept per ISIN
+    """
+
+    def __init__(self, capacity: int = QUOTE_BUFFER_CAPACITY) -> None:
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._rings = {}
+
+    def append(self, quote: dict) -> None:
+        """Add a quote with the keys isin, t, b, a, b_v and a_v."""
+        ring = self._rings.get(quote['isin'])
+        if ring is None:
+            ring = self._ring(quote['isin'])
+        ring.append(
+            to_millis(quote['t']), quote['b'], quote['a'], quote['b_v'], quote['a_v']
+        )
+
+    def extend(self, quotes) -> None:
+        """Add many quotes, a list of dicts or a DataFrame, oldest first."""
+        if hasattr(quotes, 'to_dict'):
+            if quotes.index.name == 'isin':
+                # Frames of MarketData.latest_quotes are indexed by ISIN
+                quotes = quotes.reset_index()
+            quotes = quotes.to_dict('records')
+        for quote in quotes:
+            self.append(quote)
+
+    def ring(self, isin: str) -> QuoteRing:
+        """The QuoteRing of an instrument.
+
+        Raises:
+                KeyError: if there is no quote of the instrument
+        """
+        return self._rings[isin]
+
+    @property
+    def isins(self) -> list:
+        return list(self._rings)
+
+    def window(self, isin: str, n: int = None) -> np.ndarray:
+        """View of the latest n quotes of an instrument (see QuoteRing.window)."""
+        return self._rings[isin].window(n)
+
+    def spread(self, isin: str, n: int = None) -> np.ndarray:
+        """Spreads of the latest n quotes of an instrument (see QuoteRing.spread)."""
+        return self._rings[isin].spread(n)
+
+    def mid(self, isin: str, n: int = None) -> np.ndarray:
+        """Mid prices of the latest n quotes of an instrument (see QuoteRing.mid)."""
+        return self._rings[isin].mid(n)
+
+    def vwap(self, isin: str, n: int = None) -> float:
+        """Volume weighted price of the latest n quotes of an instrument (see QuoteRing.vwap)."""
+        return self._rings[isin].vwap(n)
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def __contains__(self, isin: str) -> bool:
+        return isin in self._rings
+
+    def _ring(self, isin: str) -> QuoteRing:
+        with self._lock:
+            ring = self._rings.get(isin)
+            if ring is None:
+                ring = self._rings[isin] = QuoteRing(self.capacity)
+            return ring
@@ -0,0 +1,571 @@
+import inspect
+import json
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from lemon.common import decoder
+from lemon.common.errors import StreamError
+from lemon.common.helpers import to_millis
+from lemon.common.retry import RetryPolicy
+from lemon.common.sessions import SessionPool
+from lemon.common.settings import (
+    REALTIME_AUTH_URL,
+    REALTIME_MQTT_HOST,
+    REALTIME_MQTT_PORT,
+    STREAM_CONNECT_TIMEOUT,
+    STREAM_RECONNECT_BACKOFF,
+    STREAM_RECONNECT_MAX_BACKOFF,
+    STREAM_RECONNECT_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Ends the dispatch thread once everything queued before was delivered
+_STOP = object()
+
+
+class Transport(ABC):
+    """Connection to a quote feed used by QuoteStream.
+
+    Implementations call on_message(payload) with the raw JSON of every quote and
+    on_disconnect(error) when the connection was lost, from any thread.
+    """
+
+    @abstractmethod
+    def connect(self, on_message, on_disconnect) -> None:
+        """Open the connection, closing a previous one first.
+
+        Raises:
+                StreamError: if the feed can't be reached
+        """
+
+    @abstractmethod
+    def disconnect(self) -> None:
+        """Close the connection without calling on_disconnect."""
+
+    @abstractmethod
+    def subscribe(self, isins: set) -> None:
+        """Receive quotes of exactly these instruments, replacing earlier subscriptions."""
+
+
+class LocalBroker:
+    """In-process stand-in for the quote feed of lemon.markets.
+
+    Streams can be tested and load tested offline with it. publish() numbers the
+    quotes of every ISIN with a seq field and delivers them to all connected
+    transports subscribed to the ISIN, on the calling thread.
+
+    Example:
+            broker = LocalBroker()
+            stream = QuoteStream(broker.transport())
+            stream.subscribe('US0378331005')
+            stream.start()
+            broker.publish({'isin': 'US0378331005', 'b': 1603000, 'a': 1604000})
+
+    Args:
+            seq: Add the seq field to the quotes, without it they are sent like the ones of the lemon.markets feed
+    """
+
+    def __init__(self, seq: bool = True) -> None:
+        self.seq = seq
+        self._lock = threading.Lock()
+        self._seq = {}
+        self._transports = []
+        self._refuse = 0
+
+    def transport(self) -> 'LocalTransport':
+        """A new transport connecting to this broker."""
+        return LocalTransport(self)
+
+    def publish(self, quote: dict) -> int:
+        """Send a quote to the subscribers of its ISIN.
+
+        Args:
+                quote: Quote with at least an isin, e.g. as returned by /quotes/latest
+
+        Returns:
+                int: Sequence number of the quote
+        """
+        isin = quote['isin']
+        with self._lock:
+            seq = self._seq[isin] = self._seq.get(isin, 0) + 1
+            receivers = [t for t in self._transports if isin in t._isins]
+        if receivers:
+            payload = json.dumps({**quote, 'seq': seq} if self.seq else quote).encode()
+            for transport in receivers:
+                transport._on_message(payload)
+        return seq
+
+    def skip(self, isin: str, count: int = 1) -> None:
+        """Lose the next count quotes of an ISIN, the subscribers see a gap."""
+        with self._lock:
+            self._seq[isin] = self._seq.get(isin, 0) + count
+
+    def drop(self, refuse: int = 0) -> None:
+        """Drop all connections as if the network failed.
+
+        Args:
+                refuse: Number of following connection attempts that fail
+        """
+        with self._lock:
+            transports, self._transports = self._transports, []
+            self._refuse = refuse
+        for transport in transports:
+            transport._on_disconnect(StreamError('Connection dropped by the broker'))
+
+    @property
+    def connections(self) -> int:
+        return len(self._transports)
+
+    def _attach(self, transport: 'LocalTransport') -> None:
+        with self._lock:
+            if self._refuse > 0:
+                self._refuse -= 1
+                raise StreamError('Connection refused by the broker')
+            if transport not in self._transports:
+                self._transports.append(transport)
+
+    def _detach(self, transport: 'LocalTransport') -> None:
+        with self._lock:
+            if transport in self._transports:
+                self._transports.remove(transport)
+
+
+class LocalTransport(Transport):
+    """Transport connecting to a LocalBroker."""
+
+    def __init__(self, broker: LocalBroker) -> None:
+        self.broker = broker
+        self._isins = frozenset()
+        self._on_message = None
+        self._on_disconnect = None
+
+    def connect(self, on_message, on_disconnect) -> None:
+        self.broker._detach(self)
+        self._on_message = on_message
+        self._on_disconnect = on_disconnect
+        self.broker._attach(self)
+
+    def disconnect(self) -> None:
+        self.broker._detach(self)
+
+    def subscribe(self, isins: set) -> None:
+        self._isins = frozenset(isins)
+
+
+class MqttTransport(Transport):
+    """Real-time quote feed of lemon.markets, which is served over MQTT.
+
+    Needs the paho-mqtt package. Every connect requests a new token for the feed
+    with the market data API key, so a reconnect also works after the previous
+    token expired.
+
+    Args:
+            token: Market data API key. Defaults to the key of the Account
+            host: MQTT broker of the feed
+            port: Port of the MQTT broker, connected to with TLS
+            timeout: Seconds to wait for the broker to accept the connection
+    """
+
+    def __init__(
+        self,
+        token: str = None,
+        host: str = REALTIME_MQTT_HOST,
+        port: int = REALTIME_MQTT_PORT,
+        timeout: float = STREAM_CONNECT_TIMEOUT,
+    ) -> None:
+        if token is None:
+            from lemon.core.account import Account
+
+            token = Account().token
+        self._token = token
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._client = None
+        self._user_id = None
+        self._isins = frozenset()
+
+    def connect(self, on_message, on_disconnect) -> None:
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError:
+            raise StreamError(
+                'The real-time feed needs paho-mqtt, install it with pip install paho-mqtt'
+            )
+
+        self.disconnect()
+        feed_token, user_id = self._authenticate()
+        connected = threading.Event()
+        result = {}
+
+        def handle_connect(client, userdata, flags, code, *args) -> None:
+            result['code'] = code
+            connected.set()
+            if not _failed(code):
+                client.subscribe(user_id)
+
+        def handle_disconnect(client, userdata, *args) -> None:
+            # Reconnecting is up to QuoteStream, stop the network loop of paho
+            client.disconnect()
+            if self._client is client:
+                self._client = None
+                reason = args[-2] if len(args) > 2 else args[-1]
+                on_disconnect(StreamError(f'Disconnected from the feed: {reason}'))
+
+        if hasattr(mqtt, 'CallbackAPIVersion'):
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        else:
+            client = mqtt.Client()
+        client.username_pw_set(username=feed_token)
+        client.tls_set()
+        client.on_connect = handle_connect
+        client.on_message = lambda client, userdata, message: on_message(
+            message.payload
+        )
+        try:
+            client.connect(self.host, self.port)
+        except OSError as e:
+            raise StreamError(f'Cant connect to {self.host}:{self.port}: {e}')
+        client.loop_start()
+        if not connected.wait(self.timeout) or _failed(result['code']):
+            client.loop_stop()
+            raise StreamError(
+                f"Feed refused the connection: {result.get('code', 'timeout')}"
+            )
+        client.on_disconnect = handle_disconnect
+        self._client, self._user_id = client, user_id
+        if self._isins:
+            self.subscribe(self._isins)
+
+    def disconnect(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            client.disconnect()
+            client.loop_stop()
+
+    def subscribe(self, isins: set) -> None:
+        self._isins = frozenset(isins)
+        if self._client is not None:
+            self._client.publish(
+                f'{self._user_id}.subscriptions', ','.join(sorted(self._isins))
+            )
+
+    def _authenticate(self) -> tuple:
+        """Request a token of the feed, returns it and the topic of the user."""
+        try:
+            response = (
+                SessionPool()
+                .session('data')
+                .post(
+                    REALTIME_AUTH_URL,
+                    headers={'Authorization': f'Bearer {self._token}'},
+                    timeout=self.timeout,
+                )
+            )
+        except OSError as e:
+            raise StreamError(f'Cant authenticate to the feed: {e}')
+        if response.status_code != 200:
+            raise StreamError(
+                f'Cant authenticate to the feed: {response.status_code} {response.text}'
+            )
+        auth = decoder.loads(response.content)
+        return auth['token'], auth['user_id']
+
+
+class QuoteStream:
+    """Real-time quotes of subscribed instruments.
+
+    Quotes are received by the transport and delivered to the callbacks on a
+    background thread, or on an asyncio event loop if one is given. A lost
+    connection is reopened with exponential backoff and the subscriptions are
+    restored.
+
+    Quotes carrying a seq field, like the ones of LocalBroker, are checked for
+    gaps: the on_gap callbacks are called when quotes of an ISIN went missing,
+    e.g. while the stream was reconnecting, and repeated quotes are dropped.
+    Quotes without one, like the ones of the lemon.markets feed, can't be
+    checked, instead the on_gap callbacks are called with the time the stream
+    was down for every subscribed ISIN once it reconnected.
+
+    Example:
+            stream = QuoteStream()
+            stream.on_quote(lambda quote: print(quote['isin'], quote['b'], quote['a']))
+            stream.subscribe(['US0378331005', 'US88160R1014'])
+            stream.start()
+
+    Args:
+            transport: Connection to the feed. Defaults to the lemon.markets feed with the key of the Account
+            loop: asyncio event loop the callbacks are called on, coroutine functions are scheduled as tasks. On a thread if None, which only accepts plain functions
+            retry: Delays between and number of reconnection attempts
+
+    Attributes:
+            received: Number of quotes delivered
+            missed: Number of quotes lost in gaps
+            reconnects: Number of times the connection was reopened
+            error: Last error if reconnecting was given up, None otherwise
+    """
+
+    def __init__(
+        self, transport: Transport = None, loop=None, retry: RetryPolicy = None
+    ) -> None:
+        self.transport = transport if transport is not None else MqttTransport()
+        self.loop = loop
+        self.retry = retry or RetryPolicy(
+            max_retries=STREAM_RECONNECT_MAX_RETRIES,
+            backoff=STREAM_RECONNECT_BACKOFF,
+            max_backoff=STREAM_RECONNECT_MAX_BACKOFF,
+        )
+        self.received = 0
+        self.missed = 0
+        self.reconnects = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._isins = set()
+        self._seq = {}
+        self._last_t = {}
+        self._lost_at = None
+        self._callbacks = {None: []}
+        self._gap_callbacks = []
+        self._queue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._lost = threading.Event()
+        self._threads = []
+        self._connected = False
+
+    def subscribe(self, isins) -> None:
+        """Start receiving quotes of instruments, also before the stream is started.
+
+        Args:
+                isins: ISIN or list of ISINs
+        """
+        with self._lock:
+            self._isins.update(_as_list(isins))
+            if self._connected:
+                self.transport.subscribe(set(self._isins))
+
+    def unsubscribe(self, isins) -> None:
+        """Stop receiving quotes of instruments.
+
+        Args:
+                isins: ISIN or list of ISINs
+        """
+        with self._lock:
+            for isin in _as_list(isins):
+                self._isins.discard(isin)
+                self._seq.pop(isin, None)
+                self._last_t.pop(isin, None)
+            if self._connected:
+                self.transport.subscribe(set(self._isins))
+
+    @property
+    def subscriptions(self) -> set:
+        """ISINs currently subscribed."""
+        with self._lock:
+            return set(self._isins)
+
+    def on_quote(self, callback, isin: str = None) -> None:
+        """Register a function called with every quote.
+
+        Args:
+                callback: Called as callback(quote), quote is a dict like the results of /quotes/latest
+                isin: Only call it with quotes of this instrument, with all quotes if None
+
+        Raises:
+                ValueError: if callback is a coroutine function and the stream has no loop
+        """
+        self._check_callback(callback)
+        with self._lock:
+            self._callbacks[isin] = self._callbacks.get(isin, []) + [callback]
+
+    def on_gap(self, callback) -> None:
+        """Register a function called when quotes of an instrument went missing.
+
+        Quotes with a seq field are reported by the seq of the first missing and
+        of the received quote. Quotes without one are reported after a reconnect
+        by the time of the last quote received before the connection was lost,
+        or the loss itself if none was, and the time of the reconnect, both in
+        milliseconds since the epoch.
+
+        Args:
+                callback: Called as callback(isin, expected_seq, received_seq) or callback(isin, since, until)
+
+        Raises:
+                ValueError: if callback is a coroutine function and the stream has no loop
+        """
+        self._check_callback(callback)
+        with self._lock:
+            self._gap_callbacks = self._gap_callbacks + [callback]
+
+    def start(self) -> None:
+        """Connect and deliver quotes until stop() is called.
+
+        Raises:
+                StreamError: if the first connection fails
+        """
+        if self._threads:
+            return
+        self._stop.clear()
+        self._lost.clear()
+        self.error = None
+        self._connect()
+        self._threads = [
+            threading.Thread(target=target, name=name, daemon=True)
+            for target, name in (
+                (self._dispatch, 'lemon-stream-dispatch'),
+                (self._reconnect, 'lemon-stream-reconnect'),
+            )
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Disconnect and wait until the quotes received so far are delivered."""
+        self._stop.set()
+        self._lost.set()
+        with self._lock:
+            self._connected = False
+        self.transport.disconnect()
+        self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def __enter__(self) -> 'QuoteStream':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _connect(self) -> None:
+        self.transport.connect(self._queue.put, self._on_disconnect)
+        with self._lock:
+            self._connected = True
+            if self._isins:
+                self.transport.subscribe(set(self._isins))
+
+    def _on_disconnect(self, error: Exception = None) -> None:
+        if self._stop.is_set():
+            return
+        logger.warning('Quote stream disconnected: %s', error)
+        with self._lock:
+            self._connected = False
+            self._lost_at = _now()
+        self._lost.set()
+
+    def _reconnect(self) -> None:
+        while True:
+            self._lost.wait()
+            if self._stop.is_set():
+                return
+            self._lost.clear()
+            attempt = 0
+            while not self._stop.is_set():
+                try:
+                    self._connect()
+                except Exception as e:
+                    if attempt >= self.retry.max_retries:
+                        logger.error('Gave up reconnecting the quote stream: %s', e)
+                        self.error = e
+                        return
+                    delay = self.retry.delay(attempt)
+                    attempt += 1
+                    logger.info('Reconnecting the quote stream in %.1fs: %s', delay, e)
+                    self._stop.wait(delay)
+                else:
+                    self.reconnects += 1
+                    logger.info('Quote stream reconnected')
+                    self._report_outage()
+                    break
+
+    def _report_outage(self) -> None:
+        """Call the gap callbacks for the ISINs whose quotes can't be checked by seq."""
+        until = _now()
+        with self._lock:
+            gaps = [
+                (isin, self._last_t.get(isin, self._lost_at))
+                for isin in sorted(self._isins)
+                if isin not in self._seq
+            ]
+        for isin, since in gaps:
+            for callback in self._gap_callbacks:
+                self._call(callback, isin, since, until)
+
+    def _dispatch(self) -> None:
+        loads = decoder.loads
+        while True:
+            payload = self._queue.get()
+            if payload is _STOP:
+                return
+            try:
+                quote = loads(payload)
+            except ValueError:
+                logger.warning('Dropped malformed quote %r', payload[:100])
+                continue
+            self._deliver(quote)
+
+    def _deliver(self, quote: dict) -> None:
+        isin = quote.get('isin')
+        seq = quote.get('seq')
+        last = None
+        # Checked and updated together, so a quote still queued when the ISIN is
+        # unsubscribed can't write back its seq
+        with self._lock:
+            if isin not in self._isins:
+                return
+            if seq is not None:
+                last = self._seq.get(isin)
+                if last is not None and seq <= last:
+                    return
+                self._seq[isin] = seq
+            elif 't' in quote:
+                self._last_t[isin] = to_millis(quote['t'])
+
+        if last is not None and seq > last + 1:
+            self.missed += seq - last - 1
+            for callback in self._gap_callbacks:
+                self._call(callback, isin, last + 1, seq)
+        self.received += 1
+        for callback in self._callbacks[None]:
+            self._call(callback, quote)
+        for callback in self._callbacks.get(isin, ()):
+            self._call(callback, quote)
+
+    def _check_callback(self, callback) -> None:
+        # Without a loop callbacks run on a thread, which can't run coroutines
+        if self.loop is None and inspect.iscoroutinefunction(callback):
+            raise ValueError('Coroutine callbacks need a stream with a loop!')
+
+    def _call(self, callback, *args) -> None:
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(_invoke, callback, args)
+        else:
+            _invoke(callback, args)
+
+
+def _invoke(callback, args: tuple) -> None:
+    try:
+        result = callback(*args)
+        if inspect.isawaitable(result):
+            import asyncio
+
+            asyncio.ensure_future(result)
+    except Exception:
+        logger.exception('Quote stream callback failed')
+
+
+def _now() -> int:
+    return int(time.time() * 1000)
+
+
+def _failed(code) -> bool:
+    """Whether a paho result code, an int or a ReasonCode, is an error."""
+    return getattr(code, 'is_failure', code != 0)
+
+
+def _as_list(isins) -> list:
+    return [isins] if isinstance(isins, str) else list(isins)
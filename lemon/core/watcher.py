@@ -0,0 +1,195 @@
+import logging
+import threading
+from datetime import datetime, timezone
+
+from lemon.common.enums import ORDERSTATUS, VENUE
+from lemon.common.settings import (
+    MARKET_HOURS,
+    MARKET_TIMEZONE,
+    WATCH_AGE_FACTOR,
+    WATCH_MAX_INTERVAL,
+    WATCH_MIN_INTERVAL,
+)
+from lemon.core.account import Account
+from lemon.core.orders import FINAL_STATUSES, Order
+
+try:
+    from zoneinfo import ZoneInfo as _timezone
+except ImportError:  # Python < 3.9, dateutil is installed with pandas
+    from dateutil.tz import gettz as _timezone
+
+logger = logging.getLogger(__name__)
+
+
+class OrderWatcher:
+    """Follows the status of many orders with one list request per tick.
+
+    Instead of reloading every order, each tick lists the orders created since the
+    oldest watched one and updates the watched Order objects in place. Callbacks are
+    only called when the status of an order changed, e.g. from activated to
+    executed. Orders are no longer watched once they reached a final status.
+
+    The interval between ticks grows with the age of the youngest watched order
+    whose venue is open, fresh orders are polled every min_interval seconds. When
+    the venues of all watched orders are closed (see MARKET_HOURS) or without
+    watched orders it is max_interval.
+
+    Example:
+            watcher = OrderWatcher([order])
+            watcher.on_transition(lambda order, old, new: print(order.id, new), ORDERSTATUS.EXECUTED)
+            watcher.start()
+
+    Args:
+            orders: Placed orders to watch
+            min_interval: Shortest time between two ticks in seconds
+            max_interval: Longest time between two ticks in seconds
+            age_factor: Interval as fraction of the age of the youngest order
+    """
+
+    def __init__(
+        self,
+        orders: list = None,
+        min_interval: float = WATCH_MIN_INTERVAL,
+        max_interval: float = WATCH_MAX_INTERVAL,
+        age_factor: float = WATCH_AGE_FACTOR,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.age_factor = age_factor
+        self._lock = threading.Lock()
+        self._orders = {}
+        self._callbacks = []
+        self._stop = threading.Event()
+        self._thread = None
+        for order in orders or ():
+            self.watch(order)
+
+    def watch(self, order: Order) -> None:
+        """Start watching a placed order.
+
+        Raises:
+                ValueError: if the order isn't placed yet
+        """
+        if order.status == ORDERSTATUS.DRAFT or order._id is None:
+            raise ValueError('Only placed orders can be watched')
+        with self._lock:
+            self._orders[order._id] = order
+
+    def unwatch(self, order_id: str) -> None:
+        """Stop watching an order."""
+        with self._lock:
+            self._orders.pop(order_id, None)
+
+    @property
+    def orders(self) -> list:
+        """Orders currently watched."""
+        with self._lock:
+            return list(self._orders.values())
+
+    def on_transition(self, callback, status: ORDERSTATUS = None) -> None:
+        """Register a function called when the status of a watched order changes.
+
+        Args:
+                callback: Called as callback(order, old_status, new_status) from the polling thread
+                status: Only call it when an order reaches this status, on every change if None
+        """
+        self._callbacks.append((callback, str(status) if status is not None else None))
+
+    def poll(self) -> list:
+        """Run one tick: list the orders once and fire the callbacks of changed ones.
+
+        Returns:
+                list: (order, old_status, new_status) of every status change
+
+        Raises:
+                LemonMarketError: if lemon.markets returns an error
+        """
+        watched = self.orders
+        if not watched:
+            return []
+
+        ids = {order._id for order in watched}
+        created = [order._created_at for order in watched]
+        start = min(created) if None not in created else None
+        listed = {
+            order._id: order
+            for order in Account().orders(start=start)
+            if order._id in ids
+        }
+
+        transitions = []
+        for order in watched:
+            current = listed.get(order._id)
+            if current is None:
+                continue
+            old, new = str(order.status), str(current.status)
+            order._copy_from(current)
+            if old != new:
+                transitions.append((order, old, new))
+            if new in FINAL_STATUSES:
+                self.unwatch(order._id)
+
+        for order, old, new in transitions:
+            for callback, status in self._callbacks:
+                if status is None or status == new:
+                    try:
+                        callback(order, old, new)
+                    except Exception:
+                        logger.exception('Callback of order %s failed', order._id)
+        return transitions
+
+    def interval(self, now: datetime = None) -> float:
+        """Seconds until the next tick."""
+        now = now if now is not None else datetime.now(timezone.utc)
+        watched = [order for order in self.orders if _market_open(now, order._venue)]
+        if not watched:
+            return self.max_interval
+
+        ages = [
+            (now - _utc(order._created_at)).total_seconds()
+            for order in watched
+            if order._created_at is not None
+        ]
+        if not ages:
+            return self.min_interval
+        interval = max(0.0, min(ages)) * self.age_factor
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def start(self) -> None:
+        """Poll in a background thread until stop() is called."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='lemon-order-watcher', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop polling and wait for the background thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Polling orders failed')
+            self._stop.wait(self.interval())
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _market_open(now: datetime, venue: VENUE = None) -> bool:
+    """Whether the venue is open at now according to MARKET_HOURS."""
+    mic = str(venue).upper() if venue is not None else str(VENUE.GETTEX)
+    hours = MARKET_HOURS.get(mic, MARKET_HOURS[str(VENUE.GETTEX)])
+    if hours is None:
+        return True
+    local = _utc(now).astimezone(_timezone(MARKET_TIMEZONE))
+    return local.weekday() < 5 and hours[0] <= local.hour < hours[1]
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from lemon.common.cache import ResponseCache
+from lemon.common.requests import ApiRequest
+from lemon.common.sessions import SessionPool
+
+
+@pytest.fixture
+def cache():
+    cache = ResponseCache()
+    cache.hits = cache.misses = cache.evictions = 0
+    cache.enable(maxsize=2)
+    yield cache
+    cache.disable()
+    cache.maxsize = 256
+
+
+def test_disabled_by_default():
+    assert ResponseCache().ttl('/venues/') is None
+
+
+def test_lru_eviction(cache):
+    cache.set('a', '/venues/', 1, ttl=60)
+    cache.set('b', '/venues/', 2, ttl=60)
+    cache.get('a')
+    cache.set('c', '/instruments/', 3, ttl=60)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expiry(cache, mocker):
+    monotonic = mocker.patch('lemon.common.cache.time.monotonic', return_value=0)
+    cache.set('a', '/venues/', 1, ttl=60)
+
+    monotonic.return_value = 61
+
+    assert cache.get('a') is None
+
+
+def test_invalidate_endpoint(cache):
+    cache.set('a', '/venues/', 1, ttl=60)
+    cache.set('b', '/instruments/', 2, ttl=60)
+
+    cache.invalidate('/venues/')
+
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+
+
+def test_request_served_from_cache(cache, mocker):
+    session = SessionPool().session('data')
+    request = mocker.patch.object(session, 'request')
+    request.return_value.status_code = 200
+    request.return_value.content = json.dumps({'results': [{'mic': 'XMUN'}]}).encode()
+
+    for _ in range(3):
+        venues = ApiRequest(type='data', endpoint='/venues/', authorization_token='1')
+        assert venues.response['results'][0]['mic'] == 'XMUN'
+    ApiRequest(type='data', endpoint='/quotes/latest', authorization_token='1')
+    ApiRequest(type='data', endpoint='/quotes/latest', authorization_token='1')
+
+    assert request.call_count == 3
+    assert cache.stats()['hits'] == 2
+
+
+def test_cached_results_are_copies(cache, mocker):
+    session = SessionPool().session('data')
+    request = mocker.patch.object(session, 'request')
+    request.return_value.status_code = 200
+    request.return_value.content = json.dumps({'results': [{'mic': 'XMUN'}]}).encode()
+
+    first = ApiRequest(type='data', endpoint='/venues/', authorization_token='1')
+    first.response['results'][0]['mic'] = 'XFRA'
+    second = ApiRequest(type='data', endpoint='/venues/', authorization_token='1')
+    second.response['results'].clear()
+    third = ApiRequest(type='data', endpoint='/venues/', authorization_token='1')
+
+    assert request.call_count == 1
+    assert third.response['results'] == [{'mic': 'XMUN'}]
@@ -0,0 +1,26 @@
+import json
+
+from lemon.common import decoder
+
+
+def test_parses_bytes():
+    assert decoder.loads(b'{"results": [{"b": 2121000}]}') == {
+        'results': [{'b': 2121000}]
+    }
+
+
+def test_set_decoder():
+    calls = []
+
+    def loads(data):
+        calls.append(data)
+        return json.loads(data)
+
+    decoder.set_decoder(loads)
+    try:
+        assert decoder.loads(b'{"status": "ok"}') == {'status': 'ok'}
+        assert calls == [b'{"status": "ok"}']
+    finally:
+        decoder.set_decoder(None)
+
+    assert decoder.decoder_name() in decoder.FAST_DECODERS + ('json',)
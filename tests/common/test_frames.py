@@ -0,0 +1,68 @@
+import pandas as pd
+from lemon.common.frames import OHLC_SCHEMA, QUOTE_SCHEMA, build_frame
+
+
+def ohlc_results() -> list:
+    return [
+        {
+            'isin': 'IE00B3RBWM25',
+            'o': 1078000,
+            'h': 1079000,
+            'l': 1071400,
+            'c': 1075400,
+            'v': 3799,
+            'pbv': 4085341400,
+            't': '2022-04-04T00:00:00.000+00:00',
+            'mic': 'XMUN',
+        },
+        {
+            'isin': 'IE00B3RBWM25',
+            'o': 1075400,
+            'h': 1080000,
+            'l': 1070000,
+            'c': 1079000,
+            'v': 1200,
+            'pbv': 1294800000,
+            't': '2022-04-05T00:00:00.000+00:00',
+            'mic': 'XMUN',
+        },
+    ]
+
+
+def test_build_frame_types():
+    frame = build_frame(ohlc_results(), OHLC_SCHEMA)
+
+    assert list(frame.columns) == list(OHLC_SCHEMA)
+    assert frame['o'].dtype == 'int64'
+    assert frame['pbv'].dtype == 'int64'
+    assert pd.api.types.is_datetime64_any_dtype(frame['t'])
+    assert str(frame['t'].dt.tz) == 'UTC'
+    assert frame['mic'].dtype == 'category'
+    assert frame.at[1, 't'] == pd.Timestamp('2022-04-05', tz='UTC')
+
+
+def test_build_frame_missing_values():
+    results = ohlc_results()
+    results[1]['v'] = None
+
+    frame = build_frame(results, OHLC_SCHEMA)
+
+    assert frame['v'].dtype == 'Int64'
+    assert frame['v'].isna().tolist() == [False, True]
+
+
+def test_build_frame_keeps_extra_columns():
+    results = ohlc_results()
+    results[0]['extra'] = 'value'
+
+    frame = build_frame(results, OHLC_SCHEMA)
+
+    assert frame.at[0, 'extra'] == 'value'
+
+
+def test_build_frame_empty():
+    frame = build_frame([], QUOTE_SCHEMA)
+
+    assert len(frame) == 0
+    assert list(frame.columns) == list(QUOTE_SCHEMA)
+    assert frame['b'].dtype == 'int64'
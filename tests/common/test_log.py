@@ -0,0 +1,41 @@
+import io
+import logging
+
+from lemon.common.log import SamplingFilter, disable_logging, enable_logging
+
+
+def record(level: int) -> logging.LogRecord:
+    return logging.LogRecord('lemon.test', level, __file__, 1, 'message', (), None)
+
+
+def test_no_handlers_on_import():
+    import lemon.common.settings  # noqa: F401
+
+    assert not any(
+        getattr(h, 'baseFilename', '').endswith('lemon_markets.log')
+        for h in logging.getLogger().handlers
+    )
+
+
+def test_sampling_filter():
+    sampler = SamplingFilter(0.25)
+
+    passed = [sampler.filter(record(logging.DEBUG)) for _ in range(8)]
+
+    assert passed.count(True) == 2
+    assert sampler.filter(record(logging.WARNING))
+    assert not SamplingFilter(0).filter(record(logging.DEBUG))
+
+
+def test_enable_logging():
+    stream = io.StringIO()
+    listener = enable_logging(level=logging.DEBUG, stream=stream, fmt='%(message)s')
+    try:
+        logging.getLogger('lemon.test').debug('GET %s %s', '/venues/', 200)
+        logging.getLogger('other').warning('not from lemon')
+    finally:
+        disable_logging()
+
+    assert listener._thread is None
+    assert stream.getvalue() == 'GET /venues/ 200\n'
+    assert logging.getLogger('lemon').level == logging.NOTSET
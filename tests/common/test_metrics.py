@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from lemon.common.metrics import (
+    InMemoryMetrics,
+    MetricsSink,
+    RequestMetrics,
+    endpoint_template,
+    set_sink,
+)
+from lemon.common.requests import ApiRequest
+from lemon.common.sessions import SessionPool
+
+
+@pytest.fixture
+def metrics():
+    metrics = InMemoryMetrics(buckets=(0.1, 1.0))
+    set_sink(metrics)
+    yield metrics
+    set_sink(None)
+
+
+def test_endpoint_template():
+    assert endpoint_template('/orders/') == '/orders/'
+    assert (
+        endpoint_template('/orders/ord_pyPGQggmmj0jhlLHw2nfM92Hm9PmgTYq/activate/')
+        == '/orders/{id}/activate/'
+    )
+    assert endpoint_template('/quotes/latest?isin=US0378331005') == '/quotes/latest'
+
+
+def test_quantile(metrics):
+    for latency in (0.05, 0.05, 0.5, 5):
+        metrics.record(RequestMetrics('/orders/', 'post', 'paper', 200, latency))
+
+    assert metrics.count(method='post') == 4
+    assert metrics.quantile(0.5, endpoint='/orders/') == 0.1
+    assert metrics.quantile(0.75) == 1.0
+    assert metrics.quantile(0.99) == float('inf')
+    assert metrics.quantile(0.99, method='get') is None
+
+
+def test_export(metrics):
+    metrics.record(RequestMetrics('/venues/', 'get', 'data', 200, 0.5, 120, 1, 0))
+
+    text = metrics.export()
+
+    labels = 'method="get",endpoint="/venues/",type="data",status="200"'
+    assert f'lemon_requests_total{{{labels}}} 1\n' in text
+    assert f'lemon_request_bytes_total{{{labels}}} 120\n' in text
+    assert f'lemon_request_latency_seconds_bucket{{{labels},le="0.1"}} 0\n' in text
+    assert f'lemon_request_latency_seconds_bucket{{{labels},le="1.0"}} 1\n' in text
+    assert f'lemon_request_latency_seconds_bucket{{{labels},le="+Inf"}} 1\n' in text
+
+
+def test_request_recorded(mocker, metrics):
+    content = json.dumps({'status': 'ok', 'results': []}).encode()
+    request = mocker.patch.object(SessionPool().session('paper'), 'request')
+    request.return_value.status_code = 200
+    request.return_value.content = content
+
+    ApiRequest(
+        type='paper',
+        endpoint='/orders/ord_abc123/activate/',
+        method='POST',
+        authorization_token='123',
+    )
+
+    assert metrics.count(endpoint='/orders/{id}/activate/', status=200) == 1
+    series = list(metrics._series.values())[0]
+    assert series.bytes == len(content)
+    assert series.pages == 1
+
+
+def test_failing_sink_doesnt_fail_request(mocker):
+    class FailingSink(MetricsSink):
+        def record(self, metrics: RequestMetrics) -> None:
+            raise RuntimeError('statsd is down')
+
+    request = mocker.patch.object(SessionPool().session('paper'), 'request')
+    request.return_value.status_code = 200
+    request.return_value.content = b'{"status": "ok"}'
+    set_sink(FailingSink())
+    try:
+        response = ApiRequest(
+            type='paper', endpoint='/account/', authorization_token='1'
+        )
+    finally:
+        set_sink(None)
+
+    assert response.response == {'status': 'ok'}
+    with pytest.raises(TypeError):
+        MetricsSink()
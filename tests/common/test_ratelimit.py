@@ -0,0 +1,53 @@
+import json
+
+from lemon.common.ratelimit import RateLimiter, TokenBucket, parse_retry_after
+from lemon.common.requests import ApiRequest
+from lemon.common.sessions import SessionPool
+
+
+def test_bucket_burst_then_queue():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # Callers queue up one token interval apart
+    assert 0.09 < bucket.reserve() <= 0.1
+    assert 0.19 < bucket.reserve() <= 0.2
+
+
+def test_bucket_pause():
+    bucket = TokenBucket(rate=10, capacity=10)
+
+    bucket.pause(2)
+
+    assert 2 < bucket.reserve() <= 2.1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') == parse_retry_after(None)
+
+
+def test_configure_plans():
+    limiter = RateLimiter()
+
+    limiter.configure_plans(trading_plan='pro', data_plan='basic')
+
+    assert limiter.bucket('money').capacity == 1200
+    assert limiter.bucket('data').capacity == 600
+
+    limiter.configure_plans(trading_plan='free', data_plan='free')
+
+
+def test_request_queued_after_429(mocker):
+    session = SessionPool().session('data')
+    throttled = mocker.Mock(status_code=429, headers={'Retry-After': '0'})
+    ok = mocker.Mock(status_code=200, headers={})
+    ok.content = json.dumps({'results': []}).encode()
+    request = mocker.patch.object(session, 'request', side_effect=[throttled, ok])
+
+    response = ApiRequest(type='data', endpoint='/venues/', authorization_token='123')
+
+    assert response.response == {'results': []}
+    assert request.call_count == 2
@@ -0,0 +1,92 @@
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from lemon.common.requests import ApiRequest
+from lemon.common.settings import BASE_URLS
+from lemon.common.sessions import SessionPool
+
+BASE_URL = 'https://paper-trading.lemon.markets/v1/orders/'
+
+
+def page_result(page: int, pages: int, limit: int, total: int) -> dict:
+    start = (page - 1) * limit
+    return {
+        'status': 'ok',
+        'results': [{'id': i} for i in range(start, min(start + limit, total))],
+        'previous': None if page == 1 else f'{BASE_URL}?limit={limit}&page={page - 1}',
+        'next': None if page == pages else f'{BASE_URL}?limit={limit}&page={page + 1}',
+        'total': total,
+        'page': page,
+        'pages': pages,
+    }
+
+
+@pytest.fixture
+def paginated_session(mocker):
+    """Pooled paper session answering GET /orders/ with 5 pages of 2 items"""
+    requested_pages = []
+
+    def request(method, url, headers=None, params=None, timeout=None):
+        query = parse_qs(urlparse(url).query)
+        page = int(query['page'][0]) if 'page' in query else 1
+        limit = int(query['limit'][0]) if 'limit' in query else params['limit']
+        requested_pages.append(page)
+
+        response = mocker.Mock(status_code=200)
+        response.content = json.dumps(page_result(page, 5, limit, 10)).encode()
+        return response
+
+    mocker.patch.object(SessionPool().session('paper'), 'request', side_effect=request)
+    return requested_pages
+
+
+def test_pagination_in_order(paginated_session):
+    request = ApiRequest(
+        type='paper',
+        endpoint='/orders/',
+        authorization_token='123',
+        page_size=2,
+    )
+
+    assert request.response['status'] == 'ok'
+    assert [item['id'] for item in request.response['results']] == list(range(10))
+    assert request.response['next'] is None
+    assert sorted(paginated_session) == [1, 2, 3, 4, 5]
+
+
+def test_pagination_page_size_param(paginated_session):
+    request = ApiRequest(
+        type='paper',
+        endpoint='/orders/',
+        authorization_token='123',
+        url_params={'isin': 'US0378331005'},
+        page_size=2,
+    )
+
+    assert request._get_params() == {'isin': 'US0378331005', 'limit': 2}
+
+
+def test_iter_pages_stops_early(paginated_session):
+    request = ApiRequest(
+        type='paper',
+        endpoint='/orders/',
+        authorization_token='123',
+        page_size=2,
+        paginate=False,
+    )
+
+    pages = request.iter_pages()
+
+    assert [item['id'] for item in next(pages)] == [0, 1]
+    assert [item['id'] for item in next(pages)] == [2, 3]
+    assert paginated_session == [1, 2]
+
+
+def test_base_url_override(mocker):
+    mocker.patch.dict(BASE_URLS, {'data': 'http://127.0.0.1:8000/v1'})
+    mocker.patch.object(ApiRequest, '_perform_request')
+
+    request = ApiRequest(type='data', endpoint='/venues/', authorization_token='123')
+
+    assert request.url == 'http://127.0.0.1:8000/v1/venues/'
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+import requests
+from lemon.common.requests import ApiRequest
+from lemon.common.retry import RetryPolicy, retry_policy
+from lemon.common.sessions import SessionPool
+from lemon.common.settings import REQUEST_TIMEOUT
+
+
+@pytest.fixture
+def no_backoff(mocker):
+    mocker.patch('lemon.common.requests.time.sleep')
+
+
+@pytest.fixture
+def ok_response(mocker):
+    response = mocker.Mock(status_code=200, headers={})
+    response.content = json.dumps({'status': 'ok', 'results': []}).encode()
+    return response
+
+
+def test_backoff_grows():
+    policy = RetryPolicy(backoff=1, max_backoff=3, jitter=0)
+
+    assert [policy.delay(attempt) for attempt in range(4)] == [1, 2, 3, 3]
+
+
+def test_post_requires_idempotency():
+    policy = retry_policy('post')
+
+    assert not policy.allows({'isin': 'US02079K3059'})
+    assert policy.allows({'isin': 'US02079K3059', 'idempotency': 'abc'})
+
+
+def test_get_retried_after_connection_error(mocker, no_backoff, ok_response):
+    session = SessionPool().session('paper')
+    request = mocker.patch.object(
+        session,
+        'request',
+        side_effect=[requests.exceptions.ConnectionError(), ok_response],
+    )
+
+    response = ApiRequest(type='paper', endpoint='/orders/', authorization_token='1')
+
+    assert response.response['status'] == 'ok'
+    assert response.retries == 1
+    assert request.call_count == 2
+
+
+def test_get_retried_after_timeout(mocker, no_backoff, ok_response):
+    session = SessionPool().session('paper')
+    request = mocker.patch.object(
+        session,
+        'request',
+        side_effect=[requests.exceptions.ReadTimeout(), ok_response],
+    )
+
+    response = ApiRequest(type='paper', endpoint='/orders/', authorization_token='1')
+
+    assert response.response['status'] == 'ok'
+    assert response.retries == 1
+    assert request.call_args[1]['timeout'] == REQUEST_TIMEOUT
+
+
+def test_get_retried_on_server_error(mocker, no_backoff, ok_response):
+    session = SessionPool().session('paper')
+    unavailable = mocker.Mock(status_code=503, headers={})
+    mocker.patch.object(session, 'request', side_effect=[unavailable, ok_response])
+
+    response = ApiRequest(type='paper', endpoint='/orders/', authorization_token='1')
+
+    assert response.response['status'] == 'ok'
+
+
+def test_post_without_idempotency_not_retried(mocker, no_backoff, ok_response):
+    session = SessionPool().session('paper')
+    mocker.patch.object(
+        session,
+        'request',
+        side_effect=[requests.exceptions.ConnectionError(), ok_response],
+    )
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        ApiRequest(
+            type='paper',
+            endpoint='/orders/',
+            method='POST',
+            body={'isin': 'US02079K3059'},
+            authorization_token='1',
+        )
+
+
+def test_post_with_idempotency_retried(mocker, no_backoff, ok_response):
+    session = SessionPool().session('paper')
+    request = mocker.patch.object(
+        session,
+        'request',
+        side_effect=[requests.exceptions.ConnectionError(), ok_response],
+    )
+
+    ApiRequest(
+        type='paper',
+        endpoint='/orders/',
+        method='POST',
+        body={'isin': 'US02079K3059', 'idempotency': 'abc'},
+        authorization_token='1',
+    )
+
+    # The retry sends the same idempotency key again
+    assert request.call_args_list[0] == request.call_args_list[1]
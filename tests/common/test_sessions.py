@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+import pytest
+from lemon.common.requests import ApiRequest
+from lemon.common.sessions import AsyncSessionPool, SessionPool
+from lemon.common.settings import REQUEST_TIMEOUT
+
+
+def test_session_per_host():
+    pool = SessionPool()
+
+    assert pool.session('paper') is pool.session('paper')
+    assert pool.session('paper') is not pool.session('data')
+
+
+def test_session_invalid_host():
+    with pytest.raises(ValueError):
+        SessionPool().session('crypto')
+
+
+def test_configure_rebuilds_sessions():
+    pool = SessionPool()
+    session = pool.session('money')
+
+    pool.configure(pool_maxsize=2, keep_alive=False)
+
+    assert pool.session('money') is not session
+    assert pool.session('money').headers['Connection'] == 'close'
+
+    pool.configure(pool_maxsize=16, keep_alive=True)
+
+
+def test_request_uses_pooled_session(mocker):
+    session = SessionPool().session('data')
+    request = mocker.patch.object(session, 'request')
+    request.return_value.status_code = 200
+    request.return_value.content = json.dumps({'results': []}).encode()
+
+    ApiRequest(type='data', endpoint='/venues/', authorization_token='123')
+    ApiRequest(type='data', endpoint='/venues/', authorization_token='123')
+
+    assert request.call_count == 2
+
+
+def test_async_session_times_out():
+    pytest.importorskip('aiohttp')
+
+    async def session_timeout():
+        try:
+            return AsyncSessionPool().session('paper').timeout
+        finally:
+            await AsyncSessionPool().close()
+
+    timeout = asyncio.run(session_timeout())
+
+    assert (timeout.connect, timeout.sock_read) == REQUEST_TIMEOUT
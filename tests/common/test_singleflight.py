@@ -0,0 +1,113 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from lemon.common import requests
+from lemon.common.requests import ApiRequest
+from lemon.common.sessions import SessionPool
+from lemon.common.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class Arrivals(dict):
+    """Calls of a SingleFlight, arrived is set once n callers looked up their key."""
+
+    def __init__(self, n: int) -> None:
+        super().__init__()
+        self.n = n
+        self.count = 0
+        self.arrived = threading.Event()
+
+    def get(self, key, default=None):
+        # Called under the lock of the SingleFlight
+        self.count += 1
+        if self.count >= self.n:
+            self.arrived.set()
+        return super().get(key, default)
+
+
+def test_concurrent_calls_coalesced():
+    flight = SingleFlight()
+    flight._calls = Arrivals(5)
+    calls = []
+
+    def call():
+        calls.append(1)
+        # Finish only once every caller found this call in flight
+        assert flight._calls.arrived.wait(5)
+        return {'results': []}
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(flight.do, 'key', call) for _ in range(5)]
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    # Equal, but no caller shares its result with another
+    assert all(result == results[0] for result in results)
+    assert len({id(result) for result in results}) == 5
+    assert flight.in_flight() == 0
+
+
+def test_error_shared():
+    flight = SingleFlight()
+
+    def call():
+        raise ValueError('failed')
+
+    with pytest.raises(ValueError):
+        flight.do('key', call)
+
+    assert flight.in_flight() == 0
+
+
+def test_async_calls_coalesced():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'results': []}
+
+    async def run():
+        results = await asyncio.gather(*[flight.do('key', call) for _ in range(5)])
+        # The caller starting the call changes its result
+        results[0]['results'].append(1)
+        return results
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert results[1:] == [{'results': []}] * 4
+    assert len({id(result) for result in results}) == 5
+    assert flight.in_flight() == 0
+
+
+def test_identical_gets_coalesced(mocker):
+    calls = mocker.patch.object(requests._IN_FLIGHT_GETS, '_calls', Arrivals(6))
+
+    def request(method, url, headers=None, params=None, timeout=None):
+        # Answer only once all six requests reached the coalescing
+        assert calls.arrived.wait(5)
+        response = mocker.Mock(status_code=200)
+        response.content = json.dumps({'results': [{'isin': params['isin']}]}).encode()
+        return response
+
+    session = SessionPool().session('data')
+    send = mocker.patch.object(session, 'request', side_effect=request)
+
+    def latest_quote(isin):
+        return ApiRequest(
+            type='data',
+            endpoint='/quotes/latest',
+            url_params={'isin': isin},
+            authorization_token='123',
+        ).response
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        isins = ['US30303M1027'] * 4 + ['DE0006231004'] * 2
+        quotes = list(executor.map(latest_quote, isins))
+
+    assert [quote['results'][0]['isin'] for quote in quotes] == isins
+    assert send.call_count == 2
@@ -101,6 +101,32 @@ def placed_order_result():
     }
 
 
+@pytest.fixture
+def order_result(placed_order_result) -> dict:
+    return placed_order_result['results']
+
+
+@pytest.fixture
+def listed(request, mocker, order_result, account) -> dict:
+    """GET /orders/ answering with results, which can be changed between calls.
+
+    Parametrize it indirectly with a list of changes to order_result, one per
+    listed order. Lists a single activated order by default.
+    """
+    changes = getattr(request, 'param', [{'status': 'activated'}])
+    listed = {
+        'results': [dict(order_result, **change) for change in changes],
+        'requests': [],
+    }
+
+    def mock_perform_request(self):
+        listed['requests'].append(self.url_params)
+        self._response = {'status': 'ok', 'results': listed['results']}
+
+    mocker.patch('lemon.core.account.ApiRequest._perform_request', mock_perform_request)
+    return listed
+
+
 @pytest.fixture
 def account(mocker) -> Account:
     def mock_fetch_state(self):
@@ -1,5 +1,10 @@
+import subprocess
+import sys
+
 import pytest
-from lemon.common.enums import BANKSTATEMENT_TYPE, ORDERSIDE, VENUE
+from lemon.common.enums import BANKSTATEMENT_TYPE, ORDERSIDE, ORDERSTATUS, VENUE
+from lemon.common.errors import LemonMarketError, OrderStatusError
+from lemon.core.account import Account
 from lemon.core.orders import Order
 
 
@@ -312,6 +317,21 @@ def test_positions(mocker, positions_result, account):
     assert positions.at[1, 'buy_price_avg'] == 25450000
 
 
+def test_positions_raw(mocker, positions_result, account):
+    def mock_perform_request(self):
+        self._response = positions_result
+
+    mocker.patch('lemon.core.account.ApiRequest._perform_request', mock_perform_request)
+
+    account.raw = True
+    try:
+        positions = account.positions()
+    finally:
+        account.raw = False
+
+    assert positions == positions_result['results']
+
+
 def test_orders(mocker, apple_orders_result, account):
     def mock_perform_request(self):
         self._response = apple_orders_result
@@ -341,3 +361,137 @@ def test_get_order(mocker, placed_order_result, account):
     assert order.id == 'ord_abcdefghijklmnopqrstuvwxyz12345678'
     assert VENUE.has_value(str(order.venue).upper())
     assert ORDERSIDE.has_value(order.side)
+
+
+def test_iter_orders(mocker, apple_orders_result, account):
+    def mock_perform_request(self):
+        self._response = apple_orders_result
+
+    mocker.patch('lemon.core.account.ApiRequest._perform_request', mock_perform_request)
+
+    orders = list(account.iter_orders(isin='US0378331005'))
+    pages = list(account.iter_orders(isin='US0378331005', chunked=True))
+
+    assert isinstance(orders[0], Order)
+    assert orders[0].id == 'ord_qyFnZddddy6WQJFxTY6YLS8dJ2RfRtSBFa'
+    assert len(pages) == 1
+    assert len(pages[0]) == len(orders)
+
+
+def test_iter_bankstatements(mocker, bankstatements_result, account):
+    def mock_perform_request(self):
+        self._response = bankstatements_result
+
+    mocker.patch('lemon.core.account.ApiRequest._perform_request', mock_perform_request)
+
+    bankstatements = account.iter_bankstatements()
+
+    assert next(bankstatements)['id'] == 'bst_qyFkCwwGGylytZwbkcBmWQtCH1Wqk9ZsXa'
+    assert next(bankstatements)['isin_title'] == 'TESLA INC.'
+
+
+def test_place_orders(mocker, placed_order_result, account):
+    bodies = []
+
+    def mock_perform_request(self):
+        bodies.append(self.body)
+        if self.body['isin'] == 'US0000000000':
+            self._response = {
+                'status': 'error',
+                'error_code': 'instrument_not_tradable',
+                'error_message': 'Instrument is not tradable',
+            }
+        else:
+            self._response = placed_order_result
+
+    mocker.patch('lemon.core.orders.ApiRequest._perform_request', mock_perform_request)
+    orders = [
+        Order(isin, '2022-04-04', ORDERSIDE.BUY, 1, VENUE.GETTEX)
+        for isin in ('US02079K3059', 'US0000000000', 'US02079K3059')
+    ]
+
+    results = account.place_orders(orders, max_concurrency=2)
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert [r.order for r in results] == orders
+    assert results[0].order_id == 'ord_abcdefghijklmnopqrstuvwxyz12345678'
+    assert results[1].order_id is None
+    assert isinstance(results[1].error, LemonMarketError)
+    assert len({body['idempotency'] for body in bodies}) == 3
+
+
+def test_place_orders_skips_placed(account):
+    order = Order('US02079K3059', '2022-04-04', ORDERSIDE.BUY, 1, VENUE.GETTEX)
+    order._status = ORDERSTATUS.INACTIVE
+
+    results = account.place_orders([order])
+
+    assert isinstance(results[0].error, OrderStatusError)
+
+
+def test_orders_params_side():
+    params = Account._orders_params(None, None, ORDERSIDE.SELL, None, None, None, None)
+
+    assert params['side'] == 'sell'
+    assert params['status'] is None
+
+
+def test_cancel_orders_by_filter(mocker, apple_orders_result, account):
+    apple_orders_result['results'][1]['status'] = 'inactive'
+    requests = []
+
+    def mock_perform_request(self):
+        requests.append((self.method, self.endpoint, self.url_params))
+        if self.method == 'get':
+            self._response = apple_orders_result
+        else:
+            self._response = {'status': 'ok'}
+
+    mocker.patch('lemon.core.account.ApiRequest._perform_request', mock_perform_request)
+
+    results = account.cancel_orders(isin='US0378331005', side=ORDERSIDE.BUY)
+
+    assert requests[0][2]['isin'] == 'US0378331005'
+    assert requests[0][2]['side'] == 'buy'
+    # The expired order is skipped
+    assert len(results) == 1
+    assert results[0].ok
+    assert results[0].seconds >= 0
+    assert requests[1] == (
+        'delete',
+        f"/orders/{apple_orders_result['results'][1]['id']}",
+        None,
+    )
+
+
+def test_activate_orders_by_id(mocker, account):
+    endpoints = []
+
+    def mock_perform_request(self):
+        endpoints.append(self.endpoint)
+        if 'ord_2' in self.endpoint:
+            self._response = {
+                'status': 'error',
+                'error_code': 'order_not_inactive',
+                'error_message': 'Order is not inactive',
+            }
+        else:
+            self._response = {'status': 'ok'}
+
+    mocker.patch('lemon.core.account.ApiRequest._perform_request', mock_perform_request)
+
+    results = account.activate_orders(['ord_1', 'ord_2'])
+
+    assert sorted(endpoints) == ['/orders/ord_1/activate/', '/orders/ord_2/activate/']
+    assert [r.order_id for r in results] == ['ord_1', 'ord_2']
+    assert [r.ok for r in results] == [True, False]
+
+
+def test_bulk_ids_and_filters(account):
+    with pytest.raises(ValueError):
+        account.cancel_orders(['ord_1'], isin='US0378331005')
+
+
+def test_bulk_importable_first():
+    # In a new interpreter, lemon.core.bulk is imported before lemon.core.account
+    subprocess.run([sys.executable, '-c', 'import lemon.core.bulk'], check=True)
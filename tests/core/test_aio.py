@@ -0,0 +1,233 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from lemon.common.enums import ORDERSIDE, ORDERSTATUS, VENUE
+from lemon.common.ratelimit import RateLimiter
+from lemon.common.requests import AsyncApiRequest
+from lemon.common.sessions import AsyncSessionPool
+from lemon.common.settings import BASE_URLS, POOL_MAXSIZE, RATE_LIMITS
+from lemon.core.aio import AsyncAccount, AsyncMarketData, AsyncOrder
+
+
+async def serve(handler):
+    """Local stand-in of the paper trading API answering every GET with handler."""
+    web = pytest.importorskip('aiohttp.web')
+    app = web.Application()
+    app.router.add_get('/v1/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    BASE_URLS['paper'] = f'http://127.0.0.1:{port}/v1'
+    return runner
+
+
+@pytest.fixture
+def local_api(mocker):
+    pytest.importorskip('aiohttp')
+    mocker.patch.dict(BASE_URLS)
+    RateLimiter().configure('paper', 60_000)
+    yield
+    RateLimiter().configure('paper', RATE_LIMITS['free'])
+
+
+def mock_perform_async(response):
+    async def perform_async(self):
+        self._response = response(self) if callable(response) else response
+        return self
+
+    return perform_async
+
+
+def test_async_api_request_paginates(local_api):
+    from aiohttp import web
+
+    async def handler(request):
+        page = int(request.query.get('page', 1))
+        if page == 1:
+            assert request.query.getall('isin') == ['A', 'B']
+            assert 'side' not in request.query
+        return web.json_response(
+            {
+                'results': [page],
+                'total': 3,
+                'pages': 3,
+                'next': f'{BASE_URLS["paper"]}/orders/?page={page + 1}'
+                if page < 3
+                else None,
+            }
+        )
+
+    async def run():
+        runner = await serve(handler)
+        try:
+            request = AsyncApiRequest(
+                type='paper',
+                endpoint='/orders/',
+                url_params={'isin': ['A', 'B'], 'side': None},
+                authorization_token='123',
+            )
+            assert not hasattr(request, '_response')
+            await request
+            return request
+        finally:
+            await AsyncSessionPool().close()
+            await runner.cleanup()
+
+    request = asyncio.run(run())
+
+    assert request.response['results'] == [1, 2, 3]
+    assert request.pages == 3
+    assert request.status == 200
+
+
+def test_async_api_requests_dont_block(local_api):
+    from aiohttp import web
+
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.1)
+        in_flight -= 1
+        return web.json_response({'status': 'ok', 'results': []})
+
+    async def run():
+        runner = await serve(handler)
+        try:
+            await asyncio.gather(
+                *[
+                    AsyncApiRequest(
+                        type='paper',
+                        endpoint=f'/orders/ord_{i}',
+                        authorization_token='123',
+                    )
+                    for i in range(4 * POOL_MAXSIZE)
+                ]
+            )
+        finally:
+            await AsyncSessionPool().close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+    # Not bounded by the threads or connections of the sync SessionPool
+    assert peak > POOL_MAXSIZE
+
+
+def test_async_api_request_retries(local_api):
+    from aiohttp import web
+
+    statuses = [503, 429, 200]
+
+    async def handler(request):
+        status = statuses.pop(0)
+        return web.json_response(
+            {'status': 'ok'}, status=status, headers={'Retry-After': '0'}
+        )
+
+    async def run():
+        runner = await serve(handler)
+        try:
+            return await AsyncApiRequest(
+                type='paper', endpoint='/account/', authorization_token='123'
+            )
+        finally:
+            await AsyncSessionPool().close()
+            await runner.cleanup()
+
+    request = asyncio.run(run())
+
+    assert request.status == 200
+    assert request.retries == 1
+    assert statuses == []
+
+
+def test_concurrent_latest_quotes(account, mocker):
+    mocker.patch(
+        'lemon.common.requests.AsyncApiRequest._perform_async',
+        mock_perform_async(
+            lambda self: {'results': [{'isin': self.url.split('isin=')[1][:12]}]}
+        ),
+    )
+    m = AsyncMarketData()
+    isins = [f'US{i:010d}' for i in range(20)]
+
+    async def gather():
+        return await asyncio.gather(
+            *[m.latest_quote(isin, VENUE.GETTEX) for isin in isins]
+        )
+
+    quotes = asyncio.run(gather())
+
+    assert [quote['isin'] for quote in quotes] == isins
+
+
+def test_async_orders(mocker, placed_order_result, account):
+    response = dict(placed_order_result)
+    response['results'] = [placed_order_result['results']]
+    mocker.patch(
+        'lemon.common.requests.AsyncApiRequest._perform_async',
+        mock_perform_async(response),
+    )
+
+    orders = asyncio.run(AsyncAccount().orders(isin='US02079K3059'))
+
+    assert isinstance(orders[0], AsyncOrder)
+    assert orders[0].id == 'ord_abcdefghijklmnopqrstuvwxyz12345678'
+
+
+def test_async_order_place(mocker, placed_order_result, account):
+    sent = []
+
+    def response(request):
+        sent.append(request)
+        return placed_order_result
+
+    mocker.patch(
+        'lemon.common.requests.AsyncApiRequest._perform_async',
+        mock_perform_async(response),
+    )
+    order = AsyncOrder('US02079K3059', '2022-04-04', ORDERSIDE.BUY, 1, VENUE.GETTEX)
+
+    asyncio.run(order.place())
+
+    assert order.status == str(ORDERSTATUS.INACTIVE)
+    assert order.id == 'ord_abcdefghijklmnopqrstuvwxyz12345678'
+    assert sent[0].method == 'post'
+    assert sent[0].body['idempotency'] is not None
+
+
+def test_async_positions(mocker, account):
+    mocker.patch(
+        'lemon.common.requests.AsyncApiRequest._perform_async',
+        mock_perform_async({'status': 'ok', 'results': [{'isin': 'US88160R1014'}]}),
+    )
+
+    positions = asyncio.run(AsyncAccount().positions())
+
+    assert isinstance(positions, pd.DataFrame)
+
+
+def test_async_cancel_orders(mocker, account):
+    sent = []
+
+    def response(request):
+        sent.append(request.endpoint)
+        if request.method == 'delete' and request.endpoint.endswith('2'):
+            return {'status': 'error', 'error_code': 'x', 'error_message': 'failed'}
+        return {'status': 'ok'}
+
+    mocker.patch(
+        'lemon.common.requests.AsyncApiRequest._perform_async',
+        mock_perform_async(response),
+    )
+
+    results = asyncio.run(AsyncAccount().cancel_orders(['ord_1', 'ord_2']))
+
+    assert sorted(sent) == ['/orders/ord_1', '/orders/ord_2']
+    assert [result.ok for result in results] == [True, False]
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from lemon.common.enums import TIMESPAN
+from lemon.common.helpers import to_millis
+from lemon.core.bars import BarAggregator
+
+APPLE = 'US0378331005'
+NOON = datetime(2022, 4, 4, 12, tzinfo=timezone.utc)
+
+
+def trade(seconds: float, p: int, v: int = 1, isin: str = APPLE) -> dict:
+    t = NOON + timedelta(seconds=seconds)
+    return {'isin': isin, 'p': p, 'v': v, 't': t.isoformat(), 'mic': 'XMUN'}
+
+
+def test_bars_from_trades():
+    aggregator = BarAggregator(TIMESPAN.MINUTE, lateness=2)
+    emitted = []
+    aggregator.on_bar(emitted.append)
+
+    aggregator.add(trade(1, 100))
+    aggregator.add(trade(30, 120, 2))
+    aggregator.add(trade(59, 90))
+    # Out of order within the lateness, it is the first trade of the bar
+    assert aggregator.add(trade(61, 110)) == []
+    aggregator.add(trade(0.5, 95))
+    closed = aggregator.add(trade(62.5, 105))
+
+    assert emitted == closed
+    assert closed == [
+        {
+            'isin': APPLE,
+            'o': 95,
+            'h': 120,
+            'l': 90,
+            'c': 90,
+            'v': 5,
+            'pbv': 95 + 100 + 240 + 90,
+            't': NOON,
+            'mic': 'XMUN',
+        }
+    ]
+
+    # The first bar is closed, so this trade is too late
+    aggregator.add(trade(10, 200))
+    assert aggregator.late == 1
+
+    closed = aggregator.flush()
+    assert [(bar['o'], bar['c'], bar['v']) for bar in closed] == [(110, 105, 2)]
+
+
+def test_bars_from_quotes_and_advance():
+    aggregator = BarAggregator(TIMESPAN.MINUTE, lateness=2)
+    apple = []
+    aggregator.on_bar(apple.append, APPLE)
+    for seconds, b in ((1, 100), (20, 110)):
+        t = NOON + timedelta(seconds=seconds)
+        aggregator.add({'isin': APPLE, 'b': b, 'a': b + 10, 't': t, 'mic': 'XMUN'})
+    aggregator.add(trade(5, 300, isin='US88160R1014'))
+
+    assert aggregator.advance(NOON + timedelta(seconds=61)) == []
+    closed = aggregator.advance(NOON + timedelta(seconds=62))
+
+    assert [bar['isin'] for bar in closed] == [APPLE, 'US88160R1014']
+    assert len(apple) == 1
+    assert (apple[0]['o'], apple[0]['h'], apple[0]['c'], apple[0]['v']) == (
+        105,
+        115,
+        115,
+        0,
+    )
+
+
+def test_bars_frame():
+    aggregator = BarAggregator(TIMESPAN.MINUTE, lateness=0)
+    for minute in range(3):
+        aggregator.add(trade(minute * 60, 100 + minute))
+    aggregator.flush()
+
+    bars = aggregator.bars(APPLE)
+
+    assert list(bars.columns) == ['isin', 'o', 'h', 'l', 'c', 'v', 'pbv', 't', 'mic']
+    assert bars['o'].tolist() == [100, 101, 102]
+    assert bars['t'].tolist() == [
+        pd.Timestamp(NOON + timedelta(minutes=minute)) for minute in range(3)
+    ]
+    assert aggregator.bars('US88160R1014', raw=True) == []
+
+
+def test_backfill(account, mocker):
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    bar = {'isin': APPLE, 'o': 100, 'h': 110, 'l': 90, 'c': 100, 'v': 3, 'pbv': 300}
+    results = [
+        dict(bar, t=(now - timedelta(hours=hours)).isoformat(), mic='XMUN')
+        for hours in (2, 1, 0)
+    ]
+
+    def mock_perform_request(self):
+        self._response = {'results': results, 'next': None}
+
+    mocker.patch('lemon.core.market.ApiRequest._perform_request', mock_perform_request)
+    aggregator = BarAggregator(TIMESPAN.HOUR)
+    aggregator.backfill(APPLE, start=now - timedelta(hours=5))
+
+    assert len(aggregator.bars(APPLE, raw=True)) == 2
+
+    # The bar in progress is continued
+    t = now + timedelta(seconds=1)
+    aggregator.add({'isin': APPLE, 'p': 120, 'v': 1, 't': t, 'mic': 'XMUN'})
+    closed = aggregator.flush()
+
+    assert [(b['o'], b['h'], b['c'], b['v'], b['pbv']) for b in closed] == [
+        (100, 120, 120, 4, 420)
+    ]
+
+
+def test_backfill_within_lateness():
+    aggregator = BarAggregator(TIMESPAN.MINUTE, lateness=2)
+    bar = {'isin': APPLE, 'o': 100, 'h': 110, 'l': 90, 'c': 100, 'v': 3, 'pbv': 300}
+    results = [dict(bar, t=(NOON - timedelta(minutes=1)).isoformat(), mic='XMUN')]
+
+    # Loaded one second after the bar ended, a tick of it may still arrive
+    aggregator._load(results, to_millis(NOON + timedelta(seconds=1)))
+    aggregator.add(trade(-0.5, 120))
+    aggregator.add(trade(3, 130))
+
+    bars = aggregator.bars(APPLE, raw=True)
+    assert [(b['t'], b['h'], b['c'], b['v']) for b in bars] == [
+        (NOON - timedelta(minutes=1), 120, 120, 4)
+    ]
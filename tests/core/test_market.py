@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 import pandas as pd
 import pytest
 from lemon.core.market import MarketData
@@ -667,3 +670,128 @@ def test_ohlc(account, mocker, ohlc_result):
     assert ohlc.at[0, 'o'] == 1078000
     assert ohlc.at[0, 'v'] == 3799
     assert ohlc.at[0, 'mic'] == str(VENUE.GETTEX)
+
+
+def test_ohlc_raw(account, mocker, ohlc_result):
+    def mock_perform_request(self):
+        self._response = ohlc_result
+
+    mocker.patch('lemon.core.market.ApiRequest._perform_request', mock_perform_request)
+    m = MarketData(raw=True)
+    ohlc = m.ohlc(
+        timespan=TIMESPAN.DAY,
+        start=datetime.fromisoformat('2022-04-05'),
+        end=datetime.fromisoformat('2022-04-05'),
+        isin='IE00B3RBWM25',
+        venue=VENUE.GETTEX,
+    )
+
+    assert ohlc == ohlc_result['results']
+
+
+def test_import_without_pandas():
+    code = (
+        'import sys, lemon.core.aio, lemon.core.market, lemon.core.account;'
+        'sys.exit("pandas" in sys.modules or "yaml" in sys.modules)'
+    )
+
+    assert subprocess.run([sys.executable, '-c', code]).returncode == 0
+
+
+def test_iter_instruments(account, mocker, search_instrument_result):
+    def mock_perform_request(self):
+        self._response = search_instrument_result
+
+    mocker.patch('lemon.core.market.ApiRequest._perform_request', mock_perform_request)
+    m = MarketData()
+    instruments = list(m.iter_instruments(search='nasdaq'))
+
+    assert len(instruments) == 4
+    assert instruments[0]['isin'] == 'IE000YDZG487'
+
+
+def test_iter_ohlc(account, mocker, ohlc_result):
+    def mock_perform_request(self):
+        self._response = ohlc_result
+
+    mocker.patch('lemon.core.market.ApiRequest._perform_request', mock_perform_request)
+    m = MarketData()
+    pages = list(
+        m.iter_ohlc(
+            timespan=TIMESPAN.DAY,
+            start=datetime.fromisoformat('2022-04-05'),
+            end=datetime.fromisoformat('2022-04-05'),
+            isin='IE00B3RBWM25',
+            chunked=True,
+        )
+    )
+
+    assert len(pages) == 1
+    assert pages[0][0]['o'] == 1078000
+
+
+def test_latest_quotes(account, mocker):
+    requested = []
+
+    def mock_perform_request(self):
+        requested.append(self.url_params['isin'])
+        self._response = {
+            'results': [
+                {
+                    'isin': isin,
+                    'b_v': 1,
+                    'a_v': 2,
+                    'b': 2121000,
+                    'a': 2123000,
+                    't': '2022-04-05T14:28:20.325+00:00',
+                    'mic': 'XMUN',
+                }
+                for isin in self.url_params['isin']
+            ]
+        }
+
+    mocker.patch('lemon.core.market.ApiRequest._perform_request', mock_perform_request)
+    isins = [f'US{i:010d}' for i in range(25)]
+
+    quotes = MarketData().latest_quotes(isins, venue=VENUE.GETTEX)
+
+    assert sorted(len(chunk) for chunk in requested) == [5, 10, 10]
+    assert list(quotes.index) == isins
+    assert quotes.at['US0000000003', 'b'] == 2121000
+    assert quotes['a'].dtype == 'int64'
+    assert quotes['t'].dt.year.iloc[0] == 2022
+
+
+def test_latest_trades_empty(account):
+    trades = MarketData().latest_trades([])
+
+    assert len(trades) == 0
+    assert 'p' in trades.columns
+
+
+def test_ohlc_windows(account, mocker):
+    def mock_perform_request(self):
+        # One bar at the start and the end of every window
+        self._response = {
+            'results': [
+                {'isin': 'IE00B3RBWM25', 'o': 1, 't': self.url_params['to']},
+                {'isin': 'IE00B3RBWM25', 'o': 1, 't': self.url_params['from']},
+            ]
+        }
+
+    mocker.patch('lemon.core.market.ApiRequest._perform_request', mock_perform_request)
+    progress = mocker.Mock()
+
+    ohlc = MarketData().ohlc(
+        timespan=TIMESPAN.MINUTE,
+        start=datetime.fromisoformat('2022-04-04'),
+        end=datetime.fromisoformat('2022-04-07'),
+        isin='IE00B3RBWM25',
+        progress=progress,
+    )
+
+    assert list(ohlc['t']) == list(
+        pd.date_range('2022-04-04', '2022-04-07', freq='D', tz='UTC')
+    )
+    assert progress.call_count == 3
+    progress.assert_called_with(3, 3)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+from lemon.common.enums import TIMESPAN, VENUE
+from lemon.core.ohlc_store import OHLCStore
+
+
+def day_bar(day: datetime) -> dict:
+    return {
+        'isin': 'IE00B3RBWM25',
+        'o': 1078000,
+        'h': 1079000,
+        'l': 1071400,
+        'c': 1075400,
+        'v': 3799,
+        'pbv': 4089026399,
+        't': day.isoformat(timespec='milliseconds'),
+        'mic': 'XMUN',
+    }
+
+
+@pytest.fixture
+def requested_ranges(mocker):
+    """Mocks /ohlc/d1/ with one bar per day of the requested range"""
+    ranges = []
+
+    def mock_perform_request(self):
+        start = datetime.fromisoformat(self.url_params['from'])
+        end = datetime.fromisoformat(self.url_params['to'])
+        ranges.append((start, end))
+        days = []
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        if day < start:
+            day += timedelta(days=1)
+        while day <= end:
+            days.append(day_bar(day))
+            day += timedelta(days=1)
+        self._response = {'results': days, 'next': None}
+
+    mocker.patch('lemon.core.market.ApiRequest._perform_request', mock_perform_request)
+    return ranges
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OHLCStore(str(tmp_path / 'ohlc.sqlite'))
+    yield store
+    store.close()
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_only_missing_ranges_fetched(account, store, requested_ranges):
+    first = store.ohlc(
+        'IE00B3RBWM25', utc(2022, 4, 4), utc(2022, 4, 8), TIMESPAN.DAY, VENUE.GETTEX
+    )
+    second = store.ohlc(
+        'IE00B3RBWM25', utc(2022, 4, 1), utc(2022, 4, 12), TIMESPAN.DAY, VENUE.GETTEX
+    )
+
+    assert len(first) == 5
+    assert len(second) == 12
+    assert second.at[0, 't'] == pd.Timestamp('2022-04-01', tz='UTC')
+    assert list(second['t']) == sorted(second['t'])
+    assert len(requested_ranges) == 3
+    assert requested_ranges[1] == (
+        utc(2022, 4, 1),
+        utc(2022, 4, 4) - timedelta(milliseconds=1),
+    )
+    assert requested_ranges[2][0] == utc(2022, 4, 8) + timedelta(milliseconds=1)
+
+
+def test_stored_range_read_from_disk(account, store, requested_ranges):
+    store.ohlc('IE00B3RBWM25', utc(2022, 4, 4), utc(2022, 4, 8), TIMESPAN.DAY)
+    bars = store.ohlc('IE00B3RBWM25', utc(2022, 4, 5), utc(2022, 4, 6), TIMESPAN.DAY)
+
+    assert len(requested_ranges) == 1
+    assert len(bars) == 2
+    assert bars.at[0, 'o'] == 1078000
+
+
+def test_current_period_not_held(account, store, requested_ranges):
+    today = datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+    store.ohlc('IE00B3RBWM25', today - timedelta(days=2), today, TIMESPAN.DAY)
+
+    assert store.missing(
+        'IE00B3RBWM25', today - timedelta(days=2), today, TIMESPAN.DAY
+    ) == [(int(today.timestamp() * 1000), int(today.timestamp() * 1000))]
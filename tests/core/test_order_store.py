@@ -0,0 +1,95 @@
+import pytest
+from lemon.common.enums import ORDERSIDE, ORDERSTATUS
+from lemon.core.order_store import OrderStore
+
+
+pytestmark = pytest.mark.parametrize(
+    'listed',
+    [
+        [
+            {'id': 'ord_1', 'status': 'activated', 'quantity': 2},
+            {'id': 'ord_2', 'status': 'activated', 'side': 'sell'},
+            {
+                'id': 'ord_3',
+                'status': 'inactive',
+                'isin': 'US0378331005',
+                'limit_price': 1000000,
+                'created_at': '2022-04-03T09:00:00.000+00:00',
+            },
+            {
+                'id': 'ord_4',
+                'status': 'executed',
+                'created_at': '2022-04-01T09:00:00.000+00:00',
+            },
+        ]
+    ],
+    indirect=True,
+)
+
+
+def test_find(listed):
+    store = OrderStore()
+
+    assert len(store.sync()) == 4
+    assert len(store) == 4
+    assert 'ord_3' in store
+    assert store.get('ord_3').isin == 'US0378331005'
+    ids = {order.id for order in store.find(isin='US02079K3059')}
+    assert ids == {'ord_1', 'ord_2', 'ord_4'}
+    ids = {
+        order.id
+        for order in store.find(
+            isin='US02079K3059', status=ORDERSTATUS.ACTIVATED, side=ORDERSIDE.BUY
+        )
+    }
+    assert ids == {'ord_1'}
+    assert store.find(isin='DE0000000000') == []
+    assert len(store.find()) == 4
+
+
+def test_open_notional(listed, order_result):
+    store = OrderStore()
+    store.sync()
+
+    assert store.open_notional('US02079K3059', ORDERSIDE.BUY) == 2 * 25395000
+    assert store.open_notional('US02079K3059', ORDERSIDE.SELL) == 25395000
+    assert store.open_notional('US02079K3059') == 3 * 25395000
+    # The limit price counts, not the estimated price
+    assert store.open_notional('US0378331005') == 1000000
+
+    store.add(store.get('ord_1'))
+    assert store.open_notional('US02079K3059') == 3 * 25395000
+
+    store.remove('ord_2')
+    assert store.open_notional('US02079K3059') == 2 * 25395000
+    assert {order.id for order in store.find(side=ORDERSIDE.SELL)} == set()
+
+
+def test_sync_updates_in_place(listed, order_result):
+    store = OrderStore()
+    store.sync()
+    order = store.get('ord_1')
+
+    listed['results'][0] = dict(
+        order_result, id='ord_1', status='executed', quantity=2, executed_quantity=2
+    )
+    changed = store.sync()
+
+    assert changed == [order]
+    assert store.get('ord_1') is order
+    assert order.status == 'executed'
+    assert order.executed_quantity == 2
+    assert store.open_notional('US02079K3059', ORDERSIDE.BUY) == 0
+    assert {o.id for o in store.find(status=ORDERSTATUS.EXECUTED)} == {'ord_1', 'ord_4'}
+    assert {o.id for o in store.find(status=ORDERSTATUS.ACTIVATED)} == {'ord_2'}
+
+
+def test_sync_incremental(listed):
+    store = OrderStore()
+    store.sync()
+
+    assert store.sync() == []
+
+    assert listed['requests'][0]['from'] is None
+    # From the oldest order still open, the executed ord_4 is older
+    assert listed['requests'][1]['from'] == '2022-04-02T18:10:54.613000+00:00'
@@ -1,6 +1,8 @@
+from datetime import datetime, timezone
+
 import pytest
 from lemon.common.errors import OrderStatusError
-from lemon.core.orders import Order
+from lemon.core.orders import Order, parse_datetime
 from lemon.common.enums import ORDERSIDE, ORDERSTATUS, ORDERTYPE, VENUE
 
 
@@ -65,6 +67,21 @@ def test_from_result(executed_order_data, account):
     assert isinstance(result, Order)
 
 
+def test_from_result_decodes_fields(executed_order_data, account):
+    result = Order.from_result(executed_order_data)
+
+    assert not hasattr(result, '__dict__')
+    assert result.created_at == datetime(2022, 1, 1)
+    assert result.id == executed_order_data['id']
+
+
+def test_parse_datetime():
+    expected = datetime(2022, 4, 2, 18, 10, 54, 613000, tzinfo=timezone.utc)
+
+    assert parse_datetime('2022-04-02T18:10:54.613+00:00') == expected
+    assert parse_datetime('2022-04-02T18:10:54.613Z') == expected
+
+
 def test_place_order(mocker, placed_order_result, account):
     def mock_perform_request(self):
         self._response = placed_order_result
@@ -128,3 +145,18 @@ def test_to_dict(account):
     assert res['side'] == ORDERSIDE.BUY
     assert res['quantity'] == 1
     assert res['venue'] == VENUE.GETTEX
+
+
+def test_place_assigns_idempotency(mocker, placed_order_result, account):
+    bodies = []
+
+    def mock_perform_request(self):
+        bodies.append(self.body)
+        self._response = placed_order_result
+
+    mocker.patch('lemon.core.orders.ApiRequest._perform_request', mock_perform_request)
+    order = Order('US02079K3059', '2022-04-04', ORDERSIDE.BUY, 1, VENUE.GETTEX)
+
+    order.place()
+
+    assert bodies[0]['idempotency'] is not None
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from lemon.common.frames import QUOTE_SCHEMA, build_frame
+from lemon.core.quote_buffer import QuoteBuffer, QuoteRing
+
+APPLE = 'US0378331005'
+
+
+def quote(i: int, isin: str = APPLE) -> dict:
+    return {
+        'isin': isin,
+        'b_v': 10 + i,
+        'a_v': 20 + i,
+        'b': 1600000 + i * 100,
+        'a': 1601000 + i * 100,
+        't': 1648923054613 + i,
+        'mic': 'XMUN',
+    }
+
+
+def test_ring_wraps_around():
+    ring = QuoteRing(capacity=4)
+    assert len(ring) == 0
+    assert ring.latest() is None
+    assert ring.window().shape == (5, 0)
+
+    for i in range(3):
+        ring.append(i, 10 * i, 10 * i + 1, 1, 1)
+    assert ring.column('t').tolist() == [0, 1, 2]
+
+    for i in range(3, 10):
+        ring.append(i, 10 * i, 10 * i + 1, 1, 1)
+    assert len(ring) == 4
+    assert ring.column('t').tolist() == [6, 7, 8, 9]
+    assert ring.column('b', 2).tolist() == [80, 90]
+    assert ring.column('b', 100).tolist() == [60, 70, 80, 90]
+    assert ring.latest() == {'t': 9, 'b': 90, 'a': 91, 'b_v': 1, 'a_v': 1}
+
+
+def test_window_is_view():
+    ring = QuoteRing(capacity=8)
+    for i in range(13):
+        ring.append(i, i, i, i, i)
+
+    window = ring.window(5)
+
+    assert np.shares_memory(window, ring._data)
+    assert window[1].flags['C_CONTIGUOUS']
+    assert window[0].tolist() == [8, 9, 10, 11, 12]
+
+
+def test_accessors():
+    buffer = QuoteBuffer(capacity=16)
+    buffer.extend([quote(i) for i in range(3)])
+
+    assert buffer.spread(APPLE).tolist() == [1000, 1000, 1000]
+    assert buffer.mid(APPLE, 2).tolist() == [1600600.0, 1600700.0]
+    b = np.array([1600000, 1600100, 1600200])
+    a = b + 1000
+    b_v = np.array([10, 11, 12])
+    a_v = b_v + 10
+    expected = ((b * b_v).sum() + (a * a_v).sum()) / (b_v.sum() + a_v.sum())
+    assert buffer.vwap(APPLE) == pytest.approx(expected)
+    assert buffer.ring(APPLE).times(1)[0] == np.datetime64('2022-04-02T18:10:54.615')
+    assert np.isnan(QuoteRing().vwap())
+
+
+def test_append_times_and_frames():
+    buffer = QuoteBuffer(capacity=16)
+    buffer.append(dict(quote(0), t='2022-04-02T18:10:54.613+00:00'))
+    buffer.append(dict(quote(1), t=datetime(2022, 4, 2, 18, 10, 54, 614000)))
+    # Shaped like the frames of MarketData.latest_quotes
+    latest = [dict(quote(2, 'US88160R1014'), t='2022-04-02T18:10:54.615+00:00')]
+    buffer.extend(build_frame(latest, QUOTE_SCHEMA).set_index('isin'))
+
+    assert buffer.ring(APPLE).column('t').tolist() == [1648923054613, 1648923054614]
+    assert buffer.ring('US88160R1014').column('t').tolist() == [1648923054615]
+    assert len(buffer) == 2
+    assert 'US88160R1014' in buffer
+    with pytest.raises(KeyError):
+        buffer.spread('DE0005933931')
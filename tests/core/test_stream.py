@@ -0,0 +1,180 @@
+import asyncio
+import sys
+import time
+
+import pytest
+from lemon.common.errors import StreamError
+from lemon.common.retry import RetryPolicy
+from lemon.core.stream import LocalBroker, MqttTransport, QuoteStream, Transport
+
+APPLE = 'US0378331005'
+TESLA = 'US88160R1014'
+
+
+def quote(isin: str, b: int = 1603000) -> dict:
+    return {'isin': isin, 'b_v': 10, 'a_v': 10, 'b': b, 'a': b + 1000, 'mic': 'XMUN'}
+
+
+def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def broker() -> LocalBroker:
+    return LocalBroker()
+
+
+def test_subscribe_and_unsubscribe(broker):
+    stream = QuoteStream(broker.transport())
+    quotes = []
+    apple = []
+    stream.on_quote(quotes.append)
+    stream.on_quote(apple.append, APPLE)
+    stream.subscribe([APPLE, TESLA])
+    stream.start()
+
+    broker.publish(quote(APPLE))
+    broker.publish(quote(TESLA))
+    broker.publish(quote('DE0005933931'))
+    wait_for(lambda: stream.received == 2)
+    stream.unsubscribe(TESLA)
+    broker.publish(quote(TESLA))
+    stream.stop()
+
+    assert [q['isin'] for q in quotes] == [APPLE, TESLA]
+    assert [q['seq'] for q in apple] == [1]
+    assert stream.received == 2
+    assert stream.subscriptions == {APPLE}
+    assert broker.connections == 0
+
+
+def test_gap(broker):
+    stream = QuoteStream(broker.transport())
+    gaps = []
+    stream.on_gap(lambda isin, expected, received: gaps.append((expected, received)))
+    stream.subscribe(APPLE)
+    stream.start()
+
+    broker.publish(quote(APPLE))
+    broker.skip(APPLE, 2)
+    broker.publish(quote(APPLE))
+    stream.stop()
+
+    assert gaps == [(2, 4)]
+    assert stream.missed == 2
+    assert stream.received == 2
+
+
+def test_quote_queued_before_unsubscribe(broker):
+    stream = QuoteStream(broker.transport())
+    gaps = []
+    stream.on_gap(lambda isin, expected, received: gaps.append((expected, received)))
+    stream.subscribe(APPLE)
+    stream._deliver(dict(quote(APPLE), seq=1))
+
+    stream.unsubscribe(APPLE)
+    # Still in the queue of the dispatch thread when unsubscribed
+    stream._deliver(dict(quote(APPLE), seq=2))
+    stream.subscribe(APPLE)
+    stream._deliver(dict(quote(APPLE), seq=7))
+    stream._deliver(dict(quote(APPLE), seq=8))
+
+    assert gaps == []
+    assert stream.received == 3
+
+
+def test_reconnect(broker):
+    stream = QuoteStream(broker.transport(), retry=RetryPolicy(backoff=0.001))
+    quotes = []
+    gaps = []
+    stream.on_quote(quotes.append)
+    stream.on_gap(lambda isin, expected, received: gaps.append((expected, received)))
+    stream.subscribe(APPLE)
+    stream.start()
+
+    broker.publish(quote(APPLE))
+    # The first attempt fails, the second one succeeds
+    broker.drop(refuse=1)
+    broker.publish(quote(APPLE))
+    wait_for(lambda: stream.reconnects == 1)
+    broker.publish(quote(APPLE))
+    stream.stop()
+
+    assert [q['seq'] for q in quotes] == [1, 3]
+    assert gaps == [(2, 3)]
+
+
+def test_reconnect_without_seq():
+    broker = LocalBroker(seq=False)
+    stream = QuoteStream(broker.transport(), retry=RetryPolicy(backoff=0.001))
+    gaps = []
+    stream.on_gap(lambda isin, since, until: gaps.append((isin, since, until)))
+    stream.subscribe([APPLE, TESLA])
+    stream.start()
+
+    broker.publish(dict(quote(APPLE), t='2022-04-02T18:10:54.615+00:00'))
+    wait_for(lambda: stream.received == 1)
+    broker.drop()
+    wait_for(lambda: stream.reconnects == 1)
+    stream.stop()
+
+    assert [(isin, since) for isin, since, until in gaps] == [
+        (APPLE, 1648923054615),
+        (TESLA, stream._lost_at),
+    ]
+    assert all(until >= stream._lost_at for isin, since, until in gaps)
+
+
+def test_coroutine_callback_needs_loop(broker):
+    async def on_quote(quote: dict) -> None:
+        pass
+
+    with pytest.raises(ValueError):
+        QuoteStream(broker.transport()).on_quote(on_quote)
+
+
+def test_give_up_reconnecting(broker):
+    stream = QuoteStream(
+        broker.transport(), retry=RetryPolicy(max_retries=1, backoff=0.001)
+    )
+    stream.start()
+
+    broker.drop(refuse=2)
+    wait_for(lambda: stream.error is not None)
+    stream.stop()
+
+    assert isinstance(stream.error, StreamError)
+    assert stream.reconnects == 0
+
+
+def test_asyncio_delivery(broker):
+    async def main() -> list:
+        quotes = asyncio.Queue()
+
+        async def on_quote(quote: dict) -> None:
+            await quotes.put(quote)
+
+        stream = QuoteStream(broker.transport(), loop=asyncio.get_running_loop())
+        stream.on_quote(on_quote)
+        stream.subscribe(APPLE)
+        with stream:
+            broker.publish(quote(APPLE, 1))
+            broker.publish(quote(APPLE, 2))
+            return [(await quotes.get())['b'] for _ in range(2)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_transport_is_abstract():
+    with pytest.raises(TypeError):
+        Transport()
+
+
+def test_mqtt_without_paho(mocker):
+    mocker.patch.dict(sys.modules, {'paho': None, 'paho.mqtt': None})
+
+    with pytest.raises(StreamError):
+        QuoteStream(MqttTransport(token='123')).start()
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from lemon.common.enums import ORDERSTATUS
+from lemon.core.orders import Order
+from lemon.core.watcher import OrderWatcher
+
+
+def test_poll_fires_on_transition(listed, order_result):
+    order = Order.from_result(dict(order_result, status='activated'))
+    watcher = OrderWatcher([order])
+    executed = []
+    changes = []
+    watcher.on_transition(lambda o, old, new: executed.append(o), ORDERSTATUS.EXECUTED)
+    watcher.on_transition(lambda o, old, new: changes.append((old, new)))
+
+    assert watcher.poll() == []
+
+    listed['results'][0] = dict(order_result, status='executed', executed_quantity=1)
+    transitions = watcher.poll()
+
+    assert transitions == [(order, 'activated', 'executed')]
+    assert executed == [order]
+    assert changes == [('activated', 'executed')]
+    assert order.executed_quantity == 1
+    # Final status, no longer watched
+    assert watcher.orders == []
+    assert watcher.poll() == []
+
+
+def test_poll_lists_once(listed, order_result):
+    orders = [
+        Order.from_result(dict(order_result, id=f'ord_{i}', status='activated'))
+        for i in range(3)
+    ]
+    watcher = OrderWatcher(orders)
+
+    watcher.poll()
+
+    assert len(listed['requests']) == 1
+    assert listed['requests'][0]['from'] == '2022-04-02T18:10:54.613000+00:00'
+
+
+def test_watch_draft(account):
+    order = Order('US02079K3059', '2022-04-04', 'buy', 1, 'xmun')
+
+    with pytest.raises(ValueError):
+        OrderWatcher([order])
+
+
+def test_interval(order_result, account):
+    order = Order.from_result(dict(order_result, status='activated'))
+    watcher = OrderWatcher([order], min_interval=1, max_interval=60, age_factor=0.1)
+    # Monday 2022-04-04, 12:00 in Munich
+    noon = datetime(2022, 4, 4, 10, tzinfo=timezone.utc)
+    order._created_at = noon - timedelta(seconds=5)
+
+    assert watcher.interval(noon) == 1
+    assert watcher.interval(noon + timedelta(minutes=5)) == pytest.approx(30.5)
+    assert watcher.interval(noon + timedelta(hours=1)) == 60
+    # Closed at night and on weekends
+    assert watcher.interval(noon.replace(hour=22)) == 60
+    assert watcher.interval(noon + timedelta(days=5, seconds=-5)) == 60
+
+
+@pytest.mark.parametrize('dateutil', [False, True])
+def test_interval_summer_time(order_result, account, mocker, dateutil):
+    if dateutil:
+        # Time zones of Python < 3.9
+        from dateutil.tz import gettz
+
+        mocker.patch('lemon.core.watcher._timezone', gettz)
+    order = Order.from_result(dict(order_result, status='activated'))
+    watcher = OrderWatcher([order], min_interval=1, max_interval=60, age_factor=0)
+    # 21:30 in Munich in winter, 22:30 in summer
+    winter = datetime(2022, 3, 25, 20, 30, tzinfo=timezone.utc)
+    summer = datetime(2022, 4, 1, 20, 30, tzinfo=timezone.utc)
+
+    assert watcher.interval(winter) == 1
+    assert watcher.interval(summer) == 60
+
+
+def test_interval_allday(order_result, account):
+    order = Order.from_result(dict(order_result, status='activated', venue='allday'))
+    watcher = OrderWatcher([order], min_interval=1, max_interval=60, age_factor=0)
+    sunday_night = datetime(2022, 4, 3, 23, tzinfo=timezone.utc)
+
+    assert watcher.interval(sunday_night) == 1